@@ -0,0 +1,297 @@
+# quizlib/cli.py
+
+"""
+Non-interactive subcommands (`quizprog due|stats|files|export|search|duplicates`) that
+print JSON and never touch the TTY, for cron jobs and status-bar widgets.
+The one exception is `search --quiz`, which starts a quiz over the results.
+"""
+
+import json
+import os
+import sys
+
+from .loader import QUIZ_DATA_FOLDER, current_corpus_version, load_all_quizzes, load_exam_dates
+from .performance import (
+    PERFORMANCE_FILE,
+    links_path,
+    load_link_groups,
+    load_links,
+    load_performance_data,
+    perf_store_version,
+    save_link_groups,
+)
+from .records import split_course_section
+from .search import SearchIndex
+from .stats import (
+    StatsAggregator,
+    load_stats_cache,
+    save_stats_cache,
+    stats_cache_path,
+)
+from .utils import effective_today
+
+
+def add_subcommands(parser):
+    sub = parser.add_subparsers(dest="command", metavar="COMANDO")
+    for name, help_text in (
+        ("due", "Número de preguntas programadas para hoy"),
+        ("stats", "Estadísticas de la selección"),
+        ("files", "Estadísticas por archivo"),
+        ("export", "Estado de cada pregunta de la selección"),
+    ):
+        _add_selection_options(sub.add_parser(name, help=help_text))
+
+    cmd = sub.add_parser("search", help="Buscar preguntas por texto")
+    cmd.add_argument("query", help="Texto a buscar (sin distinguir tildes ni mayúsculas)")
+    cmd.add_argument("--limit", type=int, default=20, help="Máximo de resultados listados")
+    cmd.add_argument("--quiz", action="store_true", help="Hacer un quiz con los resultados")
+    _add_selection_options(cmd)
+
+    cmd = sub.add_parser("duplicates", help="Grupos de preguntas casi duplicadas")
+    cmd.add_argument("--threshold", type=float, default=None,
+                     help="Similitud mínima (Jaccard de 0 a 1, por defecto 0.8)")
+    cmd.add_argument("--link", action="store_true",
+                     help="Enlazar cada grupo para que comparta la programación")
+    _add_selection_options(cmd)
+
+
+def _add_selection_options(cmd):
+    cmd.add_argument("--course", help="Filtrar por curso")
+    cmd.add_argument("--file", help="Filtrar por archivo (ruta relativa a la carpeta de quizzes)")
+    cmd.add_argument("--tag", help="Filtrar por etiqueta")
+    cmd.add_argument("--folder", default=QUIZ_DATA_FOLDER, help="Carpeta de quizzes")
+    cmd.add_argument("--perf-file", default=PERFORMANCE_FILE, help="Archivo de desempeño")
+
+
+class Selection:
+    """Course / file / tag filters of a subcommand."""
+
+    def __init__(self, folder, course=None, file=None, tag=None):
+        self.folder = folder
+        self.course = course
+        self.tag = tag
+        self.file = None
+        if file:
+            path = file if os.path.isabs(file) else os.path.join(folder, file)
+            self.file = os.path.normpath(path)
+
+    @property
+    def active(self):
+        return [f for f in (self.course, self.file, self.tag) if f]
+
+    def matches_file(self, filepath):
+        if self.file and os.path.normpath(filepath) != self.file:
+            return False
+        if self.course:
+            course, _section = split_course_section(os.path.relpath(filepath, self.folder))
+            if course != self.course:
+                return False
+        return True
+
+    def matches(self, q):
+        if not self.matches_file(q.source):
+            return False
+        return not self.tag or self.tag in q.tags
+
+
+def _load(selection, perf_file):
+    questions, _cursos, _info = load_all_quizzes(selection.folder)
+    return questions, load_performance_data(perf_file)
+
+
+def _full_stats(selection, perf_file):
+    """Whole-repository rollups: from the stats cache if it is current."""
+    corpus_version = current_corpus_version(selection.folder)
+    perf_version = perf_store_version(perf_file)
+    cache_path = stats_cache_path(perf_file)
+    cached = load_stats_cache(cache_path, perf_version, corpus_version)
+    if cached is not None:
+        return StatsAggregator.from_cache([], {}, cached, selection.folder)
+    questions, perf_data = _load(selection, perf_file)
+    stats = StatsAggregator(questions, perf_data, selection.folder)
+    save_stats_cache(cache_path, stats, perf_version, current_corpus_version(selection.folder))
+    return stats
+
+
+def _selection_stats(selection, perf_file, by_file=False):
+    """
+    (stats, counts, scoped) for the selection. A single course or file filter
+    (or a single tag, unless per-file rows are needed) is answered from the
+    full rollups; otherwise only the matching questions are aggregated and
+    `scoped` is True.
+    """
+    filters = selection.active
+    if not filters or (len(filters) == 1 and not (by_file and selection.tag)):
+        stats = _full_stats(selection, perf_file)
+        if selection.course:
+            return stats, stats.course(selection.course), False
+        if selection.file:
+            return stats, stats.file(selection.file), False
+        if selection.tag:
+            return stats, stats.tag(selection.tag), False
+        return stats, stats.repository, True
+    questions, perf_data = _load(selection, perf_file)
+    stats = StatsAggregator([q for q in questions if selection.matches(q)], perf_data, selection.folder)
+    return stats, stats.repository, True
+
+
+def _rel(filepath, folder):
+    return os.path.relpath(filepath, folder) if filepath else None
+
+
+def cmd_due(selection, perf_file):
+    today = effective_today()
+    _stats, counts, _scoped = _selection_stats(selection, perf_file)
+    return {"date": today.isoformat(), "due": counts.due(today), "total": counts.total}
+
+
+def cmd_stats(selection, perf_file):
+    today = effective_today()
+    stats, counts, scoped = _selection_stats(selection, perf_file)
+    data = {"date": today.isoformat()}
+    data.update(counts.as_dict(today))
+    if scoped:
+        data["courses"] = {
+            course: c.as_dict(today)
+            for course, c in sorted(stats.courses.items(), key=lambda kv: str(kv[0]))
+        }
+    elif selection.course:
+        data["courses"] = {selection.course: counts.as_dict(today)}
+    return data
+
+
+def cmd_files(selection, perf_file):
+    today = effective_today()
+    stats, _counts, _scoped = _selection_stats(selection, perf_file, by_file=True)
+    rows = []
+    # Rollups are keyed by path relative to the quiz folder.
+    for rel, c in sorted(stats.files.items(), key=lambda kv: str(kv[0])):
+        if not rel or not c.total or not selection.matches_file(os.path.join(selection.folder, rel)):
+            continue
+        course, section = split_course_section(rel)
+        row = {"file": rel, "course": course, "section": section}
+        row.update(c.as_dict(today))
+        rows.append(row)
+    return {"date": today.isoformat(), "files": rows}
+
+
+def cmd_export(selection, perf_file):
+    questions, perf_data = _load(selection, perf_file)
+    rows = []
+    for q in questions:
+        if not selection.matches(q):
+            continue
+        entry = perf_data.get(str(q.id), {})
+        history = entry.get("history", [])
+        rows.append({
+            "id": q.id,
+            "course": q.course,
+            "section": q.section,
+            "file": _rel(q.source, selection.folder),
+            "tags": list(q.tags),
+            "question": q.question,
+            "attempts": len(history),
+            "last_result": history[-1] if history else None,
+            "next_review": entry.get("next_review"),
+            "ease": entry.get("ease"),
+            "interval": entry.get("interval"),
+            "repetition": entry.get("repetition"),
+        })
+    return {"questions": rows}
+
+
+def _search(selection, query):
+    questions, _cursos, _info = load_all_quizzes(selection.folder)
+    by_id = {q.id: q for q in questions}
+    ids = SearchIndex.build(questions, selection.folder).search(query)
+    return questions, [by_id[qid] for qid in ids if selection.matches(by_id[qid])]
+
+
+def cmd_search(selection, perf_file, query, limit=20):
+    _questions, hits = _search(selection, query)
+    return {
+        "query": query,
+        "count": len(hits),
+        "results": [
+            {
+                "id": q.id,
+                "course": q.course,
+                "section": q.section,
+                "file": _rel(q.source, selection.folder),
+                "tags": list(q.tags),
+                "question": q.question,
+            }
+            for q in hits[:limit]
+        ],
+    }
+
+
+def quiz_search(selection, perf_file, query):
+    """Interactive quiz over the search results; answers go to the default perf store."""
+    from .engine import play_quiz
+
+    questions, hits = _search(selection, query)
+    play_quiz(questions, load_performance_data(perf_file), filter_mode="all",
+              exam_dates=load_exam_dates(selection.folder),
+              question_ids=[q.id for q in hits],
+              links=load_links(links_path(perf_file)))
+    return 0
+
+
+def cmd_duplicates(selection, perf_file, threshold=None, link=False):
+    from .dedup import DEFAULT_THRESHOLD, find_clusters, merge_groups
+
+    threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+    questions, _perf = _load(selection, perf_file)
+    questions = [q for q in questions if selection.matches(q)]
+    by_id = {q.id: q for q in questions}
+    clusters = find_clusters(questions, threshold)
+    result = {
+        "threshold": threshold,
+        "clusters": [
+            {
+                "similarity": similarity,
+                "questions": [
+                    {"id": qid, "file": _rel(by_id[qid].source, selection.folder),
+                     "question": by_id[qid].question}
+                    for qid in ids
+                ],
+            }
+            for similarity, ids in clusters
+        ],
+    }
+    if link:
+        path = links_path(perf_file)
+        groups = merge_groups(load_link_groups(path) + [[str(i) for i in ids] for _s, ids in clusters])
+        save_link_groups(groups, path)
+        result["linked_groups"] = len(groups)
+    return result
+
+
+COMMANDS = {
+    "due": cmd_due,
+    "stats": cmd_stats,
+    "files": cmd_files,
+    "export": cmd_export,
+}
+
+
+def run(args, out=None):
+    """Run the subcommand in args and print its JSON result."""
+    selection = Selection(args.folder, args.course, args.file, args.tag)
+    if args.command == "search":
+        if args.quiz:
+            if os.path.abspath(args.perf_file) != os.path.abspath(PERFORMANCE_FILE):
+                print("[!] --quiz solo funciona con el archivo de desempeño por defecto",
+                      file=sys.stderr)
+                return 2
+            return quiz_search(selection, args.perf_file, args.query)
+        result = cmd_search(selection, args.perf_file, args.query, args.limit)
+    elif args.command == "duplicates":
+        result = cmd_duplicates(selection, args.perf_file, args.threshold, args.link)
+    else:
+        result = COMMANDS[args.command](selection, args.perf_file)
+    out = out or sys.stdout
+    json.dump(result, out, ensure_ascii=False, indent=2)
+    out.write("\n")
+    return 0
@@ -0,0 +1,237 @@
+# quizlib/dedup.py
+
+"""
+Near-duplicate questions: MinHash signatures over word shingles of the
+question and its answers, grouped with LSH banding so only questions that
+share a band are compared (no all-pairs scan).
+"""
+
+import zlib
+from collections import defaultdict
+
+from . import profiling
+from .search import words
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+# Minimum similarity for the loader to keep the ID of a reworded question.
+EDIT_THRESHOLD = 0.7
+
+_MASK = (1 << 64) - 1
+_BIN_SHIFT = 64 - (NUM_PERM.bit_length() - 1)
+_LOW = (1 << _BIN_SHIFT) - 1
+_EMPTY = 1 << 64
+# Fixed constants: signatures are compared across runs, so they must not change.
+_MULT = 0x9E3779B97F4A7C15
+_ADD = 0x632BE59BD9B4E019
+
+
+def question_text(q):
+    """Question plus answers in a stable order (answer order does not matter)."""
+    texts = getattr(q, "answer_texts", None)
+    if texts is None:
+        texts = [a.get("text", "") for a in q.get("answers", [])]
+    return " ".join([q.get("question", "")] + sorted(texts))
+
+
+def correct_text(q):
+    """Texts of the correct answers, in a stable order."""
+    return " ".join(sorted(a.get("text", "") for a in q.get("answers", []) if a.get("correct")))
+
+
+def answer_key(q):
+    """
+    Short digest of the correct answers, ignoring case, accents and
+    punctuation; kept next to the compact signature in the loader index.
+    """
+    texts = sorted(" ".join(words(a.get("text", "")))
+                   for a in q.get("answers", []) if a.get("correct"))
+    return f"{zlib.crc32(chr(0).join(texts).encode('utf-8')):08x}"
+
+
+def shingles(text):
+    """Hashed word n-grams of the normalized text."""
+    tokens = words(text)
+    if len(tokens) < SHINGLE_SIZE:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    return {zlib.crc32(g.encode("utf-8")) for g in grams}
+
+
+def minhash(shingle_set):
+    """
+    MinHash signature (NUM_PERM values) of a shingle set, or None if it is
+    empty. One-permutation hashing: each shingle is hashed once and kept as
+    the minimum of its bin; empty bins borrow the next filled bin's value
+    (rotation densification), so the cost is O(shingles), not O(shingles × NUM_PERM).
+    """
+    if not shingle_set:
+        return None
+    sig = [_EMPTY] * NUM_PERM
+    for h in shingle_set:
+        x = (h * _MULT + _ADD) & _MASK
+        b = x >> _BIN_SHIFT
+        v = x & _LOW
+        if v < sig[b]:
+            sig[b] = v
+    if _EMPTY in sig:
+        filled = [i for i, v in enumerate(sig) if v != _EMPTY]
+        j = 0
+        for i in range(NUM_PERM):
+            if sig[i] != _EMPTY:
+                continue
+            while j < len(filled) and filled[j] < i:
+                j += 1
+            src = filled[j % len(filled)]
+            sig[i] = sig[src] + ((src - i) % NUM_PERM) * (_LOW + 1)
+    return sig
+
+
+def compact_signature(q):
+    """
+    b-bit MinHash of a question (low byte of each value) as a hex string,
+    small enough to keep in the loader index; None for an empty question.
+    """
+    sig = minhash(shingles(question_text(q)))
+    return bytes(v & 0xFF for v in sig).hex() if sig else None
+
+
+def compact_similarity(a, b):
+    """Jaccard estimate from two compact signatures (corrected for 8-bit collisions)."""
+    x, y = bytes.fromhex(a), bytes.fromhex(b)
+    agree = sum(i == j for i, j in zip(x, y)) / len(x)
+    return max(0.0, (agree - 1 / 256) / (1 - 1 / 256))
+
+
+def match_rewordings(dropped, added, threshold=EDIT_THRESHOLD, compatible=None):
+    """
+    Pair added questions with the dropped ones they are rewordings of.
+
+    dropped maps old id → compact signature, added maps any key → compact
+    signature. Candidates come from LSH bands of the signatures; pairs at or
+    above threshold, and accepted by compatible(key, old_id) if given, are
+    taken best first, one-to-one. Returns {key: old_id}.
+    """
+    buckets = defaultdict(list)
+    for qid, sig in dropped.items():
+        raw = bytes.fromhex(sig)
+        for band in range(BANDS):
+            buckets[(band, raw[band * ROWS:(band + 1) * ROWS])].append(qid)
+
+    scored = []
+    for key, sig in added.items():
+        raw = bytes.fromhex(sig)
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(buckets.get((band, raw[band * ROWS:(band + 1) * ROWS]), ()))
+        for qid in candidates:
+            sim = compact_similarity(sig, dropped[qid])
+            if sim >= threshold and (compatible is None or compatible(key, qid)):
+                scored.append((sim, key, qid))
+
+    matches = {}
+    used = set()
+    for _sim, key, qid in sorted(scored, key=lambda t: -t[0]):
+        if key not in matches and qid not in used:
+            matches[key] = qid
+            used.add(qid)
+    return matches
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def candidate_pairs(signatures):
+    """Pairs of keys whose signatures agree on at least one LSH band."""
+    buckets = defaultdict(list)
+    for key, sig in signatures.items():
+        for band in range(BANDS):
+            buckets[(band, tuple(sig[band * ROWS:(band + 1) * ROWS]))].append(key)
+    pairs = set()
+    for members in buckets.values():
+        if len(members) > 1:
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pairs.add((a, b) if a < b else (b, a))
+    return pairs
+
+
+def find_clusters(questions, threshold=DEFAULT_THRESHOLD):
+    """
+    Groups of distinct question ids whose shingle Jaccard similarity is at
+    least threshold, as a list of (similarity, [ids]) sorted by decreasing
+    similarity. similarity is the weakest link that joined the group.
+
+    The correct answers must be that similar too: two wordings that share the
+    options but mark a different one as correct are different questions.
+    """
+    with profiling.span("dedup.signatures"):
+        shingle_sets = {}
+        answer_keys = {}
+        for q in questions:
+            qid = q.get("_quiz_id")
+            if qid not in shingle_sets:
+                shingle_sets[qid] = shingles(question_text(q))
+                answer_keys[qid] = shingles(correct_text(q))
+        signatures = {
+            qid: sig for qid, sig in
+            ((qid, minhash(s)) for qid, s in shingle_sets.items()) if sig is not None
+        }
+
+    with profiling.span("dedup.lsh"):
+        edges = []
+        for a, b in candidate_pairs(signatures):
+            sim = jaccard(shingle_sets[a], shingle_sets[b])
+            if sim >= threshold and (answer_keys[a] == answer_keys[b]
+                                     or jaccard(answer_keys[a], answer_keys[b]) >= threshold):
+                edges.append((sim, a, b))
+        profiling.count("dedup.edges", len(edges))
+
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            parent[x] = parent.get(parent[x], parent[x])
+            x = parent[x]
+        return x
+
+    weakest = {}
+    for sim, a, b in sorted(edges, reverse=True):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[rb] = ra
+            weakest[ra] = min(sim, weakest.pop(ra, 1.0), weakest.pop(rb, 1.0))
+
+    groups = defaultdict(list)
+    for qid in {a for _s, a, _b in edges} | {b for _s, _a, b in edges}:
+        groups[find(qid)].append(qid)
+    clusters = [(round(weakest[root], 3), sorted(ids)) for root, ids in groups.items()]
+    clusters.sort(key=lambda c: (-c[0], c[1]))
+    return clusters
+
+
+def merge_groups(groups):
+    """Union of overlapping id groups, each sorted, as a sorted list of lists."""
+    owner = {}
+    merged = []
+    for group in groups:
+        current = set(group)
+        for other in {owner[m] for m in group if m in owner}:
+            current |= merged[other]
+            merged[other] = set()
+        merged.append(current)
+        for m in current:
+            owner[m] = len(merged) - 1
+    groups = [sorted(g, key=_id_key) for g in merged if len(g) > 1]
+    return sorted(groups, key=lambda g: _id_key(g[0]))
+
+
+def _id_key(qid):
+    return (0, int(qid)) if str(qid).isdigit() else (1, str(qid))
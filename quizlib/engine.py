@@ -1,14 +1,14 @@
 # quizlib/engine.py
 
-import os
 import re
 import random
-import copy
-from datetime import date, datetime, time, timedelta
+from datetime import date, datetime, timedelta
 
+from . import profiling
 from .performance import save_performance_data
-from .utils import clear_screen, press_any_key
+from .utils import Frame, clear_screen, learning_date, press_any_key
 from .loader import QUIZ_DATA_FOLDER
+from .records import question_course
 
 LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
@@ -41,7 +41,7 @@ class Chronometer:
         s = total % 60
         return f"{h:02d}:{m:02d}:{s:02d}"
 
-# module‐level chrono, set in play_quiz()
+# module‐level chrono for the CLI, set in play_quiz(); QuizSession keeps its own
 chrono = None
 
 
@@ -50,12 +50,7 @@ def effective_today():
     Return the 'current learning date', rolling over at 05:30 AM local time.
     If now < 05:30, treat it as the previous day.
     """
-    now = datetime.now()
-    cutoff = time(5, 30)
-    today = date.today()
-    if now.time() < cutoff:
-        return today - timedelta(days=1)
-    return today
+    return learning_date(datetime.now(), date.today())
 
 
 def clean_embedded_answers(question_text):
@@ -103,100 +98,55 @@ def colorize_answers(question_text, shuffled_answers, shuffle_mapping,
     return "\n".join(lines)
 
 
-def preguntar(qid, question_data, perf_data, session_counts,
-              disable_shuffle=False, exam_dates=None,
-              position=None, total=None):
+def parse_answer(raw):
     """
-    Presenta una pregunta con SM-2 y estadísticas. Pausa el cronómetro
-    durante la sección de explicación, luego lo reanuda.
+    Convierte la respuesta tecleada ("A,C", "a c", "A;C") en un conjunto de letras.
     """
-    global chrono
-    # ensure timer is running while answering
-    if chrono:
-        chrono.start()
+    if not raw:
+        return set()
+    if not isinstance(raw, str):
+        raw = ",".join(raw)
+    return set(filter(None, re.split(r'[,\s;]+', raw.strip().upper())))
 
-    qid_str = str(qid)
-    if qid_str not in perf_data:
-        perf_data[qid_str] = {"history": []}
-    pd = perf_data[qid_str]
 
-    # Initialize SM-2 fields if missing
+def shuffle_answers(answers, disable_shuffle=False, rng=random):
+    """
+    Devuelve (shuffled, shuffle_map), donde shuffle_map[i] es la nueva
+    posición de la respuesta original i.
+    """
+    order = list(range(len(answers)))
+    if not disable_shuffle:
+        rng.shuffle(order)
+    shuffled = [answers[i] for i in order]
+    shuffle_map = {orig: pos for pos, orig in enumerate(order)}
+    return shuffled, shuffle_map
+
+
+def ensure_perf_entry(perf_data, qid, today=None):
+    """
+    Devuelve la entrada de perf_data para qid, creándola con los campos
+    SM-2 iniciales si falta.
+    """
+    qid_str = str(qid)
+    pd = perf_data.get(qid_str)
+    if pd is None:
+        pd = perf_data[qid_str] = {"history": []}
+    pd.setdefault("history", [])
     if "ease" not in pd:
-        today = effective_today()
+        today = today or effective_today()
         pd.update({
             "ease": 2.5,
             "interval": 0,
             "repetition": 0,
             "next_review": today.isoformat()
         })
+    return pd
 
-    clear_screen()
-    text = clean_embedded_answers(question_data["question"])
-    orig = question_data["answers"]
-
-    # Header with progress
-    if position is not None and total is not None:
-        print(f"Pregunta {qid}   {position}/{total}\n{text}\n")
-    else:
-        print(f"Pregunta {qid}:\n{text}\n")
-
-    # Shuffle answers
-    if not disable_shuffle:
-        shuffled = copy.deepcopy(orig)
-        random.shuffle(shuffled)
-    else:
-        shuffled = orig[:]
-
-    shuffle_map = {i: shuffled.index(ans) for i, ans in enumerate(orig)}
-
-    for idx, ans in enumerate(shuffled):
-        print(f"[{LETTERS[idx]}] {remap_answer_references(ans['text'], shuffle_map)}")
-    print("\n[0] Salir\n")
 
-    correct_letters = [
-        LETTERS[shuffle_map[i]]
-        for i, ans in enumerate(orig) if ans.get("correct", False)
-    ]
-    if len(correct_letters) > 1:
-        print("Puede haber varias respuestas correctas, p.ej. 'A,C'")
-
-    # User input
-    ui = input("Tu respuesta: ").strip().upper()
-    user_set = set()
-    if ui == "0":
-        clear_screen()
-        print("¿Confirmas salir? (s/n)")
-        conf = input("> ").strip().lower()
-        if conf == "s":
-            pd["history"].append("skipped")
-            session_counts["unanswered"] += 1
-            save_performance_data(perf_data)
-            return None
-        else:
-            pd["history"].append("wrong")
-            session_counts["wrong"] += 1
-            quality = 0
-
-    elif ui == "":
-        # Skip
-        pd["history"].append("skipped")
-        session_counts["unanswered"] += 1
-        quality = 0
-
-    else:
-        parts = re.split(r'[,\s;]+', ui)
-        user_set = set(filter(None, parts))
-        correct_set = set(correct_letters)
-        is_correct = user_set == correct_set and len(user_set) == len(correct_letters)
-        pd["history"].append("correct" if is_correct else "wrong")
-        if is_correct:
-            session_counts["correct"] += 1
-            quality = 5
-        else:
-            session_counts["wrong"] += 1
-            quality = 0
-
-    # SM-2 scheduling...
+def schedule_review(pd, quality, course=None, exam_dates=None, today=None):
+    """
+    Aplica SM-2 a la entrada pd y la limita por la fecha de examen del curso.
+    """
     if quality >= 3:
         pd["repetition"] += 1
         if pd["repetition"] == 1:
@@ -205,59 +155,332 @@ def preguntar(qid, question_data, perf_data, session_counts,
             pd["interval"] = 3
         else:
             pd["interval"] = round(pd["interval"] * pd["ease"])
-        pd["ease"] = max(
-            1.3,
-            pd["ease"] + (0.1 - (5-quality) * (0.08 + (5-quality) * 0.02))
-        )
     else:
         pd["repetition"] = 0
         pd["interval"] = 1
-        pd["ease"] = max(
-            1.3,
-            pd["ease"] + (0.1 - (5-quality) * (0.08 + (5-quality) * 0.02))
-        )
+    pd["ease"] = max(
+        1.3,
+        pd["ease"] + (0.1 - (5-quality) * (0.08 + (5-quality) * 0.02))
+    )
 
+    today = today or effective_today()
     # Cap interval by exam_dates if provided...
-    if exam_dates:
-        source = question_data.get("_quiz_source", "")
-        curso = None
-        if isinstance(source, str):
-            parts = os.path.normpath(source).split(os.sep)
-            if len(parts) >= 2:
-                curso = parts[-2]
-        fecha_ex = exam_dates.get(curso)
-        if fecha_ex:
-            try:
-                ex_date = date.fromisoformat(fecha_ex)
-                today = effective_today()
-                days_left = max((ex_date - today).days, 1)
-                pd["interval"] = min(pd["interval"], days_left)
-            except ValueError:
-                pass
+    fecha_ex = exam_dates.get(course) if exam_dates else None
+    if fecha_ex:
+        try:
+            ex_date = date.fromisoformat(fecha_ex)
+            days_left = max((ex_date - today).days, 1)
+            pd["interval"] = min(pd["interval"], days_left)
+        except ValueError:
+            pass
 
     # Compute next review date
-    next_day = effective_today() + timedelta(days=pd["interval"])
-    pd["next_review"] = next_day.isoformat()
+    pd["next_review"] = (today + timedelta(days=pd["interval"])).isoformat()
+    return pd
+
+
+def record_answer(perf_data, qid, result, course=None, exam_dates=None, today=None):
+    """
+    Registra un resultado ("correct", "wrong", "skipped") y reprograma la pregunta.
+    """
+    today = today or effective_today()
+    pd = ensure_perf_entry(perf_data, qid, today)
+    pd["history"].append(result)
+    schedule_review(pd, 5 if result == "correct" else 0, course, exam_dates, today)
+    return pd
+
+
+SCHEDULE_FIELDS = ("ease", "interval", "repetition", "next_review")
+
+
+def share_schedule(perf_data, qid, links):
+    """
+    Copia la programación SM-2 de qid a las preguntas enlazadas con ella
+    (casi duplicadas). El historial de cada una no cambia. Devuelve sus ids.
+    """
+    others = links.get(str(qid)) if links else None
+    src = perf_data.get(str(qid))
+    if not others or not src or "ease" not in src:
+        return []
+    for other in others:
+        pd = perf_data.setdefault(other, {"history": []})
+        pd.setdefault("history", [])
+        for key in SCHEDULE_FIELDS:
+            pd[key] = src[key]
+    return list(others)
+
+
+def collapse_linked(pairs, links):
+    """Deja solo la primera pregunta de cada grupo enlazado."""
+    if not links:
+        return pairs
+    covered = set()
+    kept = []
+    for qid, q in pairs:
+        if str(qid) in covered:
+            continue
+        covered.update(links.get(str(qid), ()))
+        kept.append((qid, q))
+    return kept
+
+
+def session_score(counts):
+    """Puntuación sobre 10 de una sesión, o None si no hubo respuestas."""
+    c, w, u = counts["correct"], counts["wrong"], counts["unanswered"]
+    total = c + w + u
+    if not total:
+        return None
+    return (c*0.333 - w*0.111)/total*30
+
+
+class QuizSession:
+    """
+    Sesión de quiz sin E/S: next_question() devuelve el modelo a mostrar,
+    submit() corrige y reprograma, finish() resume la sesión.
+
+    No usa estado global, así que varias sesiones pueden convivir en el
+    mismo proceso. `save` es un callable opcional que recibe perf_data
+    después de cada respuesta; `stats` (StatsAggregator) se actualiza también.
+    Con `links` ({qid: [ids enlazados]}) solo se pregunta un miembro de cada
+    grupo y su nueva programación se copia a los demás.
+    """
+
+    def __init__(self, pairs, perf_data, exam_dates=None, shuffle=True,
+                 rng=None, save=None, stats=None, links=None):
+        self.links = links
+        self.pairs = collapse_linked(list(pairs), links)
+        self.perf_data = perf_data
+        self.exam_dates = exam_dates or {}
+        self.shuffle = shuffle
+        self.rng = rng or random.Random()
+        self.save = save
+        self.stats = stats
+        self.counts = {"correct": 0, "wrong": 0, "unanswered": 0}
+        self.chrono = Chronometer()
+        self.position = 0
+        self.finished = False
+        self._current = None
+
+    @classmethod
+    def from_questions(cls, full_questions, perf_data, filter_mode="all",
+                       file_filter=None, tag_filter=None, **kwargs):
+        pairs = select_questions(full_questions, perf_data, filter_mode,
+                                 file_filter, tag_filter)
+        return cls(pairs, perf_data, **kwargs)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def next_question(self):
+        """
+        Devuelve el modelo de la pregunta actual (o la siguiente), o None
+        si la sesión ha terminado.
+        """
+        if self._current is not None:
+            return self._current["view"]
+        if self.finished or self.position >= len(self.pairs):
+            self.finished = True
+            return None
+
+        qid, qdata = self.pairs[self.position]
+        self.position += 1
+        with profiling.span("engine.render"):
+            orig = qdata["answers"]
+            shuffled, shuffle_map = shuffle_answers(orig, not self.shuffle, self.rng)
+            correct_letters = [
+                LETTERS[shuffle_map[i]]
+                for i, ans in enumerate(orig) if ans.get("correct", False)
+            ]
+            view = {
+                "qid": qid,
+                "position": self.position,
+                "total": len(self.pairs),
+                "text": clean_embedded_answers(qdata["question"]),
+                "options": [
+                    {"letter": LETTERS[idx],
+                     "text": remap_answer_references(ans["text"], shuffle_map)}
+                    for idx, ans in enumerate(shuffled)
+                ],
+                "multiple": len(correct_letters) > 1,
+            }
+        self._current = {
+            "qid": qid,
+            "data": qdata,
+            "view": view,
+            "shuffled": shuffled,
+            "shuffle_map": shuffle_map,
+            "correct_letters": correct_letters,
+        }
+        self.chrono.start()
+        return view
+
+    def current_answers(self):
+        """
+        Respuestas de la pregunta actual en el orden mostrado y el mapa
+        índice original → posición, para que una interfaz coloree la corrección.
+        """
+        if self._current is None:
+            raise RuntimeError("No active question; call next_question() first")
+        return self._current["shuffled"], self._current["shuffle_map"]
+
+    def submit(self, answer):
+        """
+        Corrige la respuesta a la pregunta actual. Una respuesta vacía
+        cuenta como saltada. Devuelve el resultado y la nueva programación.
+        """
+        cur = self._current
+        if cur is None:
+            raise RuntimeError("No active question; call next_question() first")
+        self._current = None
+        self.chrono.pause()
+
+        user_set = parse_answer(answer)
+        correct_set = set(cur["correct_letters"])
+        if not user_set:
+            result = "skipped"
+            self.counts["unanswered"] += 1
+        elif user_set == correct_set:
+            result = "correct"
+            self.counts["correct"] += 1
+        else:
+            result = "wrong"
+            self.counts["wrong"] += 1
+
+        qdata = cur["data"]
+        profiling.count("engine.answers")
+        with profiling.span("engine.schedule"):
+            pd = record_answer(self.perf_data, cur["qid"], result,
+                               question_course(qdata), self.exam_dates)
+            linked = share_schedule(self.perf_data, cur["qid"], self.links)
+        if self.stats is not None:
+            for qid in [cur["qid"]] + linked:
+                self.stats.refresh(qid)
+        if self.save:
+            self.save(self.perf_data)
+
+        explanation = qdata.get("explanation")
+        if explanation:
+            explanation = remap_answer_references(explanation, cur["shuffle_map"])
+        hist = pd["history"]
+        return {
+            "qid": cur["qid"],
+            "result": result,
+            "correct": result == "correct",
+            "quality": 5 if result == "correct" else 0,
+            "user_letters": sorted(user_set),
+            "correct_letters": sorted(correct_set),
+            "explanation": explanation or "",
+            "history": {
+                "attempts": len(hist),
+                "correct": hist.count("correct"),
+                "wrong": hist.count("wrong"),
+                "skipped": hist.count("skipped"),
+            },
+            "schedule": {
+                "ease": pd["ease"],
+                "interval": pd["interval"],
+                "repetition": pd["repetition"],
+                "next_review": pd["next_review"],
+            },
+        }
+
+    def quit(self):
+        """
+        Termina la sesión; la pregunta en curso queda como saltada sin
+        reprogramarla.
+        """
+        cur = self._current
+        self._current = None
+        self.finished = True
+        self.chrono.pause()
+        if cur is not None:
+            pd = ensure_perf_entry(self.perf_data, cur["qid"])
+            pd["history"].append("skipped")
+            self.counts["unanswered"] += 1
+            if self.stats is not None:
+                self.stats.refresh(cur["qid"])
+            if self.save:
+                self.save(self.perf_data)
+
+    def finish(self):
+        """Cierra la sesión y devuelve el resumen (conteos, nota, tiempo)."""
+        self.finished = True
+        self._current = None
+        self.chrono.pause()
+        c, w, u = self.counts["correct"], self.counts["wrong"], self.counts["unanswered"]
+        return {
+            "correct": c,
+            "wrong": w,
+            "unanswered": u,
+            "total": c + w + u,
+            "score": session_score(self.counts),
+            "elapsed": self.chrono.get_elapsed().total_seconds(),
+            "elapsed_text": self.chrono.formatted(),
+        }
+
+
+def preguntar(qid, question_data, perf_data, session_counts,
+              disable_shuffle=False, exam_dates=None,
+              position=None, total=None):
+    """
+    Presenta una pregunta con SM-2 y estadísticas. Pausa el cronómetro
+    durante la sección de explicación, luego lo reanuda.
+    """
+    global chrono
+    # ensure timer is running while answering
+    if chrono:
+        chrono.start()
+
+    session = QuizSession([(qid, question_data)], perf_data,
+                          exam_dates=exam_dates, shuffle=not disable_shuffle,
+                          rng=random, save=save_performance_data)
+    session.counts = session_counts
+    view = session.next_question()
+    shuffled, shuffle_map = session.current_answers()
+
+    frame = Frame()
+    # Header with progress
+    if position is not None and total is not None:
+        frame.print(f"Pregunta {qid}   {position}/{total}\n{view['text']}\n")
+    else:
+        frame.print(f"Pregunta {qid}:\n{view['text']}\n")
+
+    for opt in view["options"]:
+        frame.print(f"[{opt['letter']}] {opt['text']}")
+    frame.print("\n[0] Salir\n")
+    if view["multiple"]:
+        frame.print("Puede haber varias respuestas correctas, p.ej. 'A,C'")
+    frame.show()
+
+    # User input
+    ui = input("Tu respuesta: ").strip().upper()
+    if ui == "0":
+        frame.print("¿Confirmas salir? (s/n)")
+        frame.show()
+        conf = input("> ").strip().lower()
+        if conf == "s":
+            session.quit()
+            return None
+    outcome = session.submit(ui)
 
     # Pause timer for explanation + history
     if chrono:
         chrono.pause()
 
     # Feedback + explanation
-    clear_screen()
-    print(colorize_answers(
-        text, shuffled, shuffle_map,
-        user_set,
-        set(correct_letters)
+    frame.print(colorize_answers(
+        view["text"], shuffled, shuffle_map,
+        set(outcome["user_letters"]),
+        set(outcome["correct_letters"])
     ))
-    print("\n¡CORRECTO!\n" if quality == 5 else "\n¡INCORRECTO!\n")
-    if question_data.get("explanation"):
-        expl = remap_answer_references(question_data["explanation"], shuffle_map)
-        print("EXPLICACIÓN:\n" + expl + "\n")
+    frame.print("\n¡CORRECTO!\n" if outcome["correct"] else "\n¡INCORRECTO!\n")
+    if outcome["explanation"]:
+        frame.print("EXPLICACIÓN:\n" + outcome["explanation"] + "\n")
 
-    hist = pd["history"]
-    print(f"Historial: intentos={len(hist)}, correctas={hist.count('correct')}, "
-          f"incorrectas={hist.count('wrong')}, saltadas={hist.count('skipped')}\n")
+    hist = outcome["history"]
+    frame.print(f"Historial: intentos={hist['attempts']}, correctas={hist['correct']}, "
+                f"incorrectas={hist['wrong']}, saltadas={hist['skipped']}\n")
+    frame.show()
 
     press_any_key()
 
@@ -265,32 +488,34 @@ def preguntar(qid, question_data, perf_data, session_counts,
     if chrono:
         chrono.start()
 
-    save_performance_data(perf_data)
-    return quality == 5
+    return outcome["correct"]
 
 
-def play_quiz(full_questions, perf_data, filter_mode="all",
-              file_filter=None, tag_filter=None, exam_dates=None):
+def select_questions(full_questions, perf_data, filter_mode="all",
+                     file_filter=None, tag_filter=None, today=None, question_ids=None):
     """
-    Ahora usa effective_today() para filtrar 'due' y cronometrar la sesión.
+    Devuelve la lista de pares (qid, pregunta) que corresponden al filtro.
+    `question_ids` limita la selección a esos ids (p.ej. resultados de búsqueda).
     """
-    global chrono
-    chrono = Chronometer()
-    chrono.start()
+    with profiling.span("engine.filter"):
+        return _select_questions(full_questions, perf_data, filter_mode,
+                                 file_filter, tag_filter, today, question_ids)
 
+
+def _select_questions(full_questions, perf_data, filter_mode,
+                      file_filter, tag_filter, today, question_ids=None):
     pairs = [(q.get("_quiz_id", idx), q) for idx, q in enumerate(full_questions)]
 
-    pairs = []
-    for idx, q in enumerate(full_questions):
-        qid = q.get("_quiz_id", idx)
-        pairs.append((qid, q))
+    if question_ids is not None:
+        wanted = set(question_ids)
+        pairs = [(qid, q) for qid, q in pairs if qid in wanted]
 
     if file_filter:
         pairs = [(qid, q) for qid, q in pairs if q.get("_quiz_source") == file_filter]
     if tag_filter:
         pairs = [(qid, q) for qid, q in pairs if tag_filter in q.get("tags", [])]
 
-    today = effective_today()
+    today = today or effective_today()
     if filter_mode == "due":
         subset = [
             (qid, q) for qid, q in pairs
@@ -323,6 +548,24 @@ def play_quiz(full_questions, perf_data, filter_mode="all",
         )
     else:
         subset = pairs
+    return subset
+
+
+def play_quiz(full_questions, perf_data, filter_mode="all",
+              file_filter=None, tag_filter=None, exam_dates=None, stats=None,
+              question_ids=None, links=None):
+    """
+    Ahora usa effective_today() para filtrar 'due' y cronometrar la sesión.
+    Si se pasa `stats` (StatsAggregator), se actualiza tras cada respuesta.
+    Las preguntas enlazadas (`links`) comparten la programación.
+    """
+    global chrono
+    chrono = Chronometer()
+    chrono.start()
+
+    subset = select_questions(full_questions, perf_data, filter_mode,
+                              file_filter, tag_filter, question_ids=question_ids)
+    subset = collapse_linked(subset, links)
 
     if not subset:
         clear_screen()
@@ -332,6 +575,7 @@ def play_quiz(full_questions, perf_data, filter_mode="all",
 
     counts = {"correct": 0, "wrong": 0, "unanswered": 0}
     total_q = len(subset)
+    pending_links = False
     for position, (qid, qdata) in enumerate(subset, start=1):
         res = preguntar(
             qid, qdata, perf_data, counts,
@@ -340,16 +584,24 @@ def play_quiz(full_questions, perf_data, filter_mode="all",
             position=position,
             total=total_q
         )
+        linked = share_schedule(perf_data, qid, links) if res is not None else []
+        if stats is not None:
+            for answered in [qid] + linked:
+                stats.refresh(answered)
         if res is None:
             break
+        # preguntar() saves before the schedule is shared; the copies go out with the next save.
+        pending_links = bool(linked)
+    if pending_links:
+        save_performance_data(perf_data)
 
     clear_screen()
     c, w, u = counts["correct"], counts["wrong"], counts["unanswered"]
     total = c + w + u
     print("=== Resumen de sesión ===")
     print(f"Correctas: {c}, Incorrectas: {w}, Saltadas: {u}, Total: {total}")
-    if total:
-        score = (c*0.333 - w*0.111)/total*30
+    score = session_score(counts)
+    if score is not None:
         print(f"Puntuación: {score:.2f}/10\n")
 
     # show elapsed time
@@ -5,8 +5,11 @@ import sys
 import json
 import logging
 import hashlib
+from collections import Counter
 
-QUIZ_DATA_FOLDER = os.environ.get("QUIZ_DATA_FOLDER", "quiz_data")
+from . import profiling
+from .records import QuestionRecord, split_course_section
+from .utils import QUIZ_DATA_FOLDER
 INDEX_FILENAME = ".quiz_index.json"
 
 logger = logging.getLogger(__name__)
@@ -26,8 +29,9 @@ def fingerprint_question(q):
             key=lambda x: (x["text"], x["correct"])
         )
     }
-    raw = json.dumps(core, sort_keys=True, ensure_ascii=False)
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    with profiling.span("loader.fingerprint"):
+        raw = json.dumps(core, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
 def load_index(folder):
@@ -43,7 +47,7 @@ def load_index(folder):
             "archived": []
         }
     try:
-        with open(path, encoding="utf-8") as f:
+        with profiling.span("loader.index_load"), open(path, encoding="utf-8") as f:
             data = json.load(f)
             return {
                 "next_id": data.get("next_id", 1),
@@ -68,38 +72,90 @@ def save_index(folder, index_data):
     os.makedirs(folder, exist_ok=True)
     path = os.path.join(folder, INDEX_FILENAME)
     try:
-        with open(path, "w", encoding="utf-8") as f:
+        with profiling.span("loader.index_save"), open(path, "w", encoding="utf-8") as f:
             json.dump(index_data, f, ensure_ascii=False, indent=2)
     except Exception as ex:
         logger.error(f"Failed to save quiz-index at {path}: {ex}")
 
 
+def corpus_version(index_data):
+    """
+    Short digest of the indexed files (mtime and question ids). Changes
+    whenever any quiz file is added, removed or modified.
+    """
+    files = index_data.get("files", {})
+    raw = json.dumps(
+        sorted(
+            (rel, entry.get("mtime"), [e["id"] for e in entry.get("questions", [])])
+            for rel, entry in files.items()
+        ),
+        ensure_ascii=False
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def current_corpus_version(folder=QUIZ_DATA_FOLDER):
+    """
+    corpus_version() of the on-disk index if it still matches the files in
+    `folder` (same paths and mtimes), otherwise None. Only stats files; no
+    quiz JSON is parsed.
+    """
+    index = load_index(folder)
+    indexed = index["files"]
+    all_files = discover_quiz_files(folder)
+    if len(all_files) != len(indexed):
+        return None
+    for filepath in all_files:
+        entry = indexed.get(os.path.relpath(filepath, folder))
+        try:
+            mtime = os.path.getmtime(filepath)
+        except OSError:
+            return None
+        if entry is None or entry.get("mtime") != mtime:
+            return None
+    return corpus_version(index)
+
+
 def load_json_file(filepath):
     """
     Load a JSON file or return None if it fails; logs a warning.
     """
     try:
-        with open(filepath, encoding="utf-8") as f:
+        with profiling.span("loader.json_decode"), open(filepath, encoding="utf-8") as f:
             data = json.load(f)
-            if data.get("disabled"):
-                # <-- NEW: skip any quiz marked disabled
-                return None
-            if "questions" not in data:
-                logger.warning(f"Missing 'questions' in JSON {filepath}; skipping.")
-                return None
-            return data
+        if data.get("disabled"):
+            # <-- NEW: skip any quiz marked disabled
+            return None
+        if "questions" not in data:
+            logger.warning(f"Missing 'questions' in JSON {filepath}; skipping.")
+            return None
+        return data
     except Exception as ex:
         logger.warning(f"Error loading JSON from {filepath}; skipping. ({ex})")
         return None
 
 
+def load_exam_dates(folder=QUIZ_DATA_FOLDER):
+    """Exam dates by course from exam_dates.json in folder ({} if missing or invalid)."""
+    fichero = os.path.join(folder, "exam_dates.json")
+    if not os.path.exists(fichero):
+        return {}
+    try:
+        with open(fichero, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
 def discover_quiz_files(folder):
-    """Recursively find all `.json` files under `folder`."""
+    """Recursively find all `.json` files under `folder`, skipping dot-files like the index."""
     quiz_files = []
-    for root, dirs, files in os.walk(folder):
-        for f in files:
-            if f.lower().endswith(".json"):
-                quiz_files.append(os.path.join(root, f))
+    with profiling.span("loader.discover"):
+        for root, dirs, files in os.walk(folder):
+            for f in files:
+                if f.lower().endswith(".json") and not f.startswith("."):
+                    quiz_files.append(os.path.join(root, f))
+    profiling.count("loader.files_found", len(quiz_files))
     return quiz_files
 
 
@@ -107,8 +163,15 @@ def load_all_quizzes(folder=QUIZ_DATA_FOLDER):
     """
     Returns (combined_questions, cursos_dict, quiz_files_info), but
     now indexing each question with a stable `_quiz_id` and tracking archive.
+    Questions are `QuestionRecord`s; `file_index` points into quiz_files_info.
     Quizzes with top-level `"disabled": true` are ignored.
+
+    When a file changes, new questions that are rewordings of questions
+    dropped from that same file, with the same correct answers, keep the old
+    ID (and so their history); see dedup.match_rewordings.
     """
+    from .dedup import EDIT_THRESHOLD, answer_key, compact_signature, match_rewordings
+
     # 1) Load or init the index
     index = load_index(folder)
     new_index = {
@@ -125,6 +188,7 @@ def load_all_quizzes(folder=QUIZ_DATA_FOLDER):
         sys.exit(1)
 
     seen_relpaths = set()
+    id_uses = None  # id → number of index entries using it, computed on first edit
 
     # 3) For each file, update index entries
     for filepath in all_files:
@@ -141,6 +205,7 @@ def load_all_quizzes(folder=QUIZ_DATA_FOLDER):
             new_index["files"][rel] = old_entry
         else:
             # New or modified file: (re)compute fingerprints → IDs
+            profiling.count("loader.files_reindexed")
             data = load_json_file(filepath)
             if not data:
                 # disabled or invalid → archive any old questions
@@ -148,19 +213,63 @@ def load_all_quizzes(folder=QUIZ_DATA_FOLDER):
                     for e in old_entry.get("questions", []):
                         if e["id"] not in new_index["archived"]:
                             new_index["archived"].append(e["id"])
+                # remember it so it is not parsed again until it changes
+                new_index["files"][rel] = {
+                    "mtime": mtime,
+                    "questions": [],
+                    "ignored": True
+                }
                 continue
 
             qlist = data.get("questions", [])
-            q_entries = []
-            for q in qlist:
-                fp = fingerprint_question(q)
-                if fp in new_index["fingerprint_to_id"]:
-                    qid = new_index["fingerprint_to_id"][fp]
-                else:
-                    qid = new_index["next_id"]
-                    new_index["fingerprint_to_id"][fp] = qid
+            q_entries = [
+                {
+                    "fingerprint": fp,
+                    "id": new_index["fingerprint_to_id"].get(fp),
+                    "signature": compact_signature(q),
+                    "answer_key": answer_key(q),
+                }
+                for fp, q in ((fingerprint_question(q), q) for q in qlist)
+            ]
+
+            # Reworded questions keep the ID of the one they replace
+            if old_entry and any(e["id"] is None for e in q_entries):
+                if id_uses is None:
+                    id_uses = Counter(e["id"] for f in index["files"].values()
+                                      for e in f.get("questions", []))
+                here = Counter(e["id"] for e in old_entry.get("questions", []))
+                kept = {e["id"] for e in q_entries}
+                dropped = {
+                    e["id"]: e["signature"] for e in old_entry.get("questions", [])
+                    if e["id"] not in kept and e.get("signature")
+                    and id_uses[e["id"]] == here[e["id"]]  # not shared with other files
+                }
+                dropped_answers = {e["id"]: e.get("answer_key")
+                                   for e in old_entry.get("questions", [])}
+                added = {}
+                new_fps = set()
+                for i, e in enumerate(q_entries):
+                    if e["id"] is None and e["signature"] and e["fingerprint"] not in new_fps:
+                        new_fps.add(e["fingerprint"])
+                        added[i] = e["signature"]
+                if dropped and added:
+                    # Same wording but another correct answer is another question
+                    def same_answer(i, old_id):
+                        return q_entries[i]["answer_key"] == dropped_answers[old_id]
+
+                    matches = match_rewordings(dropped, added, EDIT_THRESHOLD, same_answer)
+                    for i, old_id in matches.items():
+                        q_entries[i]["id"] = old_id
+                        new_index["fingerprint_to_id"][q_entries[i]["fingerprint"]] = old_id
+                        profiling.count("loader.ids_reused")
+
+            for e in q_entries:
+                if e["id"] is None:
+                    e["id"] = new_index["fingerprint_to_id"].get(e["fingerprint"])
+                if e["id"] is None:
+                    e["id"] = new_index["next_id"]
+                    new_index["fingerprint_to_id"][e["fingerprint"]] = e["id"]
                     new_index["next_id"] += 1
-                q_entries.append({"fingerprint": fp, "id": qid})
 
             # Archive any questions dropped from this file
             if old_entry:
@@ -183,19 +292,19 @@ def load_all_quizzes(folder=QUIZ_DATA_FOLDER):
                 if qid not in new_index["archived"]:
                     new_index["archived"].append(qid)
 
-    # 5) Persist index
-    save_index(folder, new_index)
-
-    # 6) Build combined_questions, cursos_dict, quiz_files_info,
+    # 5) Build combined_questions, cursos_dict, quiz_files_info,
     #    skipping any disabled files
     cursos_dict = {}
     combined_questions = []
     quiz_files_info = []
 
     for filepath in all_files:
+        rel = os.path.relpath(filepath, folder)
+        if new_index["files"].get(rel, {}).get("ignored"):
+            continue  # either disabled or invalid
         data = load_json_file(filepath)
         if not data:
-            continue  # either disabled or invalid
+            continue
 
         questions_list = data["questions"]
         count = len(questions_list)
@@ -207,9 +316,7 @@ def load_all_quizzes(folder=QUIZ_DATA_FOLDER):
 
         # Determine course/section
         rel_path = os.path.relpath(filepath, folder)
-        parts = rel_path.split(os.sep)
-        curso = parts[0] if parts else "(Unknown)"
-        section = parts[1] if len(parts) > 2 else None
+        curso, section = split_course_section(rel_path)
 
         cursos_dict.setdefault(curso, {
             "sections": {}, "total_files": 0, "total_questions": 0
@@ -228,11 +335,24 @@ def load_all_quizzes(folder=QUIZ_DATA_FOLDER):
         })
         sec["section_questions"] += count
 
-        # Merge questions, injecting `_quiz_id`
+        # Entries indexed before signatures or answer keys existed get them now
+        entries = new_index["files"][rel]["questions"]
+        if len(entries) == count and any("answer_key" not in e for e in entries):
+            for e, q in zip(entries, questions_list):
+                e.setdefault("signature", compact_signature(q))
+                e["answer_key"] = answer_key(q)
+
+        # Build compact records carrying the stable `_quiz_id`
+        file_index = len(quiz_files_info) - 1
         for q in questions_list:
             fp = fingerprint_question(q)
-            q["_quiz_source"] = filepath
-            q["_quiz_id"] = new_index["fingerprint_to_id"][fp]
-            combined_questions.append(q)
+            combined_questions.append(QuestionRecord.from_dict(
+                q, new_index["fingerprint_to_id"][fp],
+                curso, section, file_index, filepath
+            ))
+        profiling.count("loader.questions", count)
+
+    # 6) Persist index
+    save_index(folder, new_index)
 
     return combined_questions, cursos_dict, quiz_files_info
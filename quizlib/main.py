@@ -2,23 +2,33 @@
 
 import sys
 import os
-import logging
 import signal
-import json
-from datetime import datetime
-
-from quizlib.loader import load_all_quizzes, QUIZ_DATA_FOLDER
-from quizlib.performance import load_performance_data
-from quizlib.engine import (
-    play_quiz,
-    clear_screen,
-    press_any_key,
-    effective_today,
-)
-from quizlib.navigator import pick_a_file_menu
+import threading
+from types import SimpleNamespace
+
+# Only what the splash and the first menu need is imported here. argparse,
+# logging, json, the loader, stats and engine are imported on first use, most
+# of them by the background load (see CargaInicial).
+from quizlib import profiling
+from quizlib.utils import Frame, clear_screen, press_any_key, effective_today, QUIZ_DATA_FOLDER
+from quizlib.navigator import build_nav_tree, pick_a_file_menu
 
 VERSION = "2.7.0"
-logger = logging.getLogger(__name__)
+
+OPCIONES_MENU = (
+    "1) Programadas para hoy",
+    "2) Todas las preguntas",
+    "3) No respondidas",
+    "4) Falladas",
+    "5) Falladas o saltadas",
+    "6) Saltadas",
+    "7) Por archivo",
+    "8) Por etiqueta",
+    "9) Resumen de archivos",
+    "10) Estadísticas",
+    "11) Buscar",
+    "0) Salir",
+)
 
 
 def _sigint_handler(signum, frame):
@@ -30,6 +40,13 @@ def _sigint_handler(signum, frame):
 signal.signal(signal.SIGINT, _sigint_handler)
 
 
+def play_quiz(*args, **kwargs):
+    # The engine (random, re, ...) is only imported once a quiz is started,
+    # so it stays out of the time to first menu.
+    from quizlib.engine import play_quiz as _play_quiz
+    return _play_quiz(*args, **kwargs)
+
+
 def set_title(title):
     """Set the console title for Windows or via ANSI on other OS."""
     if os.name == 'nt':
@@ -43,18 +60,28 @@ def set_title(title):
 
 
 def cargar_fechas_examen():
-    exam_dates = {}
-    fichero = os.path.join(QUIZ_DATA_FOLDER, "exam_dates.json")
-    if os.path.exists(fichero):
-        try:
-            with open(fichero, encoding="utf-8") as f:
-                exam_dates = json.load(f)
-        except:
-            pass
-    return exam_dates
+    from quizlib.loader import load_exam_dates
+
+    return load_exam_dates(QUIZ_DATA_FOLDER)
+
+
+def _linea_resumen(nombre, c):
+    total = c["total"]
 
+    def pct(x): return f"{(x/total*100):.1f}%" if total else "N/A"
 
-def comando_resumen_archivos(questions, perf_data, cursos_dict, quiz_files_info):
+    return (
+        f"{nombre}: total={total}, "
+        f"no-int={c['never']} ({pct(c['never'])}), saltadas={c['skipped']} ({pct(c['skipped'])}), "
+        f"wrong={c['wrong']} ({pct(c['wrong'])}), correct={c['correct']} ({pct(c['correct'])}), "
+        f"programadas={c['due']} ({pct(c['due'])})"
+    )
+
+
+def comando_resumen_archivos(questions, perf_data, cursos_dict, quiz_files_info, stats=None):
+    if stats is None:
+        from quizlib.stats import StatsAggregator
+        stats = StatsAggregator(questions, perf_data, QUIZ_DATA_FOLDER)
     while True:
         clear_screen()
         print("=== Resumen de Archivos ===\n")
@@ -63,79 +90,15 @@ def comando_resumen_archivos(questions, perf_data, cursos_dict, quiz_files_info)
 
         # 1) Overall per-file summary
         for idx, finfo in enumerate(quiz_files_info, start=1):
-            filepath = finfo["filepath"]
-            filename = finfo["filename"]
-            qids = [q["_quiz_id"] for q in questions if q["_quiz_source"] == filepath]
-            total = len(qids)
-
-            never = skipped = wrong = correct = due = 0
-
-            for qid in qids:
-                entry = perf_data.get(str(qid), {})
-                history = entry.get("history", [])
-                if not history:
-                    never += 1
-                else:
-                    last = history[-1]
-                    if last == "skipped":
-                        skipped += 1
-                    elif last == "wrong":
-                        wrong += 1
-                    elif last == "correct":
-                        correct += 1
-
-                nr = entry.get("next_review")
-                if not nr or datetime.fromisoformat(nr).date() <= today:
-                    due += 1
-
-            def pct(x): return f"{(x/total*100):.1f}%" if total else "N/A"
-
-            print(
-                f"{idx}) {filename}: total={total}, "
-                f"no-int={never} ({pct(never)}), saltadas={skipped} ({pct(skipped)}), "
-                f"wrong={wrong} ({pct(wrong)}), correct={correct} ({pct(correct)}), "
-                f"programadas={due} ({pct(due)})"
-            )
+            counts = stats.file(finfo["filepath"]).as_dict(today)
+            print(f"{idx}) " + _linea_resumen(finfo["filename"], counts))
 
         print("\n---\n")
 
         # 2) Per-course summary
         print("=== Resumen de Cursos ===\n")
-        for curso, data in cursos_dict.items():
-            total = data["total_questions"]
-            never = skipped = wrong = correct = due = 0
-
-            for q in questions:
-                rel = os.path.relpath(q["_quiz_source"], QUIZ_DATA_FOLDER)
-                if rel.split(os.sep)[0] != curso:
-                    continue
-                qid = q["_quiz_id"]
-                entry = perf_data.get(str(qid), {})
-                history = entry.get("history", [])
-
-                if not history:
-                    never += 1
-                else:
-                    last = history[-1]
-                    if last == "skipped":
-                        skipped += 1
-                    elif last == "wrong":
-                        wrong += 1
-                    elif last == "correct":
-                        correct += 1
-
-                nr = entry.get("next_review")
-                if not nr or datetime.fromisoformat(nr).date() <= today:
-                    due += 1
-
-            def pct2(x): return f"{(x/total*100):.1f}%" if total else "N/A"
-
-            print(
-                f"{curso}: total={total}, "
-                f"no-int={never} ({pct2(never)}), saltadas={skipped} ({pct2(skipped)}), "
-                f"wrong={wrong} ({pct2(wrong)}), correct={correct} ({pct2(correct)}), "
-                f"programadas={due} ({pct2(due)})"
-            )
+        for curso in cursos_dict:
+            print(_linea_resumen(curso, stats.course(curso).as_dict(today)))
 
         print("\n---\n")
         print("0) Volver")
@@ -149,40 +112,19 @@ def comando_resumen_archivos(questions, perf_data, cursos_dict, quiz_files_info)
             sel = int(choice) - 1
             if 0 <= sel < len(quiz_files_info):
                 finfo = quiz_files_info[sel]
-                filepath = finfo["filepath"]
-                filename = finfo["filename"]
-                qids = [q["_quiz_id"] for q in questions if q["_quiz_source"] == filepath]
-                total = len(qids)
-                never = skipped = wrong = correct = due = 0
-
-                for qid in qids:
-                    entry = perf_data.get(str(qid), {})
-                    history = entry.get("history", [])
-                    if not history:
-                        never += 1
-                    else:
-                        last = history[-1]
-                        if last == "skipped":
-                            skipped += 1
-                        elif last == "wrong":
-                            wrong += 1
-                        elif last == "correct":
-                            correct += 1
-
-                    nr = entry.get("next_review")
-                    if not nr or datetime.fromisoformat(nr).date() <= today:
-                        due += 1
+                c = stats.file(finfo["filepath"]).as_dict(today)
+                total = c["total"]
 
                 def pct3(x): return f"{(x/total*100):.1f}%" if total else "N/A"
 
                 clear_screen()
-                print(f"=== Estadísticas detalladas: {filename} ===\n")
+                print(f"=== Estadísticas detalladas: {finfo['filename']} ===\n")
                 print(f"Total preguntas         : {total}")
-                print(f"Sin intentar            : {never} ({pct3(never)})")
-                print(f"Saltadas                : {skipped} ({pct3(skipped)})")
-                print(f"Incorrectas             : {wrong} ({pct3(wrong)})")
-                print(f"Correctas               : {correct} ({pct3(correct)})")
-                print(f"Programadas para hoy    : {due} ({pct3(due)})\n")
+                print(f"Sin intentar            : {c['never']} ({pct3(c['never'])})")
+                print(f"Saltadas                : {c['skipped']} ({pct3(c['skipped'])})")
+                print(f"Incorrectas             : {c['wrong']} ({pct3(c['wrong'])})")
+                print(f"Correctas               : {c['correct']} ({pct3(c['correct'])})")
+                print(f"Programadas para hoy    : {c['due']} ({pct3(c['due'])})\n")
                 press_any_key()
         except ValueError:
             continue
@@ -212,8 +154,8 @@ def comando_quiz_saltadas(questions, perf_data, exam_dates, **kwargs):
     play_quiz(questions, perf_data, filter_mode="skipped", exam_dates=exam_dates, **kwargs)
 
 
-def comando_quiz_por_archivo(questions, perf_data, cursos_dict, exam_dates):
-    fichero = pick_a_file_menu(cursos_dict)
+def comando_quiz_por_archivo(questions, perf_data, cursos_dict, exam_dates, nav=None, **kwargs):
+    fichero = pick_a_file_menu(cursos_dict, tree=nav, stats=kwargs.get("stats"))
     if not fichero:
         return
     while True:
@@ -228,17 +170,17 @@ def comando_quiz_por_archivo(questions, perf_data, cursos_dict, exam_dates):
         print("7) Volver")
         elec = input("Elige opción: ").strip()
         if elec == "1":
-            comando_quiz_todas(questions, perf_data, exam_dates, file_filter=fichero)
+            comando_quiz_todas(questions, perf_data, exam_dates, file_filter=fichero, **kwargs)
         elif elec == "2":
-            comando_quiz_no_respondidas(questions, perf_data, exam_dates, file_filter=fichero)
+            comando_quiz_no_respondidas(questions, perf_data, exam_dates, file_filter=fichero, **kwargs)
         elif elec == "3":
-            comando_quiz_falladas(questions, perf_data, exam_dates, file_filter=fichero)
+            comando_quiz_falladas(questions, perf_data, exam_dates, file_filter=fichero, **kwargs)
         elif elec == "4":
-            comando_quiz_falladas_o_saltadas(questions, perf_data, exam_dates, file_filter=fichero)
+            comando_quiz_falladas_o_saltadas(questions, perf_data, exam_dates, file_filter=fichero, **kwargs)
         elif elec == "5":
-            comando_quiz_saltadas(questions, perf_data, exam_dates, file_filter=fichero)
+            comando_quiz_saltadas(questions, perf_data, exam_dates, file_filter=fichero, **kwargs)
         elif elec == "6":
-            comando_quiz_programado(questions, perf_data, exam_dates, file_filter=fichero)
+            comando_quiz_programado(questions, perf_data, exam_dates, file_filter=fichero, **kwargs)
         elif elec == "7":
             break
         else:
@@ -246,7 +188,7 @@ def comando_quiz_por_archivo(questions, perf_data, cursos_dict, exam_dates):
             press_any_key()
 
 
-def comando_quiz_por_etiqueta(questions, perf_data, exam_dates, tags):
+def comando_quiz_por_etiqueta(questions, perf_data, exam_dates, tags, **kwargs):
     if not tags:
         clear_screen()
         print("[No hay etiquetas]")
@@ -265,36 +207,67 @@ def comando_quiz_por_etiqueta(questions, perf_data, exam_dates, tags):
             idx = int(sel) - 1
             if 0 <= idx < len(tags):
                 comando_quiz_programado(
-                    questions, perf_data, exam_dates, tag_filter=tags[idx]
+                    questions, perf_data, exam_dates, tag_filter=tags[idx], **kwargs
                 )
                 return
         except ValueError:
             pass
 
 
-def comando_estadisticas(questions, perf_data, cursos_dict):
-    def mostrar(qids, titulo):
-        never = skipped = wrong = correct = 0
-        for i in qids:
-            h = perf_data.get(str(i), {}).get("history", [])
-            if not h:
-                never += 1
-            else:
-                last = h[-1]
-                if last == "skipped":
-                    skipped += 1
-                elif last == "wrong":
-                    wrong += 1
-                elif last == "correct":
-                    correct += 1
-        total = len(qids)
+MAX_RESULTADOS = 20
+
+
+def _extracto(texto, ancho=80):
+    linea = texto.strip().split("\n", 1)[0]
+    return linea if len(linea) <= ancho else linea[:ancho - 1] + "…"
+
+
+def comando_buscar(questions, perf_data, exam_dates, buscador, **kwargs):
+    por_id = None
+    while True:
+        clear_screen()
+        print("\n=== Buscar preguntas ===")
+        consulta = input("Texto a buscar (vacío para volver): ").strip()
+        if not consulta:
+            return
+        ids = buscador.search(consulta)
+        clear_screen()
+        print(f"\n=== Resultados para '{consulta}': {len(ids)} ===")
+        if not ids:
+            press_any_key()
+            continue
+        if por_id is None:
+            por_id = {q.get("_quiz_id"): q for q in questions}
+        for qid in ids[:MAX_RESULTADOS]:
+            q = por_id[qid]
+            print(f"[{qid}] {_extracto(q['question'])} ({os.path.basename(q['_quiz_source'])})")
+        if len(ids) > MAX_RESULTADOS:
+            print(f"... y {len(ids) - MAX_RESULTADOS} más")
+        print("\n1) Hacer quiz con los resultados")
+        print("2) Nueva búsqueda")
+        print("0) Volver")
+        op = input("Elige opción: ").strip()
+        if op == "1":
+            play_quiz(questions, perf_data, filter_mode="all", exam_dates=exam_dates,
+                      question_ids=ids, **kwargs)
+            return
+        if op == "0":
+            return
+
+
+def comando_estadisticas(questions, perf_data, cursos_dict, stats=None, nav=None):
+    if stats is None:
+        from quizlib.stats import StatsAggregator
+        stats = StatsAggregator(questions, perf_data, QUIZ_DATA_FOLDER)
+
+    def mostrar(counts, titulo):
         clear_screen()
         print(f"\n=== Estadísticas: {titulo} ===")
-        print(f"Total preguntas: {total}")
-        print(f"Sin intentar: {never}")
-        print(f"Saltadas: {skipped}")
-        print(f"Incorrectas: {wrong}")
-        print(f"Correctas: {correct}\n")
+        print(f"Total preguntas: {counts.total}")
+        print(f"Sin intentar: {counts.never}")
+        print(f"Saltadas: {counts.skipped}")
+        print(f"Incorrectas: {counts.wrong}")
+        print(f"Correctas: {counts.correct}\n")
         press_any_key()
 
     while True:
@@ -306,7 +279,7 @@ def comando_estadisticas(questions, perf_data, cursos_dict):
         print("4) Volver")
         op = input("Elige opción: ").strip()
         if op == "1":
-            mostrar(list(range(len(questions))), "Repositorio completo")
+            mostrar(stats.repository, "Repositorio completo")
         elif op == "2":
             cursos = sorted(cursos_dict.keys())
             while True:
@@ -322,82 +295,206 @@ def comando_estadisticas(questions, perf_data, cursos_dict):
                     ci = int(s) - 1
                     if 0 <= ci < len(cursos):
                         cur = cursos[ci]
-                        qids = [
-                            idx for idx, q in enumerate(questions)
-                            if os.path.relpath(q["_quiz_source"], QUIZ_DATA_FOLDER)
-                               .split(os.sep)[0] == cur
-                        ]
-                        mostrar(qids, f"Curso {cur}")
+                        mostrar(stats.course(cur), f"Curso {cur}")
                         break
                 except ValueError:
                     pass
         elif op == "3":
-            f = pick_a_file_menu(cursos_dict)
+            f = pick_a_file_menu(cursos_dict, tree=nav, stats=stats)
             if not f:
                 continue
-            qids = [idx for idx, q in enumerate(questions) if q["_quiz_source"] == f]
-            mostrar(qids, f"Archivo {os.path.basename(f)}")
+            mostrar(stats.file(f), f"Archivo {os.path.basename(f)}")
         elif op == "4":
             break
 
 
-def mostrar_menu():
-    clear_screen()
-    print(f"QuizProg v{VERSION}")
-    print(f"Carpeta de quizzes: '{QUIZ_DATA_FOLDER}'\n")
-    print("1) Programadas para hoy")
-    print("2) Todas las preguntas")
-    print("3) No respondidas")
-    print("4) Falladas")
-    print("5) Falladas o saltadas")
-    print("6) Saltadas")
-    print("7) Por archivo")
-    print("8) Por etiqueta")
-    print("9) Resumen de archivos")
-    print("10) Estadísticas")
-    print("0) Salir")
-
-
-def main():
+def cargar_estadisticas(questions, perf_data, perf_version, corpus_version, folder):
+    """
+    Restore the rollups from the stats cache when both versions match,
+    otherwise build them from the questions.
+    """
+    from quizlib.performance import PERFORMANCE_FILE
+    from quizlib.stats import StatsAggregator, load_stats_cache, stats_cache_path
+
+    cached = load_stats_cache(stats_cache_path(PERFORMANCE_FILE), perf_version, corpus_version)
+    if cached is not None:
+        profiling.count("main.stats_cache_hit")
+        return StatsAggregator.from_cache(questions, perf_data, cached, folder)
+    return StatsAggregator(questions, perf_data, folder)
+
+
+def guardar_estadisticas(stats, corpus_version):
+    from quizlib.performance import PERFORMANCE_FILE, perf_store_version
+    from quizlib.stats import save_stats_cache, stats_cache_path
+
+    save_stats_cache(stats_cache_path(PERFORMANCE_FILE), stats,
+                     perf_store_version(), corpus_version)
+
+
+def configurar_logging():
+    import logging
+
     logging.basicConfig(level=logging.WARNING,
                         format="%(levelname)s:%(name)s:%(message)s")
+
+
+class CargaInicial:
+    """
+    Loads quizzes, performance data, exam dates and rollups in a background
+    thread, so the I/O overlaps with the splash prompt and the first menu.
+
+    `esperar()` joins the thread and re-raises whatever the load raised
+    (including the SystemExit of a missing or empty quiz folder).
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._error = None
+        self._buscador = None
+        self._thread = threading.Thread(target=self._run, name="quizprog-load", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            configurar_logging()
+            self._cargar()
+        except BaseException as ex:
+            self._error = ex
+
+    def _cargar(self):
+        from quizlib.loader import current_corpus_version, load_all_quizzes
+        from quizlib.performance import load_links, load_performance_data, perf_store_version
+
+        with profiling.span("main.load_quizzes"):
+            self.questions, self.cursos_dict, self.quiz_files_info = load_all_quizzes(self.folder)
+        self.nav = build_nav_tree(self.cursos_dict)
+        self.corpus_version = current_corpus_version(self.folder)
+        perf_version = perf_store_version()
+        self.perf_data = load_performance_data()
+        self.exam_dates = cargar_fechas_examen()
+        self.links = load_links()
+        with profiling.span("main.stats_build"):
+            self.stats = cargar_estadisticas(self.questions, self.perf_data,
+                                             perf_version, self.corpus_version, self.folder)
+        self.tags = sorted(self.stats.tags)
+        # Keyword arguments every quiz started from the menu gets.
+        self.sesion = {"stats": self.stats, "links": self.links}
+        self.saved_changes = self.stats.changes
+        if self.saved_changes:
+            guardar_estadisticas(self.stats, self.corpus_version)
+
+    def buscador(self):
+        """Search index over the loaded questions, built on first use."""
+        if self._buscador is None:
+            from quizlib.search import SearchIndex
+
+            self._buscador = SearchIndex.build(self.questions, self.folder)
+        return self._buscador
+
+    def comprobar(self):
+        """Re-raise a load error that already happened, without waiting."""
+        if not self._thread.is_alive():
+            self.esperar()
+
+    def esperar(self, relanzar=True):
+        if self._thread.is_alive():
+            with profiling.span("main.load_wait"):
+                self._thread.join()
+        if relanzar and self._error is not None:
+            raise self._error
+        return self
+
+
+def mostrar_menu():
+    frame = Frame()
+    frame.print(f"QuizProg v{VERSION}")
+    frame.print(f"Carpeta de quizzes: '{QUIZ_DATA_FOLDER}'\n")
+    for linea in OPCIONES_MENU:
+        frame.print(linea)
+    frame.show()
+
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        # Plain interactive start: skip argparse and the subcommand imports.
+        return SimpleNamespace(profile=None, profile_action=None, command=None)
+
+    import argparse
+    from quizlib import cli
+
+    parser = argparse.ArgumentParser(prog="quizprog", description="QuizProg")
+    parser.add_argument(
+        "--profile", nargs="?", const=profiling.DEFAULT_REPORT, metavar="PATH",
+        help="Guardar tiempos por fase en PATH (JSON) al salir",
+    )
+    parser.add_argument(
+        "--profile-action", metavar="OPCION",
+        help="Capturar con cProfile la opción de menú indicada (p.ej. 9)",
+    )
+    cli.add_subcommands(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable(args.profile)
+
+    if args.command:
+        from quizlib import cli
+
+        configurar_logging()
+        return cli.run(args)
+
     set_title(f"QuizProg v{VERSION}")
     clear_screen()
+    carga = CargaInicial(QUIZ_DATA_FOLDER)
     press_any_key()
-
-    questions, cursos_dict, quiz_files_info = load_all_quizzes(QUIZ_DATA_FOLDER)
-    perf_data = load_performance_data()
-    exam_dates = cargar_fechas_examen()
-    tags = sorted({t for q in questions for t in q.get("tags", [])})
+    carga.comprobar()
+
+    acciones = {
+        "1": lambda d: comando_quiz_programado(d.questions, d.perf_data, d.exam_dates, **d.sesion),
+        "2": lambda d: comando_quiz_todas(d.questions, d.perf_data, d.exam_dates, **d.sesion),
+        "3": lambda d: comando_quiz_no_respondidas(d.questions, d.perf_data, d.exam_dates, **d.sesion),
+        "4": lambda d: comando_quiz_falladas(d.questions, d.perf_data, d.exam_dates, **d.sesion),
+        "5": lambda d: comando_quiz_falladas_o_saltadas(d.questions, d.perf_data, d.exam_dates, **d.sesion),
+        "6": lambda d: comando_quiz_saltadas(d.questions, d.perf_data, d.exam_dates, **d.sesion),
+        "7": lambda d: comando_quiz_por_archivo(d.questions, d.perf_data, d.cursos_dict, d.exam_dates,
+                                               nav=d.nav, **d.sesion),
+        "8": lambda d: comando_quiz_por_etiqueta(d.questions, d.perf_data, d.exam_dates, d.tags, **d.sesion),
+        "9": lambda d: comando_resumen_archivos(d.questions, d.perf_data, d.cursos_dict, d.quiz_files_info, d.stats),
+        "10": lambda d: comando_estadisticas(d.questions, d.perf_data, d.cursos_dict, d.stats, d.nav),
+        "11": lambda d: comando_buscar(d.questions, d.perf_data, d.exam_dates, d.buscador(), **d.sesion),
+    }
 
     while True:
-        mostrar_menu()
+        with profiling.span("main.menu_render"):
+            mostrar_menu()
         choice = input("Elige opción: ").strip()
-        if choice == "1":
-            comando_quiz_programado(questions, perf_data, exam_dates)
-        elif choice == "2":
-            comando_quiz_todas(questions, perf_data, exam_dates)
-        elif choice == "3":
-            comando_quiz_no_respondidas(questions, perf_data, exam_dates)
-        elif choice == "4":
-            comando_quiz_falladas(questions, perf_data, exam_dates)
-        elif choice == "5":
-            comando_quiz_falladas_o_saltadas(questions, perf_data, exam_dates)
-        elif choice == "6":
-            comando_quiz_saltadas(questions, perf_data, exam_dates)
-        elif choice == "7":
-            comando_quiz_por_archivo(questions, perf_data, cursos_dict, exam_dates)
-        elif choice == "8":
-            comando_quiz_por_etiqueta(questions, perf_data, exam_dates, tags)
-        elif choice == "9":
-            comando_resumen_archivos(questions, perf_data, cursos_dict, quiz_files_info)
-        elif choice == "10":
-            comando_estadisticas(questions, perf_data, cursos_dict)
-        elif choice == "0":
+        if choice == "0":
+            # Let a load still in flight finish its index/cache writes.
+            carga.esperar(relanzar=False)
             clear_screen()
             print("¡Hasta luego!")
             sys.exit(0)
+        accion = acciones.get(choice)
+        if accion is None:
+            continue
+        datos = carga.esperar()
+        with profiling.span(f"menu.{choice}"):
+            if choice == args.profile_action:
+                prof_path = f"quizprog_menu_{choice}.prof"
+                profiling.capture(accion, prof_path, datos)
+                print(f"Perfil cProfile guardado en {prof_path}")
+                press_any_key()
+            else:
+                accion(datos)
+        if datos.stats.changes != datos.saved_changes:
+            guardar_estadisticas(datos.stats, datos.corpus_version)
+            datos.saved_changes = datos.stats.changes
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -2,90 +2,129 @@
 
 import os
 
-def pick_a_file_menu(cursos_dict):
+from .utils import Frame, effective_today
+
+NO_SUBFOLDER = "(No subfolder)"
+
+
+class NavNode:
+    """
+    One course, section or file of the navigation tree. Children are sorted
+    once when the tree is built; counters are read from the StatsAggregator
+    rollups when a menu is drawn, so they follow every answer.
+    """
+
+    __slots__ = ("kind", "name", "course", "section", "filepath", "question_count", "children")
+
+    def __init__(self, kind, name, course=None, section=None, filepath=None,
+                 question_count=0, children=()):
+        self.kind = kind
+        self.name = name
+        self.course = course
+        self.section = section
+        self.filepath = filepath
+        self.question_count = question_count
+        self.children = list(children)
+
+    def counts(self, stats):
+        if self.kind == "file":
+            return stats.file(self.filepath)
+        if self.kind == "section":
+            return stats.section(self.course, self.section)
+        return stats.course(self.name)
+
+    def label(self, stats=None, today=None):
+        if stats is None:
+            if self.kind == "file":
+                return f"{self.name} ({self.question_count} preguntas)"
+            return self.name
+        c = self.counts(stats)
+        return (f"{self.name} ({c.total} preguntas, {c.due(today)} para hoy, "
+                f"{c.wrong} falladas, {c.never} sin responder)")
+
+
+def build_nav_tree(cursos_dict):
+    """Course → section → file tree for cursos_dict, built once at load."""
+    courses = []
+    for cname in sorted(cursos_dict):
+        sections = []
+        for sname, sdata in sorted(cursos_dict[cname]["sections"].items()):
+            files = [
+                NavNode("file", f["filename"], cname, filepath=f["filepath"],
+                        question_count=f["question_count"])
+                for f in sorted(sdata["files"], key=lambda f: f["filename"])
+            ]
+            sections.append(NavNode(
+                "section", sname, cname, None if sname == NO_SUBFOLDER else sname,
+                question_count=sdata["section_questions"], children=files,
+            ))
+        courses.append(NavNode(
+            "course", cname, cname,
+            question_count=cursos_dict[cname]["total_questions"], children=sections,
+        ))
+    return NavNode("root", "", children=courses)
+
+
+def pick_a_file_menu(cursos_dict, tree=None, stats=None):
     """
     Menù interattivo: prima mostra i corsi, poi le sezioni, poi i file.
     Ritorna il filepath selezionato o None se annullato.
+    Con `stats` ogni voce mostra i contatori (totale, per oggi, fallate, mai risposte).
     """
     if not cursos_dict:
         print("No hay cursos disponibles.")
         return None
+    if tree is None:
+        tree = build_nav_tree(cursos_dict)
+    today = effective_today() if stats is not None else None
 
-    course_names = sorted(cursos_dict.keys())
-    while True:
-        print("\n=== Lista de Cursos ===")
-        for i, cname in enumerate(course_names, start=1):
-            print(f"{i}) {cname}")
-        print("0) Cancelar\n")
-        choice = input("Selecciona un curso: ").strip()
-        if choice == "0":
-            return None
-        try:
-            idx = int(choice) - 1
-            if 0 <= idx < len(course_names):
-                chosen_course = course_names[idx]
-                break
-        except ValueError:
-            pass
-        print("Opción no válida, intenta de nuevo.")
-
-    course_data = cursos_dict[chosen_course]
-    section_names = sorted(course_data["sections"].keys())
+    course = _choose(tree.children, "\n=== Lista de Cursos ===", "Selecciona un curso: ", stats, today)
+    if course is None:
+        return None
 
+    sections = course.children
     # Si solo hay una sección y se llama "(No subfolder)", vamos directo
-    if len(section_names) == 1 and section_names[0] == "(No subfolder)":
-        chosen_section = section_names[0]
+    if len(sections) == 1 and sections[0].name == NO_SUBFOLDER:
+        section = sections[0]
     else:
-        if not section_names:
+        if not sections:
             print("No hay secciones en este curso.")
             return None
-        while True:
-            print(f"\n=== Secciones de '{chosen_course}' ===")
-            for i, sname in enumerate(section_names, start=1):
-                print(f"{i}) {sname}")
-            print("0) Cancelar\n")
-            choice = input("Selecciona una sección: ").strip()
-            if choice == "0":
-                return None
-            try:
-                idx = int(choice) - 1
-                if 0 <= idx < len(section_names):
-                    chosen_section = section_names[idx]
-                    break
-            except ValueError:
-                pass
-            print("Opción no válida, intenta de nuevo.")
-
-    return _pick_file_from_section(chosen_course, chosen_section, course_data["sections"])
-
-
-def _pick_file_from_section(chosen_course, chosen_section, sections_dict):
-    if chosen_section not in sections_dict:
-        print("No existe la sección seleccionada.")
-        return None
-    file_list = sections_dict[chosen_section]["files"]
-    if not file_list:
+        section = _choose(sections, f"\n=== Secciones de '{course.name}' ===",
+                          "Selecciona una sección: ", stats, today)
+        if section is None:
+            return None
+
+    if not section.children:
         print("No hay archivos en esta sección.")
         return None
+    chosen = _choose(section.children, f"\n=== Archivos en '{section.name}' ({course.name}) ===",
+                     "Selecciona un archivo: ", stats, today)
+    return chosen.filepath if chosen else None
+
 
+def _choose(nodes, title, prompt, stats, today):
+    frame = Frame()
     while True:
-        print(f"\n=== Archivos en '{chosen_section}' ({chosen_course}) ===")
-        for i, fobj in enumerate(file_list, start=1):
-            print(f"{i}) {fobj['filename']} ({fobj['question_count']} preguntas)")
-        print("0) Cancelar\n")
-        choice = input("Selecciona un archivo: ").strip()
+        frame.print(title)
+        for i, node in enumerate(nodes, start=1):
+            frame.print(f"{i}) {node.label(stats, today)}")
+        frame.print("0) Cancelar\n")
+        frame.show(clear=False)
+        choice = input(prompt).strip()
         if choice == "0":
             return None
         try:
             idx = int(choice) - 1
-            if 0 <= idx < len(file_list):
-                return file_list[idx]["filepath"]
+            if 0 <= idx < len(nodes):
+                return nodes[idx]
         except ValueError:
             pass
         print("Opción no válida, intenta de nuevo.")
 
 
 def get_file_question_count(questions, filepath):
+    """Linear scan; the menus read the tree and stats counters instead."""
     return sum(1 for q in questions if q.get("_quiz_source") == filepath)
 
 
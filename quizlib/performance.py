@@ -4,7 +4,10 @@ import os
 import json
 import shutil
 
+from . import profiling
+
 PERFORMANCE_FILE = "quiz_performance.json"
+LINKS_FILE = "quiz_links.json"
 
 def load_performance_data(filepath=PERFORMANCE_FILE):
     """
@@ -14,7 +17,7 @@ def load_performance_data(filepath=PERFORMANCE_FILE):
         return {}
 
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
+        with profiling.span("perf.load"), open(filepath, "r", encoding="utf-8") as f:
             data = json.load(f)
             if not isinstance(data, dict):
                 return {}
@@ -22,10 +25,23 @@ def load_performance_data(filepath=PERFORMANCE_FILE):
     except:
         return {}
 
+def perf_store_version(filepath=PERFORMANCE_FILE):
+    """
+    Cheap version tag of the performance store (mtime + size); changes on
+    every save.
+    """
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return "missing"
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
 def save_performance_data(perf_data, filepath=PERFORMANCE_FILE):
     """
     Salva perf_data in JSON. Fa un backup del file esistente.
     """
+    profiling.count("perf.saves")
     if os.path.exists(filepath):
         backup_path = filepath + ".bak"
         try:
@@ -34,7 +50,46 @@ def save_performance_data(perf_data, filepath=PERFORMANCE_FILE):
             pass
 
     try:
-        with open(filepath, "w", encoding="utf-8") as f:
+        with profiling.span("perf.save"), open(filepath, "w", encoding="utf-8") as f:
             json.dump(perf_data, f, ensure_ascii=False, indent=2)
     except Exception as ex:
         print(f"[!] Error guardando desempeño: {ex}")
+
+
+def links_path(perf_path=PERFORMANCE_FILE):
+    """Linked-question groups live next to the performance store."""
+    return os.path.join(os.path.dirname(perf_path), LINKS_FILE)
+
+
+def load_link_groups(filepath=None):
+    """Grupos de ids enlazados (listas de str); [] si no hay archivo."""
+    filepath = filepath or links_path()
+    if not os.path.exists(filepath):
+        return []
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [[str(qid) for qid in group] for group in data.get("groups", [])]
+    except:
+        return []
+
+
+def load_links(filepath=None):
+    """
+    Preguntas enlazadas que comparten programación, como
+    {qid: [ids de los demás miembros del grupo]} (claves y valores str).
+    """
+    links = {}
+    for group in load_link_groups(filepath):
+        for qid in group:
+            links[qid] = [other for other in group if other != qid]
+    return links
+
+
+def save_link_groups(groups, filepath=None):
+    filepath = filepath or links_path()
+    try:
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump({"groups": groups}, f, ensure_ascii=False, indent=2)
+    except Exception as ex:
+        print(f"[!] Error guardando enlaces: {ex}")
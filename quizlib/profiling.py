@@ -0,0 +1,125 @@
+# quizlib/profiling.py
+
+"""
+Lightweight phase timers and counters.
+
+Disabled by default: `span()` then returns a shared no-op context manager and
+`count()` returns immediately. Enable with the `--profile` flag or the
+`QUIZPROG_PROFILE` environment variable (a path for the JSON report, or `1`
+for the default path). The report is written at exit.
+"""
+
+import atexit
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+DEFAULT_REPORT = "quizprog_profile.json"
+
+ENABLED = False
+_report_path = None
+_samples = defaultdict(list)
+_counters = Counter()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _samples[self.name].append(time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    """Context manager that times one occurrence of phase `name`."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def count(name, n=1):
+    """Increment counter `name` by n."""
+    if ENABLED:
+        _counters[name] += n
+
+
+def enable(report_path=None):
+    """Turn instrumentation on and write the report to report_path at exit."""
+    global ENABLED, _report_path
+    if not ENABLED:
+        atexit.register(dump)
+    ENABLED = True
+    _report_path = report_path or DEFAULT_REPORT
+
+
+def reset():
+    _samples.clear()
+    _counters.clear()
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def report():
+    """Per-phase breakdown: count, total, p50, p95 and max in milliseconds."""
+    phases = {}
+    for name, values in sorted(_samples.items()):
+        ordered = sorted(values)
+        phases[name] = {
+            "count": len(ordered),
+            "total_ms": round(sum(ordered) * 1000, 3),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+    return {"phases": phases, "counters": dict(sorted(_counters.items()))}
+
+
+def dump(path=None):
+    import json
+
+    path = path or _report_path or DEFAULT_REPORT
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report(), f, ensure_ascii=False, indent=2)
+    except OSError as ex:
+        print(f"[!] Error guardando perfil: {ex}", file=sys.stderr)
+
+
+def capture(func, path, *args, **kwargs):
+    """Run func under cProfile and save the stats to path (pstats format)."""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+
+
+_env = os.environ.get("QUIZPROG_PROFILE")
+if _env:
+    enable(None if _env == "1" else _env)
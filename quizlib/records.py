@@ -0,0 +1,122 @@
+# quizlib/records.py
+
+import os
+import sys
+
+
+class QuestionRecord:
+    """
+    Compact, read-only question built by the loader.
+
+    Course, section and file index are computed once at load time and
+    interned, answers are kept as a tuple of texts plus a bitmask of the
+    correct ones, and per-question metadata the app never reads
+    (original_file, legal_reference, ...) is dropped.
+
+    Dict-style access (`q["question"]`, `q.get("_quiz_id")`, ...) is kept for
+    code that still handles plain question dicts.
+    """
+
+    __slots__ = (
+        "id", "course", "section", "file_index", "source",
+        "tags", "correct_mask", "question", "answer_texts", "explanation",
+    )
+
+    def __init__(self, qid, course, section, file_index, source,
+                 tags, correct_mask, question, answer_texts, explanation):
+        self.id = qid
+        self.course = course
+        self.section = section
+        self.file_index = file_index
+        self.source = source
+        self.tags = tags
+        self.correct_mask = correct_mask
+        self.question = question
+        self.answer_texts = answer_texts
+        self.explanation = explanation
+
+    @classmethod
+    def from_dict(cls, q, qid, course, section, file_index, source):
+        texts = []
+        mask = 0
+        for i, a in enumerate(q.get("answers", [])):
+            texts.append(a.get("text", ""))
+            if a.get("correct", False):
+                mask |= 1 << i
+        return cls(
+            qid,
+            course,
+            section,
+            file_index,
+            source,
+            tuple(sys.intern(t) for t in q.get("tags", [])),
+            mask,
+            q.get("question", ""),
+            tuple(texts),
+            q.get("explanation", ""),
+        )
+
+    @property
+    def answers(self):
+        return [
+            {"text": text, "correct": bool(self.correct_mask >> i & 1)}
+            for i, text in enumerate(self.answer_texts)
+        ]
+
+    def is_correct(self, index):
+        return bool(self.correct_mask >> index & 1)
+
+    # ── dict compatibility ────────────────────────────────────────────────
+    _KEYS = {
+        "question": "question",
+        "answers": "answers",
+        "explanation": "explanation",
+        "tags": "tags",
+        "_quiz_id": "id",
+        "_quiz_source": "source",
+    }
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        attr = self._KEYS.get(key)
+        if attr is None:
+            return default
+        return getattr(self, attr)
+
+    def __contains__(self, key):
+        return key in self._KEYS
+
+    def __repr__(self):
+        return f"QuestionRecord(id={self.id!r}, course={self.course!r}, source={self.source!r})"
+
+
+def split_course_section(rel_path):
+    """
+    Return (course, section) for a quiz file path relative to the data folder.
+    Files directly under a course folder have no section.
+    """
+    parts = rel_path.split(os.sep)
+    curso = sys.intern(parts[0]) if parts else "(Unknown)"
+    section = sys.intern(parts[1]) if len(parts) > 2 else None
+    return curso, section
+
+
+def question_course(question_data):
+    """
+    Course of a question: the precomputed one for records, otherwise the
+    folder that contains its source file.
+    """
+    course = getattr(question_data, "course", None)
+    if course is not None:
+        return course
+    source = question_data.get("_quiz_source", "")
+    if isinstance(source, str):
+        parts = os.path.normpath(source).split(os.sep)
+        if len(parts) >= 2:
+            return parts[-2]
+    return None
@@ -0,0 +1,217 @@
+# quizlib/search.py
+
+"""
+Full-text search over question text, answers and explanations.
+
+Text is lower-cased and stripped of accents (``Constitución`` and
+``constitucion`` are the same token). Postings are kept per quiz file and
+persisted next to the loader index, keyed by each file's corpus_version()
+(mtime and question ids), so only files the loader re-indexed or renumbered
+are tokenized again.
+"""
+
+import json
+import logging
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from . import profiling
+from .loader import INDEX_FILENAME, corpus_version
+
+SEARCH_INDEX_FILENAME = ".quiz_search.json"
+SEARCH_INDEX_FORMAT = 2
+MIN_PREFIX = 3
+
+# Very common Spanish words: they would match almost every question.
+STOPWORDS = frozenset("""
+    a al como con de del el en es la las lo los no o para por que se si su un una y
+""".split())
+
+_TOKEN_RE = re.compile(r"\w+")
+
+logger = logging.getLogger(__name__)
+
+
+def _accent_table():
+    """str.translate table folding accented Latin letters to their base letter."""
+    table = {}
+    for code in range(0xC0, 0x250):
+        base = unicodedata.normalize("NFD", chr(code))[0]
+        if base != chr(code) and base.isascii():
+            table[code] = base
+    return table
+
+
+_ACCENTS = _accent_table()
+
+
+_folded = {}
+
+
+def _fold(token):
+    # Words repeat a lot across questions: fold each distinct one only once.
+    folded = _folded.get(token)
+    if folded is None:
+        folded = _folded[token] = token.translate(_ACCENTS)
+    return folded
+
+
+def words(text):
+    """Words of text in order, lower-cased and without accents (stopwords kept)."""
+    return [_fold(t) for t in _TOKEN_RE.findall(text.lower())]
+
+
+def tokenize(text):
+    """Distinct normalized tokens of text, without stopwords."""
+    tokens = set(words(text))
+    tokens -= STOPWORDS
+    return tokens
+
+
+def question_tokens(q):
+    parts = [q.get("question", ""), q.get("explanation", "") or ""]
+    texts = getattr(q, "answer_texts", None)
+    if texts is None:
+        texts = [a.get("text", "") for a in q.get("answers", [])]
+    parts.extend(texts)
+    return tokenize(" ".join(parts))
+
+
+def _file_postings(questions):
+    postings = defaultdict(list)
+    for q in questions:
+        qid = q.get("_quiz_id")
+        for token in question_tokens(q):
+            postings[token].append(qid)
+    return dict(postings)
+
+
+class SearchIndex:
+    """
+    Inverted index token → sorted question ids. `search()` ANDs the query
+    tokens; tokens of MIN_PREFIX or more characters also match as prefixes
+    ("constitu" finds "constitucional"). With known_ids, only those ids
+    are ever returned.
+    """
+
+    def __init__(self, files=None, known_ids=None):
+        # rel path → {"version": ..., "postings": {token: [qid, ...]}}
+        self.files = files or {}
+        self.known_ids = known_ids
+        self._ids = {}
+        self._vocabulary = None
+
+    @classmethod
+    def build(cls, questions, folder):
+        """
+        Index questions, reusing the persisted postings of every file whose
+        version matches the loader index, and save the result if anything changed.
+        """
+        with profiling.span("search.build"):
+            versions = _indexed_versions(folder)
+            cached = load_search_index(folder)
+            by_file = defaultdict(list)
+            for q in questions:
+                by_file[os.path.relpath(q.get("_quiz_source"), folder)].append(q)
+
+            files = {}
+            changed = set(cached) != set(by_file)
+            for rel, file_questions in by_file.items():
+                entry = cached.get(rel)
+                version = versions.get(rel)
+                if entry is None or version is None or entry.get("version") != version:
+                    profiling.count("search.files_tokenized")
+                    entry = {"version": version, "postings": _file_postings(file_questions)}
+                    changed = True
+                files[rel] = entry
+
+            index = cls(files, known_ids={q.get("_quiz_id") for q in questions})
+            if changed:
+                save_search_index(folder, index)
+            return index
+
+    def vocabulary(self):
+        """Sorted distinct tokens of every file."""
+        if self._vocabulary is None:
+            tokens = set()
+            for entry in self.files.values():
+                tokens.update(entry["postings"])
+            self._vocabulary = sorted(tokens)
+        return self._vocabulary
+
+    def ids(self, token):
+        """Ids of the questions containing token (per-file postings merged on demand)."""
+        ids = self._ids.get(token)
+        if ids is None:
+            ids = set()
+            for entry in self.files.values():
+                found = entry["postings"].get(token)
+                if found:
+                    ids.update(found)
+            self._ids[token] = ids = frozenset(ids)
+        return ids
+
+    def _matches(self, token):
+        if len(token) < MIN_PREFIX:
+            return self.ids(token)
+        vocab = self.vocabulary()
+        i = bisect_left(vocab, token)
+        matches = set()
+        while i < len(vocab) and vocab[i].startswith(token):
+            matches.update(self.ids(vocab[i]))
+            i += 1
+        return matches
+
+    def search(self, query):
+        """Sorted ids of the questions that contain every token of query."""
+        with profiling.span("search.query"):
+            tokens = sorted(tokenize(query), key=len, reverse=True)
+            if not tokens:
+                return []
+            result = self.known_ids
+            for token in tokens:
+                ids = self._matches(token)
+                result = ids if result is None else result & ids
+                if not result:
+                    return []
+            return sorted(result)
+
+
+def _indexed_versions(folder):
+    # Per file, so an edit retokenizes one file while a renumbered index
+    # (same mtimes, new ids) still invalidates the postings it changed.
+    path = os.path.join(folder, INDEX_FILENAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+    return {rel: corpus_version({"files": {rel: entry}}) for rel, entry in files.items()}
+
+
+def load_search_index(folder):
+    path = os.path.join(folder, SEARCH_INDEX_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as ex:
+        logger.warning(f"Could not load search index at {path}: {ex}")
+        return {}
+    if not isinstance(data, dict) or data.get("format") != SEARCH_INDEX_FORMAT:
+        return {}
+    return data.get("files", {})
+
+
+def save_search_index(folder, index):
+    path = os.path.join(folder, SEARCH_INDEX_FILENAME)
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"format": SEARCH_INDEX_FORMAT, "files": index.files},
+                      f, ensure_ascii=False, separators=(",", ":"))
+    except Exception as ex:
+        logger.error(f"Failed to save search index at {path}: {ex}")
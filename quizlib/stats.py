@@ -0,0 +1,246 @@
+# quizlib/stats.py
+
+"""
+Single-pass rollups of question status per file, section, course, tag and for
+the whole repository, kept up to date one question at a time after each
+answer, and persisted next to the performance store between runs.
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime
+
+from .records import question_course
+from .utils import QUIZ_DATA_FOLDER
+
+STATUSES = ("never", "skipped", "wrong", "correct")
+STATS_CACHE_FILE = "quiz_stats_cache.json"
+STATS_CACHE_FORMAT = 2
+
+logger = logging.getLogger(__name__)
+
+
+def question_state(entry):
+    """
+    (status, next_review_date) for a perf entry. status is the last history
+    result ("never" if unanswered); next_review_date is None when missing.
+    """
+    history = entry.get("history") if entry else None
+    status = history[-1] if history else "never"
+    nr = entry.get("next_review") if entry else None
+    review = datetime.fromisoformat(nr).date() if nr else None
+    return status, review
+
+
+class Counts:
+    """
+    Counters for one group of questions. Review dates are kept as a
+    histogram so `due(today)` works for any day without a rescan.
+    """
+
+    __slots__ = ("total", "never", "skipped", "wrong", "correct", "reviews")
+
+    def __init__(self):
+        self.total = 0
+        self.never = self.skipped = self.wrong = self.correct = 0
+        self.reviews = Counter()
+
+    def add(self, state, n=1):
+        status, review = state
+        self.total += n
+        if status in STATUSES:
+            setattr(self, status, getattr(self, status) + n)
+        self.reviews[review] += n
+        if not self.reviews[review]:
+            del self.reviews[review]
+
+    def due(self, today):
+        return sum(n for d, n in self.reviews.items() if d is None or d <= today)
+
+    def as_dict(self, today=None):
+        data = {
+            "total": self.total,
+            "never": self.never,
+            "skipped": self.skipped,
+            "wrong": self.wrong,
+            "correct": self.correct,
+        }
+        if today is not None:
+            data["due"] = self.due(today)
+        return data
+
+    def to_json(self):
+        data = self.as_dict()
+        data["reviews"] = {
+            (d.isoformat() if d else ""): n for d, n in self.reviews.items()
+        }
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        counts = cls()
+        counts.total = data["total"]
+        for status in STATUSES:
+            setattr(counts, status, data[status])
+        counts.reviews = Counter({
+            (date.fromisoformat(d) if d else None): n
+            for d, n in data["reviews"].items()
+        })
+        return counts
+
+
+_EMPTY = Counts()
+
+
+class StatsAggregator:
+    """
+    Builds every rollup in one pass over the questions and then updates
+    them incrementally with `refresh(qid)` after a question is answered.
+
+    `changes` grows on every rebuild or update, so callers can tell when the
+    persisted cache needs rewriting.
+    """
+
+    def __init__(self, questions, perf_data, folder=QUIZ_DATA_FOLDER):
+        self.questions = questions
+        self.perf_data = perf_data
+        self.folder = folder
+        self.changes = 0
+        self.rebuild()
+
+    @classmethod
+    def from_cache(cls, questions, perf_data, cached, folder=QUIZ_DATA_FOLDER):
+        """
+        Restore the rollups from a cache written by to_cache(). No
+        per-question work happens until the first refresh().
+        """
+        stats = cls.__new__(cls)
+        stats.questions = questions
+        stats.perf_data = perf_data
+        stats.folder = folder
+        stats.changes = 0
+        stats.repository = Counts.from_json(cached["repository"])
+        stats.files = {k: Counts.from_json(v) for k, v in cached["files"]}
+        stats.sections = {(c, s): Counts.from_json(v) for c, s, v in cached["sections"]}
+        stats.courses = {k: Counts.from_json(v) for k, v in cached["courses"]}
+        stats.tags = {k: Counts.from_json(v) for k, v in cached["tags"]}
+        stats._groups = None
+        stats._state = None
+        return stats
+
+    def to_cache(self):
+        return {
+            "repository": self.repository.to_json(),
+            "files": [[k, v.to_json()] for k, v in self.files.items()],
+            "sections": [[c, s, v.to_json()] for (c, s), v in self.sections.items()],
+            "courses": [[k, v.to_json()] for k, v in self.courses.items()],
+            "tags": [[k, v.to_json()] for k, v in self.tags.items()],
+        }
+
+    def rebuild(self):
+        self.changes += 1
+        self.repository = Counts()
+        self.files = {}
+        self.sections = {}
+        self.courses = {}
+        self.tags = {}
+        self._groups = {}
+        self._state = {}
+
+        for idx, q in enumerate(self.questions):
+            qkey = str(q.get("_quiz_id", idx))
+            course = question_course(q)
+            groups = (
+                self.repository,
+                self.files.setdefault(self._file_key(q.get("_quiz_source")), Counts()),
+                self.sections.setdefault((course, getattr(q, "section", None)), Counts()),
+                self.courses.setdefault(course, Counts()),
+            ) + tuple(self.tags.setdefault(t, Counts()) for t in q.get("tags", ()))
+            self._groups.setdefault(qkey, []).append(groups)
+            state = self._state.get(qkey)
+            if state is None:
+                state = self._state[qkey] = question_state(self.perf_data.get(qkey))
+            for counts in groups:
+                counts.add(state)
+
+    def refresh(self, qid):
+        """Re-read the perf entry of qid and move it between counters."""
+        if self._groups is None:
+            # Restored from cache: index the questions against the current perf data.
+            self.rebuild()
+            return
+        qkey = str(qid)
+        old = self._state.get(qkey)
+        if old is None:
+            return
+        new = question_state(self.perf_data.get(qkey))
+        if new == old:
+            return
+        self._state[qkey] = new
+        self.changes += 1
+        for groups in self._groups[qkey]:
+            for counts in groups:
+                counts.add(old, -1)
+                counts.add(new)
+
+    def _file_key(self, filepath):
+        # Relative to the quiz folder, like corpus_version(): the cache must
+        # not depend on how the folder was spelled.
+        return os.path.relpath(filepath, self.folder) if filepath else filepath
+
+    def file(self, filepath):
+        """Counts of a quiz file, given by its path as loaded from the folder."""
+        return self.files.get(self._file_key(filepath), _EMPTY)
+
+    def section(self, course, section):
+        return self.sections.get((course, section), _EMPTY)
+
+    def course(self, course):
+        return self.courses.get(course, _EMPTY)
+
+    def tag(self, tag):
+        return self.tags.get(tag, _EMPTY)
+
+
+def stats_cache_path(perf_path):
+    """The stats cache lives next to the performance store."""
+    return os.path.join(os.path.dirname(perf_path), STATS_CACHE_FILE)
+
+
+def load_stats_cache(path, perf_version, corpus_version):
+    """
+    Return the cached rollups if they were written for these perf-store and
+    corpus versions, otherwise None.
+    """
+    if not corpus_version or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as ex:
+        logger.warning(f"Could not load stats cache at {path}: {ex}")
+        return None
+    if (not isinstance(data, dict)
+            or data.get("format") != STATS_CACHE_FORMAT
+            or data.get("perf_version") != perf_version
+            or data.get("corpus_version") != corpus_version):
+        return None
+    return data.get("stats")
+
+
+def save_stats_cache(path, stats, perf_version, corpus_version):
+    if not corpus_version:
+        return
+    data = {
+        "format": STATS_CACHE_FORMAT,
+        "perf_version": perf_version,
+        "corpus_version": corpus_version,
+        "stats": stats.to_cache(),
+    }
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    except Exception as ex:
+        logger.error(f"Failed to save stats cache at {path}: {ex}")
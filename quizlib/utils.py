@@ -2,18 +2,72 @@
 
 import os
 import sys
+from datetime import date, datetime, time, timedelta
+
+QUIZ_DATA_FOLDER = os.environ.get("QUIZ_DATA_FOLDER", "quiz_data")
+
+# Answers given before this time still count for the previous learning day.
+DAY_ROLLOVER = time(5, 30)
+
+# Cursor home + erase display: what `clear` prints, without forking a shell.
+CLEAR_SEQUENCE = "\x1b[H\x1b[2J"
+
+
+def _clear_mode():
+    """
+    How to clear the screen: None (not a real terminal), "ansi" (escape
+    sequence written with the frame) or "system" (cls/clear, for consoles
+    without ANSI support such as TERM=dumb or the legacy Windows console).
+    """
+    if not os.environ.get('TERM') or not sys.stdout.isatty():
+        return None
+    if os.environ.get('TERM') == 'dumb':
+        return "system"
+    if os.name == 'nt' and not (os.environ.get('WT_SESSION') or os.environ.get('ANSICON')):
+        return "system"
+    return "ansi"
+
+
+def _system_clear():
+    os.system('cls' if os.name == 'nt' else 'clear')
+
 
 def clear_screen():
     """
     Clear the screen if we have a real terminal.
     Skip if TERM is not set or stdout is not a TTY.
     """
-    if not os.environ.get('TERM') or not sys.stdout.isatty():
-        return
-    if os.name == 'nt':
-        os.system('cls')
-    else:
-        os.system('clear')
+    mode = _clear_mode()
+    if mode == "ansi":
+        print(CLEAR_SEQUENCE, end="", flush=True)
+    elif mode == "system":
+        _system_clear()
+
+
+class Frame:
+    """
+    Una pantalla construida en memoria: `print()` acumula líneas y `show()`
+    limpia y la emite en una sola escritura, sin parpadeo ni subprocesos.
+    """
+
+    def __init__(self):
+        self._parts = []
+
+    def print(self, *values, sep=" ", end="\n"):
+        self._parts.append(sep.join(str(v) for v in values) + end)
+
+    def text(self):
+        return "".join(self._parts)
+
+    def show(self, clear=True):
+        text = self.text()
+        self._parts = []
+        mode = _clear_mode() if clear else None
+        if mode == "ansi":
+            text = CLEAR_SEQUENCE + text
+        elif mode == "system":
+            _system_clear()
+        print(text, end="", flush=True)
 
 
 def press_any_key():
@@ -23,3 +77,19 @@ def press_any_key():
     """
     if sys.stdin.isatty():
         input("\nPresiona Enter para continuar...")
+
+
+def learning_date(now, today):
+    """The learning date for wall-clock `now`: before DAY_ROLLOVER it is still yesterday."""
+    if now.time() < DAY_ROLLOVER:
+        return today - timedelta(days=1)
+    return today
+
+
+def effective_today():
+    """
+    Return the 'current learning date', rolling over at 05:30 AM local time.
+    Lightweight twin of engine.effective_today for code paths that should not
+    import the engine.
+    """
+    return learning_date(datetime.now(), date.today())
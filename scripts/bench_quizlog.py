@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+
+import argparse
+import http.client
+import json
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from server.quizlog_server import (  # noqa: E402
+    INSERT_EVENT_SQL, EventRepository, IngestQueue, event_row, now_iso, partition_for,
+)
+
+SERVER_SCRIPT = Path(__file__).resolve().parents[1] / "server" / "quizlog_server.py"
+
+
+class LegacyRepository(EventRepository):
+    """The previous behaviour: a fresh rollback-journal connection per call."""
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.database_path)
+        connection.row_factory = sqlite3.Row
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _initialize(self) -> None:
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode = DELETE")
+        super()._initialize()
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode = DELETE")
+
+
+def make_events(count: int, prefix: str) -> list[dict]:
+    return [
+        {
+            "event_id": f"{prefix}-{i}",
+            "occurred_at": f"2026-04-{1 + i % 28:02d}T12:{i % 60:02d}:00Z",
+            "session_id": f"{prefix}-sess-{i // 50}",
+            "device_id": f"dev-{i % 7}",
+            "question_id": f"q-{i % 900}",
+            "course_key": f"Curso{i % 6}",
+            "source_path": f"Curso{i % 6}/file{i % 30}.json",
+            "filter_mode": "due",
+            "scope": "repository",
+            "event_type": "question_answered" if i % 5 else "question_skipped",
+            "selected_index": i % 4,
+            "correct_index": (i * 7) % 4,
+            "result": "correct" if i % 3 else "wrong",
+            "app_version": "1.0",
+            "build_number": "1",
+            "metadata": {"score": str(i % 10)},
+        }
+        for i in range(count)
+    ]
+
+
+def insert_per_row(repository: EventRepository, events: list[dict], received_at: str) -> tuple[int, int]:
+    """The previous insert path: one execute and two json.dumps calls per event."""
+    inserted = 0
+    with repository._connect() as connection:
+        repository._ensure_partitions(connection, {partition_for(event["occurred_at"]) for event in events})
+        for event in events:
+            payload = json.dumps(event, ensure_ascii=False, sort_keys=True)
+            metadata = json.dumps(event.get("metadata", {}), ensure_ascii=False, sort_keys=True)
+            row = event_row(event, received_at)[:-2] + (metadata, payload)
+            sql = INSERT_EVENT_SQL.format(table=partition_for(event["occurred_at"]))
+            inserted += connection.execute(sql, row).rowcount
+    return inserted, len(events) - inserted
+
+
+def bench_ingest(args) -> dict:
+    result = {}
+    for batch in args.batch_sizes:
+        batches = max(1, args.events // batch)
+        row = {}
+        for name, insert in (("per_row", insert_per_row), ("executemany", EventRepository.insert_events)):
+            with tempfile.TemporaryDirectory() as tmp:
+                repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+                payloads = [make_events(batch, f"b{n}") for n in range(batches)]
+                start = time.perf_counter()
+                for events in payloads:
+                    insert(repository, events, now_iso())
+                elapsed = time.perf_counter() - start
+                repository.close()
+            row[f"{name}_events_per_s"] = round(batches * batch / elapsed)
+        result[f"batch_{batch}"] = row
+    return result
+
+
+def bench_group_commit(args) -> dict:
+    """Concurrent small uploads: one transaction each vs group-committed by IngestQueue."""
+    result = {}
+    for name in ("per_request", "group_commit"):
+        with tempfile.TemporaryDirectory() as tmp:
+            repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+            ingest = IngestQueue(repository) if name == "group_commit" else None
+            payloads = [
+                [make_events(args.batch, f"u{worker}-{n}") for n in range(args.uploads)]
+                for worker in range(args.uploaders)
+            ]
+
+            def uploader(worker: int) -> None:
+                for events in payloads[worker]:
+                    if ingest is None:
+                        repository.insert_events(events, now_iso())
+                    else:
+                        ingest.submit(events, now_iso()).result()
+
+            threads = [threading.Thread(target=uploader, args=(i,)) for i in range(args.uploaders)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            row = {"uploads_per_s": round(args.uploaders * args.uploads / elapsed, 1)}
+            if ingest is not None:
+                ingest.close()
+                stats = ingest.stats()
+                row["commits"] = stats["commits"]
+                row["mean_commit_requests"] = stats["mean_commit_requests"]
+            repository.close()
+        result[name] = row
+    return result
+
+
+def bench_storage(args) -> dict:
+    """Database size and read speed of each storage mode over the same events."""
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database)
+        for n in range(0, args.events, 10_000):
+            repository.insert_events(make_events(min(10_000, args.events - n), f"s{n}"), now_iso())
+        for storage in ("full", "compact", "compact-zlib"):
+            repository.migrate_storage(storage)
+            start = time.perf_counter()
+            exported = sum(len(line) for line in repository.iter_export({}))
+            export_s = time.perf_counter() - start
+            start = time.perf_counter()
+            for device in range(7):
+                repository.list_events({"device_id": f"dev-{device}"}, 1000)
+            page_ms = (time.perf_counter() - start) / 7 * 1000
+            result[storage] = {
+                "db_mb": round(database.stat().st_size / 2**20, 2),
+                "export_s": round(export_s, 3),
+                "export_mb": round(exported / 2**20, 2),
+                "page_1000_ms": round(page_ms, 2),
+            }
+        repository.close()
+    return result
+
+
+def bench_retention(args) -> dict:
+    """Purging the oldest months: row DELETE (the single-table way) vs archive and DROP TABLE."""
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("delete_rows", "drop_partitions"):
+            database = Path(tmp) / f"{name}.sqlite3"
+            repository = EventRepository(database)
+            for month in range(1, 13):
+                events = make_events(args.events_per_month, f"m{month}")
+                for event in events:
+                    event["occurred_at"] = f"2025-{month:02d}" + event["occurred_at"][7:]
+                repository.insert_events(events, now_iso())
+            cutoff = f"2025-{13 - args.keep_months:02d}"
+            start = time.perf_counter()
+            if name == "delete_rows":
+                with repository._connect() as connection:
+                    with repository._connect() as reader:
+                        partitions = repository._existing_partitions(reader)
+                    for partition in partitions:
+                        connection.execute(f"DELETE FROM {partition} WHERE occurred_at < ?", (cutoff,))
+            else:
+                repository.apply_retention(args.keep_months, datetime(2025, 12, 15, tzinfo=timezone.utc))
+            elapsed = time.perf_counter() - start
+            with repository._connect() as connection:
+                remaining = connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            result[name] = {
+                "purge_s": round(elapsed, 3),
+                "remaining_events": remaining,
+                "db_mb": round(database.stat().st_size / 2**20, 2),
+            }
+            repository.close()
+    return result
+
+
+def bench_concurrent(repository_cls, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = repository_cls(Path(tmp) / "quizlog.sqlite3")
+        repository.insert_events(make_events(args.seed_events, "seed"), now_iso())
+        deadline = time.perf_counter() + args.seconds
+        counts = {"writes": 0, "reads": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def writer(worker: int) -> None:
+            n = 0
+            while time.perf_counter() < deadline:
+                try:
+                    repository.insert_events(make_events(args.batch, f"w{worker}-{n}"), now_iso())
+                    key = "writes"
+                except sqlite3.OperationalError:
+                    key = "errors"
+                n += 1
+                with lock:
+                    counts[key] += 1
+
+        def reader(worker: int) -> None:
+            while time.perf_counter() < deadline:
+                try:
+                    repository.list_events({"device_id": f"dev-{worker % 7}"}, 50)
+                    repository.list_sessions(20)
+                    key = "reads"
+                except sqlite3.OperationalError:
+                    key = "errors"
+                with lock:
+                    counts[key] += 1
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        repository.close()
+    return {
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "errors": counts["errors"],
+    }
+
+
+def wait_for_server(port: int, timeout: float = 10.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_http(mode: str, keep_alive: bool, args) -> dict:
+    """Drive a server subprocess with client threads, reads mixed with uploads."""
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database)
+        repository.insert_events(make_events(args.seed_events, "seed"), now_iso())
+        repository.close()
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, str(SERVER_SCRIPT), "--port", str(port), "--database", str(database), "--mode", mode],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_server(port)
+            deadline = time.perf_counter() + args.seconds
+            latencies: list[float] = []
+            errors = 0
+            lock = threading.Lock()
+
+            def client(worker: int) -> None:
+                nonlocal errors
+                connection = None
+                n = 0
+                local: list[float] = []
+                while time.perf_counter() < deadline:
+                    if connection is None:
+                        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                    headers = {} if keep_alive else {"Connection": "close"}
+                    if n % args.write_every == 0:
+                        body = json.dumps({"events": make_events(args.batch, f"c{worker}-{n}")})
+                        request = ("POST", "/events/batch", body, {**headers, "Content-Type": "application/json"})
+                    elif n % 2:
+                        request = ("GET", "/api/summary", None, headers)
+                    else:
+                        request = ("GET", f"/api/events?limit=50&device_id=dev-{worker % 7}", None, headers)
+                    start = time.perf_counter()
+                    try:
+                        connection.request(request[0], request[1], body=request[2], headers=request[3])
+                        response = connection.getresponse()
+                        response.read()
+                        ok = response.status == 200
+                    except (OSError, http.client.HTTPException):
+                        ok = False
+                    local.append(time.perf_counter() - start)
+                    if not ok:
+                        with lock:
+                            errors += 1
+                    if not keep_alive or not ok:
+                        connection.close()
+                        connection = None
+                    n += 1
+                if connection is not None:
+                    connection.close()
+                with lock:
+                    latencies.extend(local)
+
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    latencies.sort()
+    return {
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "errors": errors,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="QuizProg log server storage benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    concurrent = sub.add_parser("concurrent", help="Mixed read/write throughput, pooled vs per-call connections")
+    concurrent.add_argument("--seconds", type=float, default=3.0)
+    concurrent.add_argument("--writers", type=int, default=2)
+    concurrent.add_argument("--readers", type=int, default=6)
+    concurrent.add_argument("--batch", type=int, default=20)
+    concurrent.add_argument("--seed-events", type=int, default=20_000)
+
+    ingest = sub.add_parser("ingest", help="Events per second of insert_events by batch size")
+    ingest.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    ingest.add_argument("--events", type=int, default=20_000, help="Events inserted per batch size")
+
+    group = sub.add_parser("group", help="Concurrent uploads, per-request commits vs group commit")
+    group.add_argument("--uploaders", type=int, default=32)
+    group.add_argument("--uploads", type=int, default=50, help="Uploads per uploader")
+    group.add_argument("--batch", type=int, default=5, help="Events per upload")
+
+    storage = sub.add_parser("storage", help="DB size and scan speed of full vs compact storage")
+    storage.add_argument("--events", type=int, default=200_000)
+
+    retention = sub.add_parser("retention", help="Purge time of old months, row DELETE vs partition DROP")
+    retention.add_argument("--events-per-month", type=int, default=20_000)
+    retention.add_argument("--keep-months", type=int, default=3)
+
+    load = sub.add_parser("http", help="HTTP load test, threaded vs asyncio server")
+    load.add_argument("--seconds", type=float, default=5.0)
+    load.add_argument("--clients", type=int, default=32)
+    load.add_argument("--batch", type=int, default=20)
+    load.add_argument("--write-every", type=int, default=5, help="One upload every N requests per client")
+    load.add_argument("--seed-events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    if args.bench == "concurrent":
+        result = {
+            "per_call_rollback_journal": bench_concurrent(LegacyRepository, args),
+            "pooled_wal": bench_concurrent(EventRepository, args),
+        }
+    elif args.bench == "ingest":
+        result = bench_ingest(args)
+    elif args.bench == "storage":
+        result = bench_storage(args)
+    elif args.bench == "retention":
+        result = bench_retention(args)
+    elif args.bench == "group":
+        result = bench_group_commit(args)
+    elif args.bench == "http":
+        result = {
+            f"{mode}_{'keepalive' if keep_alive else 'close'}": bench_http(mode, keep_alive, args)
+            for mode in ("threaded", "async")
+            for keep_alive in (False, True)
+        }
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
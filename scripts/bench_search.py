@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from quizlib.search import SearchIndex, _file_postings  # noqa: E402
+
+LETTERS = "abcdefghijlmnoprstuvyzáéíóúñ"
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    return ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 11))) for _ in range(size)]
+
+
+def make_questions(count: int, vocabulary: list[str], seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    # Zipf-like word frequencies, as in real question text.
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    def sentence(words):
+        return " ".join(rng.choices(vocabulary, weights, k=words))
+
+    return [
+        {
+            "question": sentence(14),
+            "answers": [{"text": sentence(6), "correct": j == 0} for j in range(4)],
+            "explanation": sentence(20),
+            "_quiz_id": i,
+            "_quiz_source": f"quiz_data/Curso{i % 10}/file{i % 200}.json",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Full-text search index build and query latency")
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    questions = make_questions(args.questions, vocabulary, args.seed)
+
+    start = time.perf_counter()
+    by_file = {}
+    for q in questions:
+        by_file.setdefault(q["_quiz_source"], []).append(q)
+    index = SearchIndex({src: {"version": None, "postings": _file_postings(qs)}
+                         for src, qs in by_file.items()})
+    tokenize_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.vocabulary()
+    vocabulary_s = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    for _ in range(args.queries):
+        words = rng.sample(vocabulary[:2000], rng.randint(1, 3))
+        query = " ".join(w[:max(3, len(w) - 2)] if rng.random() < 0.3 else w for w in words)
+        start = time.perf_counter()
+        hits += len(index.search(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print(json.dumps({
+        "questions": args.questions,
+        "tokens": len(index.vocabulary()),
+        "tokenize_s": round(tokenize_s, 3),
+        "vocabulary_s": round(vocabulary_s, 3),
+        "queries": args.queries,
+        "avg_hits": round(hits / args.queries, 1),
+        "query_p50_ms": round(statistics.median(latencies), 3),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "query_max_ms": round(latencies[-1], 3),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
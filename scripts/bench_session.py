@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from quizlib.engine import QuizSession  # noqa: E402
+
+
+def make_questions(count: int) -> list[dict]:
+    return [
+        {
+            "question": f"Pregunta sintética {i}: ¿cuál es correcta?",
+            "answers": [
+                {"text": f"Opción {j} de la pregunta {i}", "correct": j == i % 4}
+                for j in range(4)
+            ],
+            "explanation": "La respuesta correcta es la a y no la b.",
+            "_quiz_id": i,
+            "_quiz_source": f"quiz_data/Curso{i % 5}/file{i % 20}.json",
+        }
+        for i in range(count)
+    ]
+
+
+def run_session(questions: list[dict], seed: int, exam_dates: dict) -> int:
+    rng = random.Random(seed)
+    session = QuizSession.from_questions(questions, {}, exam_dates=exam_dates, rng=rng)
+    answered = 0
+    while True:
+        view = session.next_question()
+        if view is None:
+            break
+        session.submit(rng.choice(view["options"])["letter"])
+        answered += 1
+    session.finish()
+    return answered
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless QuizSession throughput benchmark")
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    questions = make_questions(args.questions)
+    exam_dates = {f"Curso{i}": "2099-01-01" for i in range(5)}
+    totals: list[int] = []
+    lock = threading.Lock()
+
+    def worker(worker_id: int) -> None:
+        for n in range(worker_id, args.sessions, args.threads):
+            answered = run_session(questions, n, exam_dates)
+            with lock:
+                totals.append(answered)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    answers = sum(totals)
+    print(json.dumps({
+        "sessions": len(totals),
+        "threads": args.threads,
+        "answers": answers,
+        "seconds": round(elapsed, 4),
+        "answers_per_second": round(answers / elapsed, 1) if elapsed else None,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+MENU_PROMPT = "Elige opción:".encode("utf-8")
+BUDGET_MS = 50.0
+
+
+def import_ms(module: str, env: dict) -> float:
+    """Wall time of `import module` in a fresh interpreter, measured inside it."""
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print((time.perf_counter() - t) * 1000)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.strip())
+
+
+def process_ms(argv: list[str], env: dict, cwd: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *argv], env=env, cwd=cwd, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def first_menu_ms(env: dict, cwd: str) -> float:
+    """
+    Launch the interactive app with a piped stdin (so the splash prompt is
+    skipped) and time until the main menu prompt is written.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "quizlib.main"], env=env, cwd=cwd,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL)
+    seen = b""
+    while MENU_PROMPT not in seen:
+        chunk = os.read(proc.stdout.fileno(), 4096)
+        if not chunk:
+            proc.wait()
+            raise RuntimeError("quizlib.main exited before showing the menu")
+        seen += chunk
+    elapsed = (time.perf_counter() - start) * 1000
+    proc.communicate(b"0\n")
+    return elapsed
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import time and time to first menu of QuizProg")
+    parser.add_argument("folders", nargs="*", default=["quiz_data"],
+                        help="Quiz folders copied into the benchmark corpus")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("QUIZPROG_PROFILE", None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Work on a copy so the index, perf store and stats cache stay out of the repo.
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        for folder in args.folders:
+            shutil.copytree(folder, corpus / Path(folder).name)
+        env["QUIZ_DATA_FOLDER"] = str(corpus)
+
+        # Warm the quiz index and the stats cache.
+        process_ms(["-m", "quizlib.main", "due"], env, tmp)
+
+        results = {
+            "interpreter": summarize([process_ms(["-c", "pass"], env, tmp) for _ in range(args.runs)]),
+            "import_quizlib.main": summarize([import_ms("quizlib.main", env) for _ in range(args.runs)]),
+            "import_quizlib.cli": summarize([import_ms("quizlib.cli", env) for _ in range(args.runs)]),
+            "due_command": summarize([process_ms(["-m", "quizlib.main", "due"], env, tmp)
+                                      for _ in range(args.runs)]),
+            "first_menu": summarize([first_menu_ms(env, tmp) for _ in range(args.runs)]),
+        }
+
+    results["budget_ms"] = args.budget_ms
+    results["first_menu_within_budget"] = results["first_menu"]["median_ms"] <= args.budget_ms
+    print(json.dumps(results, indent=2))
+    return 0 if results["first_menu_within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import argparse
+import gc
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from quizlib.loader import discover_quiz_files, load_all_quizzes, load_json_file  # noqa: E402
+
+
+def load_as_dicts(folder: str) -> list[dict]:
+    """The pre-record layout: parsed dicts with `_quiz_source`/`_quiz_id` injected."""
+    questions = []
+    next_id = 1
+    for filepath in discover_quiz_files(folder):
+        data = load_json_file(filepath)
+        if not data:
+            continue
+        for q in data["questions"]:
+            q["_quiz_source"] = filepath
+            q["_quiz_id"] = next_id
+            next_id += 1
+            questions.append(q)
+    return questions
+
+
+def load_as_records(folder: str) -> list:
+    return load_all_quizzes(folder)[0]
+
+
+def retained_bytes(loader, folder: str) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    result = loader(folder)
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, len(result)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare retained memory of question dicts vs QuestionRecord")
+    parser.add_argument("folders", nargs="*", default=["quiz_data", "backup"])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Work on a copy so the loader's index file never lands in the corpus.
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        for folder in args.folders:
+            shutil.copytree(folder, corpus / Path(folder).name)
+
+        load_as_records(str(corpus))  # warm the index so both runs parse the same files
+        dict_bytes, dict_count = retained_bytes(load_as_dicts, str(corpus))
+        record_bytes, record_count = retained_bytes(load_as_records, str(corpus))
+
+    print(json.dumps({
+        "questions": record_count,
+        "dict_bytes": dict_bytes,
+        "record_bytes": record_bytes,
+        "dict_bytes_per_question": round(dict_bytes / max(dict_count, 1), 1),
+        "record_bytes_per_question": round(record_bytes / max(record_count, 1), 1),
+        "saved_pct": round((1 - record_bytes / dict_bytes) * 100, 1) if dict_bytes else None,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
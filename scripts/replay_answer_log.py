@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from quizlib.engine import record_answer  # noqa: E402
+from quizlib.performance import save_performance_data  # noqa: E402
+
+ANSWER_EVENTS = {"question_answered", "question_skipped"}
+
+
+def open_stream(source: str):
+    if source == "-":
+        return sys.stdin
+    if source.startswith(("http://", "https://")):
+        response = urllib.request.urlopen(source)
+        return (line.decode("utf-8") for line in response)
+    return open(source, encoding="utf-8")
+
+
+def event_result(event: dict) -> str:
+    if event["event_type"] == "question_skipped":
+        return "skipped"
+    return "correct" if event.get("result") == "correct" else "wrong"
+
+
+def event_day(event: dict) -> date | None:
+    try:
+        return datetime.fromisoformat(event["occurred_at"]).date()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded /api/export.jsonl answer stream through SM-2 scheduling and perf saving"
+    )
+    parser.add_argument("source", help="JSONL file, '-' for stdin, or an http(s) export URL")
+    parser.add_argument(
+        "--exam-dates",
+        default=str(Path("quiz_data") / "exam_dates.json"),
+        help="exam_dates.json used for the interval cap",
+    )
+    parser.add_argument("--perf-file", help="Performance store to write (default: a temporary file)")
+    parser.add_argument("--save-every", type=int, default=1, help="Save the perf store every N answers (0 = only at the end)")
+    args = parser.parse_args()
+
+    exam_dates = {}
+    if os.path.exists(args.exam_dates):
+        with open(args.exam_dates, encoding="utf-8") as f:
+            exam_dates = json.load(f)
+
+    tmpdir = None
+    perf_file = args.perf_file
+    if not perf_file:
+        tmpdir = tempfile.TemporaryDirectory()
+        perf_file = os.path.join(tmpdir.name, "quiz_performance.json")
+
+    perf_data: dict = {}
+    latencies: list[float] = []
+    lines = ignored = invalid = answered = 0
+
+    start = time.perf_counter()
+    for line in open_stream(args.source):
+        line = line.strip()
+        if not line:
+            continue
+        lines += 1
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            invalid += 1
+            continue
+        if event.get("event_type") not in ANSWER_EVENTS or not event.get("question_id"):
+            ignored += 1
+            continue
+
+        t0 = time.perf_counter()
+        record_answer(
+            perf_data,
+            event["question_id"],
+            event_result(event),
+            event.get("course_key"),
+            exam_dates,
+            event_day(event),
+        )
+        answered += 1
+        if args.save_every and answered % args.save_every == 0:
+            save_performance_data(perf_data, perf_file)
+        latencies.append(time.perf_counter() - t0)
+    save_performance_data(perf_data, perf_file)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    report = {
+        "lines": lines,
+        "answers": len(latencies),
+        "ignored_events": ignored,
+        "invalid_lines": invalid,
+        "questions": len(perf_data),
+        "seconds": round(elapsed, 4),
+        "answers_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 4),
+            "p95": round(percentile(latencies, 95) * 1000, 4),
+            "p99": round(percentile(latencies, 99) * 1000, 4),
+            "max": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        },
+        "perf_store_bytes": os.path.getsize(perf_file),
+    }
+    print(json.dumps(report, indent=2))
+    if tmpdir:
+        tmpdir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,20 +3,35 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import base64
+import io
 import json
 import os
+import queue
+import re
+import signal
 import sqlite3
+import threading
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from email.utils import formatdate
 from http import HTTPStatus
+from http.client import parse_headers
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any
-from urllib.parse import parse_qs, urlparse
+from typing import Any, Callable, Iterator
+from urllib.parse import parse_qs, urlencode, urlparse
 
 
-SCHEMA_SQL = """
-CREATE TABLE IF NOT EXISTS events (
+# metadata_json and payload_json are filled in "full" storage; "compact"
+# rows leave them NULL and keep only what the columns cannot hold in extra.
+EVENTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {name} (
     event_id TEXT PRIMARY KEY,
     occurred_at TEXT NOT NULL,
     received_at TEXT NOT NULL,
@@ -33,17 +48,443 @@ CREATE TABLE IF NOT EXISTS events (
     result TEXT,
     app_version TEXT,
     build_number TEXT,
-    metadata_json TEXT NOT NULL,
-    payload_json TEXT NOT NULL
+    metadata_json TEXT,
+    payload_json TEXT,
+    extra BLOB
 );
-CREATE INDEX IF NOT EXISTS idx_events_received_at ON events(received_at);
-CREATE INDEX IF NOT EXISTS idx_events_occurred_at ON events(occurred_at);
-CREATE INDEX IF NOT EXISTS idx_events_course_key ON events(course_key);
-CREATE INDEX IF NOT EXISTS idx_events_event_type ON events(event_type);
-CREATE INDEX IF NOT EXISTS idx_events_session_id ON events(session_id);
-CREATE INDEX IF NOT EXISTS idx_events_device_id ON events(device_id);
 """
 
+# Events live in one table per month of occurred_at (events_YYYY_MM, plus
+# events_undated for timestamps without a year-month prefix). The events
+# view UNION ALLs them; SQLite merges the per-partition index scans, so
+# ordered and keyset reads through the view stay index-driven.
+PARTITION_PREFIX = "events_"
+UNDATED_PARTITION = "events_undated"
+
+# Merge of one session's values into its existing row, with the MIN/MAX/SUM
+# semantics of aggregating its events (MAX ignores NULLs).
+SESSION_MERGE_SQL = """
+    ON CONFLICT (session_id) DO UPDATE SET
+        started_at = min(started_at, excluded.started_at),
+        ended_at = max(ended_at, excluded.ended_at),
+        device_id = max(coalesce(device_id, excluded.device_id), coalesce(excluded.device_id, device_id)),
+        course_key = max(coalesce(course_key, excluded.course_key), coalesce(excluded.course_key, course_key)),
+        filter_mode = max(coalesce(filter_mode, excluded.filter_mode), coalesce(excluded.filter_mode, filter_mode)),
+        scope = max(coalesce(scope, excluded.scope), coalesce(excluded.scope, scope)),
+        answered_events = answered_events + excluded.answered_events,
+        skipped_events = skipped_events + excluded.skipped_events
+"""
+
+# Same for one (question, device) pair of question_learner_rollups.
+QUESTION_LEARNER_MERGE_SQL = """
+    ON CONFLICT (question_id, device_id) DO UPDATE SET
+        course_key = max(coalesce(course_key, excluded.course_key), coalesce(excluded.course_key, course_key)),
+        events = events + excluded.events,
+        answered = answered + excluded.answered,
+        correct = correct + excluded.correct,
+        skipped = skipped + excluded.skipped,
+        first_at = min(first_at, excluded.first_at),
+        last_at = max(last_at, excluded.last_at)
+"""
+
+QUESTION_LEARNER_COLUMNS = """
+    question_id, device_id, course_key, events, answered, correct, skipped, first_at, last_at
+"""
+
+QUESTION_LEARNER_AGGREGATE_SQL = """
+    SELECT
+        question_id,
+        device_id,
+        MAX(course_key),
+        COUNT(*),
+        SUM(event_type = 'question_answered'),
+        SUM(event_type = 'question_answered' AND result IS 'correct'),
+        SUM(event_type = 'question_skipped'),
+        MIN(occurred_at),
+        MAX(occurred_at)
+    FROM {source}
+    WHERE question_id IS NOT NULL
+    GROUP BY question_id, device_id
+"""
+
+SESSION_COLUMNS = """
+    session_id, started_at, ended_at, device_id, course_key, filter_mode, scope,
+    answered_events, skipped_events
+"""
+
+SESSION_AGGREGATE_SQL = """
+    SELECT
+        session_id,
+        MIN(occurred_at),
+        MAX(occurred_at),
+        MAX(device_id),
+        MAX(course_key),
+        MAX(filter_mode),
+        MAX(scope),
+        SUM(CASE WHEN event_type = 'question_answered' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN event_type = 'question_skipped' THEN 1 ELSE 0 END)
+    FROM {source}
+    WHERE true
+    GROUP BY session_id
+"""
+
+
+def partition_ddl(name: str) -> tuple[str, ...]:
+    """Statements creating one partition table and its indexes."""
+    return (
+        EVENTS_TABLE_SQL.format(name=name),
+        f"CREATE INDEX IF NOT EXISTS idx_{name}_occurred ON {name}(occurred_at)",
+        # Keyset pages: each filter column followed by the (received_at, event_id) order.
+        f"CREATE INDEX IF NOT EXISTS idx_{name}_received ON {name}(received_at, event_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_{name}_course ON {name}(course_key, received_at, event_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_{name}_type ON {name}(event_type, received_at, event_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_{name}_device ON {name}(device_id, received_at, event_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_{name}_session ON {name}(session_id, received_at, event_id)",
+    )
+
+
+def partition_trigger_ddl(name: str) -> str:
+    # Rollups are kept current in the inserting transaction. Only rows
+    # actually inserted fire the trigger, so deduplicated events never count.
+    return f"""
+CREATE TRIGGER IF NOT EXISTS trg_{name}_rollups AFTER INSERT ON {name}
+BEGIN
+    -- Question counters first: a learner is new while its pair row has no answer yet.
+    INSERT INTO question_rollups (
+        question_id, course_key, events, answered, correct, skipped, learners, first_at, last_at
+    )
+        SELECT
+            NEW.question_id, NEW.course_key, 1,
+            NEW.event_type = 'question_answered',
+            NEW.event_type = 'question_answered' AND NEW.result IS 'correct',
+            NEW.event_type = 'question_skipped',
+            NEW.event_type = 'question_answered' AND NOT EXISTS (
+                SELECT 1 FROM question_learner_rollups
+                WHERE question_id = NEW.question_id AND device_id = NEW.device_id AND answered > 0
+            ),
+            NEW.occurred_at, NEW.occurred_at
+        WHERE NEW.question_id IS NOT NULL
+        ON CONFLICT (question_id) DO UPDATE SET
+            course_key = max(coalesce(course_key, excluded.course_key), coalesce(excluded.course_key, course_key)),
+            events = events + 1,
+            answered = answered + excluded.answered,
+            correct = correct + excluded.correct,
+            skipped = skipped + excluded.skipped,
+            learners = learners + excluded.learners,
+            first_at = min(first_at, excluded.first_at),
+            last_at = max(last_at, excluded.last_at);
+    INSERT INTO question_learner_rollups ({QUESTION_LEARNER_COLUMNS})
+        SELECT
+            NEW.question_id, NEW.device_id, NEW.course_key, 1,
+            NEW.event_type = 'question_answered',
+            NEW.event_type = 'question_answered' AND NEW.result IS 'correct',
+            NEW.event_type = 'question_skipped',
+            NEW.occurred_at, NEW.occurred_at
+        WHERE NEW.question_id IS NOT NULL
+        {QUESTION_LEARNER_MERGE_SQL};
+    INSERT INTO learner_rollups (device_id, answered, correct)
+        SELECT NEW.device_id, 1, NEW.result IS 'correct'
+        WHERE NEW.event_type = 'question_answered' AND NEW.question_id IS NOT NULL
+        ON CONFLICT (device_id) DO UPDATE SET
+            answered = answered + 1,
+            correct = correct + excluded.correct;
+    INSERT INTO event_type_rollups (event_type, count) VALUES (NEW.event_type, 1)
+        ON CONFLICT (event_type) DO UPDATE SET count = count + 1;
+    INSERT INTO course_rollups (course_key, count) VALUES (coalesce(NEW.course_key, ''), 1)
+        ON CONFLICT (course_key) DO UPDATE SET count = count + 1;
+    INSERT INTO session_rollups ({SESSION_COLUMNS}) VALUES (
+        NEW.session_id, NEW.occurred_at, NEW.occurred_at, NEW.device_id, NEW.course_key,
+        NEW.filter_mode, NEW.scope,
+        NEW.event_type = 'question_answered', NEW.event_type = 'question_skipped'
+    )
+    {SESSION_MERGE_SQL};
+END
+"""
+
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS server_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+-- Indexes of the single events table, before the composite and partition ones.
+DROP INDEX IF EXISTS idx_events_received_at;
+DROP INDEX IF EXISTS idx_events_course_key;
+DROP INDEX IF EXISTS idx_events_event_type;
+DROP INDEX IF EXISTS idx_events_session_id;
+DROP INDEX IF EXISTS idx_events_device_id;
+
+CREATE TABLE IF NOT EXISTS event_type_rollups (
+    event_type TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS course_rollups (
+    course_key TEXT PRIMARY KEY,  -- '' for events without a course
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_rollups (
+    session_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    ended_at TEXT NOT NULL,
+    device_id TEXT,
+    course_key TEXT,
+    filter_mode TEXT,
+    scope TEXT,
+    answered_events INTEGER NOT NULL,
+    skipped_events INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_session_rollups_ended ON session_rollups(ended_at, session_id);
+
+-- What retention folded out of dropped partitions; rollups are rebuilt
+-- from these plus the remaining events.
+CREATE TABLE IF NOT EXISTS archive_event_types (
+    event_type TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_courses (
+    course_key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_sessions (
+    session_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    ended_at TEXT NOT NULL,
+    device_id TEXT,
+    course_key TEXT,
+    filter_mode TEXT,
+    scope TEXT,
+    answered_events INTEGER NOT NULL,
+    skipped_events INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_question_learners (
+    question_id TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    course_key TEXT,
+    events INTEGER NOT NULL,
+    answered INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    skipped INTEGER NOT NULL,
+    first_at TEXT NOT NULL,
+    last_at TEXT NOT NULL,
+    PRIMARY KEY (question_id, device_id)
+) WITHOUT ROWID;
+
+-- Item analysis: counters per question, per (question, device) pair and
+-- per device (the learner), for every answer with a question_id.
+CREATE TABLE IF NOT EXISTS question_rollups (
+    question_id TEXT PRIMARY KEY,
+    course_key TEXT,
+    events INTEGER NOT NULL,
+    answered INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    skipped INTEGER NOT NULL,
+    learners INTEGER NOT NULL,  -- devices that answered it at least once
+    first_at TEXT NOT NULL,
+    last_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS question_learner_rollups (
+    question_id TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    course_key TEXT,
+    events INTEGER NOT NULL,
+    answered INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    skipped INTEGER NOT NULL,
+    first_at TEXT NOT NULL,
+    last_at TEXT NOT NULL,
+    PRIMARY KEY (question_id, device_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS learner_rollups (
+    device_id TEXT PRIMARY KEY,
+    answered INTEGER NOT NULL,
+    correct INTEGER NOT NULL
+);
+"""
+
+REBUILD_ROLLUPS_SQL = (
+    "DELETE FROM event_type_rollups",
+    "DELETE FROM course_rollups",
+    "DELETE FROM session_rollups",
+    "INSERT INTO event_type_rollups (event_type, count) SELECT event_type, count FROM archive_event_types",
+    "INSERT INTO course_rollups (course_key, count) SELECT course_key, count FROM archive_courses",
+    f"INSERT INTO session_rollups ({SESSION_COLUMNS}) SELECT {SESSION_COLUMNS} FROM archive_sessions",
+    """
+    INSERT INTO event_type_rollups (event_type, count)
+        SELECT event_type, COUNT(*) FROM events WHERE true GROUP BY event_type
+        ON CONFLICT (event_type) DO UPDATE SET count = count + excluded.count
+    """,
+    """
+    INSERT INTO course_rollups (course_key, count)
+        SELECT coalesce(course_key, ''), COUNT(*) FROM events WHERE true GROUP BY coalesce(course_key, '')
+        ON CONFLICT (course_key) DO UPDATE SET count = count + excluded.count
+    """,
+    f"INSERT INTO session_rollups ({SESSION_COLUMNS}) {SESSION_AGGREGATE_SQL.format(source='events')} {SESSION_MERGE_SQL}",
+    # Question counters: pairs from the archive plus live events, then per question and per device.
+    "DELETE FROM question_learner_rollups",
+    "DELETE FROM question_rollups",
+    "DELETE FROM learner_rollups",
+    f"""
+    INSERT INTO question_learner_rollups ({QUESTION_LEARNER_COLUMNS})
+        SELECT {QUESTION_LEARNER_COLUMNS} FROM archive_question_learners
+    """,
+    f"""
+    INSERT INTO question_learner_rollups ({QUESTION_LEARNER_COLUMNS})
+        {QUESTION_LEARNER_AGGREGATE_SQL.format(source='events')}
+        {QUESTION_LEARNER_MERGE_SQL}
+    """,
+    """
+    INSERT INTO question_rollups (
+        question_id, course_key, events, answered, correct, skipped, learners, first_at, last_at
+    )
+        SELECT
+            question_id, MAX(course_key), SUM(events), SUM(answered), SUM(correct), SUM(skipped),
+            SUM(answered > 0), MIN(first_at), MAX(last_at)
+        FROM question_learner_rollups
+        GROUP BY question_id
+    """,
+    """
+    INSERT INTO learner_rollups (device_id, answered, correct)
+        SELECT device_id, SUM(answered), SUM(correct)
+        FROM question_learner_rollups
+        GROUP BY device_id
+        HAVING SUM(answered) > 0
+    """,
+)
+
+
+def fold_partition_sql(name: str) -> tuple[str, ...]:
+    """Statements adding one partition's events to the archive tables."""
+    return (
+        f"""
+        INSERT INTO archive_event_types (event_type, count)
+            SELECT event_type, COUNT(*) FROM {name} WHERE true GROUP BY event_type
+            ON CONFLICT (event_type) DO UPDATE SET count = count + excluded.count
+        """,
+        f"""
+        INSERT INTO archive_courses (course_key, count)
+            SELECT coalesce(course_key, ''), COUNT(*) FROM {name} WHERE true GROUP BY coalesce(course_key, '')
+            ON CONFLICT (course_key) DO UPDATE SET count = count + excluded.count
+        """,
+        f"INSERT INTO archive_sessions ({SESSION_COLUMNS}) {SESSION_AGGREGATE_SQL.format(source=name)} {SESSION_MERGE_SQL}",
+        f"""
+        INSERT INTO archive_question_learners ({QUESTION_LEARNER_COLUMNS})
+            {QUESTION_LEARNER_AGGREGATE_SQL.format(source=name)}
+            {QUESTION_LEARNER_MERGE_SQL}
+        """,
+    )
+
+
+_MONTH_RE = re.compile(r"([0-9]{4})-([0-9]{2})")
+_PARTITION_RE = re.compile(r"events_[0-9]{4}_[0-9]{2}|events_undated")
+
+
+def partition_for(occurred_at: str) -> str:
+    """Partition table of an event: events_YYYY_MM from its occurred_at."""
+    match = _MONTH_RE.match(occurred_at)
+    if match is None:
+        return UNDATED_PARTITION
+    return f"{PARTITION_PREFIX}{match.group(1)}_{match.group(2)}"
+
+
+def partition_condition(name: str) -> str:
+    """WHERE condition selecting the events of one partition from an unpartitioned table."""
+    if name == UNDATED_PARTITION:
+        return "NOT occurred_at GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*'"
+    year, month = name[len(PARTITION_PREFIX):].split("_")
+    return f"occurred_at GLOB '{year}-{month}*'"
+
+
+# Applied to every pooled connection. WAL lets dashboard reads run while a
+# batch is being written; synchronous=NORMAL is durable across application
+# crashes in WAL mode and skips the fsync per commit.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+POOL_SIZE = 8
+
+INSERT_EVENT_SQL = """
+INSERT OR IGNORE INTO {table} (
+    event_id, occurred_at, received_at, session_id, device_id, question_id,
+    course_key, source_path, filter_mode, scope, event_type, selected_index,
+    correct_index, result, app_version, build_number, metadata_json, payload_json
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_COMPACT_EVENT_SQL = """
+INSERT OR IGNORE INTO {table} (
+    event_id, occurred_at, received_at, session_id, device_id, question_id,
+    course_key, source_path, filter_mode, scope, event_type, selected_index,
+    correct_index, result, app_version, build_number, extra
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Event fields stored in their own column, with the type that reads back unchanged.
+PROMOTED_FIELDS = (
+    ("event_id", str),
+    ("occurred_at", str),
+    ("session_id", str),
+    ("device_id", str),
+    ("question_id", str),
+    ("course_key", str),
+    ("source_path", str),
+    ("filter_mode", str),
+    ("scope", str),
+    ("event_type", str),
+    ("selected_index", int),
+    ("correct_index", int),
+    ("result", str),
+    ("app_version", str),
+    ("build_number", str),
+)
+PROMOTED_ORDER = tuple(name for name, _ in PROMOTED_FIELDS)
+# Promoted columns hold SQLite integers, which are 64-bit.
+SQLITE_INT_MIN, SQLITE_INT_MAX = -(2**63), 2**63 - 1
+PROMOTED_NAMES = frozenset(PROMOTED_ORDER)
+EVENT_COLUMNS = ", ".join(("received_at", "payload_json", "extra") + PROMOTED_ORDER)
+STORAGE_MODES = ("full", "compact", "compact-zlib")
+# Sort keys of /api/questions; rates of questions never answered sort as -1.
+QUESTION_SORTS = {
+    "answered": "answered",
+    "learners": "learners",
+    "correct_rate": "coalesce(correct * 1.0 / nullif(answered, 0), -1)",
+    "skip_rate": "coalesce(skipped * 1.0 / nullif(answered + skipped, 0), -1)",
+    "mean_attempts": "coalesce(answered * 1.0 / nullif(learners, 0), -1)",
+    "last_at": "last_at",
+    "question_id": "question_id",
+}
+DISCRIMINATION_MIN_LEARNERS = 5
+# Bumped whenever the rollup tables or the partition trigger change.
+ROLLUPS_VERSION = "2"
+
+INGEST_MAX_COMMIT_EVENTS = 20_000
+RESPONSE_CACHE_SIZE = 256
+STREAM_QUEUE_SIZE = 256
+STREAM_HEARTBEAT_SECONDS = 15.0
+STREAM_MAX_EVENTS = 100
+# X-Accel-Buffering: keeps a reverse proxy (nginx) from holding the stream back.
+STREAM_HEADERS = (
+    ("Content-Type", "text/event-stream; charset=utf-8"),
+    ("Cache-Control", "no-cache"),
+    ("X-Accel-Buffering", "no"),
+)
+# Read endpoints answered with an ETag and kept in the response cache.
+CACHED_PATHS = frozenset({"/api/summary", "/api/events", "/api/sessions", "/api/questions"})
+EXPORT_FETCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+MAX_BODY_BYTES = 32 * 1024 * 1024
+# A request body is read in pieces; only a pause this long between two of them times out.
+BODY_READ_TIMEOUT_SECONDS = 30.0
+BODY_READ_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+MAX_HEADERS = 100
+
+# json.dumps builds a new encoder whenever options are passed; reuse one.
+encode_json = json.JSONEncoder(ensure_ascii=False, sort_keys=True).encode
+
 
 @dataclass
 class ServerConfig:
@@ -51,85 +492,407 @@ class ServerConfig:
     api_key: str | None = None
 
 
+class ConnectionPool:
+    """Reusable SQLite connections shared by the request threads."""
+
+    def __init__(self, database_path: Path, size: int = POOL_SIZE):
+        self.database_path = database_path
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.database_path, timeout=5.0, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            connection.execute(pragma)
+        return connection
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._idle.put_nowait(connection)
+                    return
+                except queue.Full:
+                    pass
+        connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
 class EventRepository:
     def __init__(self, database_path: Path):
         self.database_path = database_path
         self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = ConnectionPool(self.database_path)
+        self._commit_lock = threading.Lock()
+        self._listeners: list[Callable[[list[dict[str, Any]]], None]] = []
         self._initialize()
 
-    def _connect(self) -> sqlite3.Connection:
-        connection = sqlite3.connect(self.database_path)
-        connection.row_factory = sqlite3.Row
-        return connection
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A pooled connection inside a transaction (committed on success)."""
+        connection = self._pool.acquire()
+        try:
+            with connection:
+                yield connection
+        finally:
+            self._pool.release(connection)
 
     def _initialize(self) -> None:
         with self._connect() as connection:
+            # journal_mode is stored in the database file, so once is enough.
+            connection.execute("PRAGMA journal_mode = WAL")
             connection.executescript(SCHEMA_SQL)
+            kind = connection.execute("SELECT type FROM sqlite_master WHERE name = 'events'").fetchone()
+            if kind is not None and kind["type"] == "table":
+                columns = {row["name"] for row in connection.execute("PRAGMA table_info(events)")}
+                if "extra" not in columns:
+                    # Databases from before compact storage; the column is metadata-only to add.
+                    connection.execute("ALTER TABLE events ADD COLUMN extra BLOB")
+                self._partition_legacy(connection)
+            elif kind is None:
+                connection.execute("BEGIN IMMEDIATE")
+                self._create_partition(connection, UNDATED_PARTITION)
+                self._create_view(connection, [UNDATED_PARTITION])
+            self._partitions = set(self._existing_partitions(connection))
+            meta = dict(connection.execute("SELECT key, value FROM server_meta").fetchall())
+            self.storage = meta.get("storage", "full")
+            # Partitions below this one were dropped by retention; late uploads for them are ignored.
+            self.retained_from = meta.get("retained_from")
+            outdated = meta.get("rollups_version") != ROLLUPS_VERSION
+            if outdated:
+                # Triggers written for older rollup tables: replace them, then rebuild below.
+                if not connection.in_transaction:
+                    connection.execute("BEGIN IMMEDIATE")
+                for name in sorted(self._partitions):
+                    connection.execute(f"DROP TRIGGER IF EXISTS trg_{name}_rollups")
+                    connection.execute(partition_trigger_ddl(name))
+                connection.execute(
+                    "INSERT INTO server_meta (key, value) VALUES ('rollups_version', ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                    (ROLLUPS_VERSION,),
+                )
+            self._schema_version = connection.execute("PRAGMA schema_version").fetchone()[0]
+            # Databases created before the rollups existed (or before some of them): fill them once.
+            has_events = connection.execute("SELECT EXISTS (SELECT 1 FROM events)").fetchone()[0]
+            has_rollups = connection.execute("SELECT EXISTS (SELECT 1 FROM event_type_rollups)").fetchone()[0]
+        if has_events and (outdated or not has_rollups):
+            self.rebuild_rollups()
 
-    def insert_events(self, events: list[dict[str, Any]], received_at: str) -> tuple[int, int]:
-        inserted = 0
-        deduplicated = 0
+    def data_version(self) -> int:
+        """
+        Number that grows whenever stored data may have changed: a counter in
+        server_meta that every writing transaction bumps, so it survives
+        restarts and also moves for writes from another process.
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM server_meta WHERE key = 'data_version'").fetchone()
+        return int(row["value"]) if row else 0
+
+    @staticmethod
+    def _changed(connection: sqlite3.Connection) -> None:
+        """Bump the data version inside the caller's write transaction."""
+        connection.execute(
+            "INSERT INTO server_meta (key, value) VALUES ('data_version', '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    @staticmethod
+    def _existing_partitions(connection: sqlite3.Connection) -> list[str]:
+        names = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'events_*'")
+        return sorted(row["name"] for row in names if _PARTITION_RE.fullmatch(row["name"]))
+
+    @staticmethod
+    def _create_partition(connection: sqlite3.Connection, name: str) -> None:
+        # Statement by statement: executescript would commit the open transaction.
+        for statement in partition_ddl(name):
+            connection.execute(statement)
+        connection.execute(partition_trigger_ddl(name))
+
+    @staticmethod
+    def _create_view(connection: sqlite3.Connection, partitions: list[str]) -> None:
+        connection.execute("DROP VIEW IF EXISTS events")
+        arms = " UNION ALL ".join(f"SELECT * FROM {name}" for name in sorted(partitions))
+        connection.execute(f"CREATE VIEW events AS {arms}")
+
+    def _partition_legacy(self, connection: sqlite3.Connection) -> None:
+        """Split the single events table of older databases into monthly partitions."""
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DROP TRIGGER IF EXISTS trg_events_rollups")
+        connection.execute("ALTER TABLE events RENAME TO events_unpartitioned")
+        columns = ", ".join(row["name"] for row in connection.execute("PRAGMA table_info(events_unpartitioned)"))
+        months = connection.execute("SELECT DISTINCT substr(occurred_at, 1, 7) FROM events_unpartitioned")
+        partitions = sorted({partition_for(row[0]) for row in months} | {UNDATED_PARTITION})
+        for name in partitions:
+            # Indexes and the trigger after the copy: cheaper, and the rollups already count these rows.
+            connection.execute(EVENTS_TABLE_SQL.format(name=name))
+            connection.execute(
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM events_unpartitioned "
+                f"WHERE {partition_condition(name)}"
+            )
+            self._create_partition(connection, name)
+        connection.execute("DROP TABLE events_unpartitioned")
+        self._create_view(connection, partitions)
+
+    def _refresh_schema(self, connection: sqlite3.Connection) -> None:
+        """
+        Reload the partition list and retention cutoff when another process
+        (a cron retention run) changed the schema since we last looked.
+        """
+        version = connection.execute("PRAGMA schema_version").fetchone()[0]
+        if version == self._schema_version:
+            return
+        self._partitions = set(self._existing_partitions(connection))
+        row = connection.execute("SELECT value FROM server_meta WHERE key = 'retained_from'").fetchone()
+        self.retained_from = row["value"] if row else None
+        self._schema_version = version
+
+    def _ensure_partitions(self, connection: sqlite3.Connection, names: set[str]) -> None:
+        """Create the missing partitions in the caller's write transaction."""
+        if names <= self._partitions:
+            return
+        existing = set(self._existing_partitions(connection))
+        missing = names - existing
+        for name in sorted(missing):
+            self._create_partition(connection, name)
+        if missing:
+            self._create_view(connection, sorted(existing | missing))
+
+    def rebuild_rollups(self) -> None:
+        """Recompute every rollup table from the archive tables and the remaining events, in one transaction."""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            for statement in REBUILD_ROLLUPS_SQL:
+                connection.execute(statement)
+            self._changed(connection)
+
+    def apply_retention(self, keep_months: int, today: datetime | None = None) -> list[str]:
+        """
+        Drop the monthly partitions older than the last keep_months months
+        (the current one included), after folding them into the archive
+        tables, all in one transaction. Dropping a table frees its pages for
+        reuse without a per-row DELETE or a VACUUM. Rollups do not change:
+        they keep counting purged events. Returns the dropped partitions.
+        """
+        if keep_months < 1:
+            raise ValueError("keep_months must be at least 1")
+        today = today or datetime.now(timezone.utc)
+        months = today.year * 12 + today.month - 1 - (keep_months - 1)
+        cutoff = f"{PARTITION_PREFIX}{months // 12:04d}_{months % 12 + 1:02d}"
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            partitions = self._existing_partitions(connection)
+            expired = [name for name in partitions if name < cutoff]
+            if expired:
+                connection.execute("DROP VIEW events")
+                for name in expired:
+                    for statement in fold_partition_sql(name):
+                        connection.execute(statement)
+                    connection.execute(f"DROP TABLE {name}")
+                self._create_view(connection, [name for name in partitions if name >= cutoff])
+            if self.retained_from is None or cutoff > self.retained_from:
+                connection.execute(
+                    "INSERT INTO server_meta (key, value) VALUES ('retained_from', ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                    (cutoff,),
+                )
+                self.retained_from = cutoff
+            remaining = self._existing_partitions(connection)
+            self._changed(connection)
+        self._partitions = set(remaining)
+        return expired
+
+    def migrate_storage(self, storage: str) -> int:
+        """
+        Rewrite every event in the given storage mode ("full", "compact" or
+        "compact-zlib"), one partition at a time into a fresh table that is
+        swapped in, then VACUUM to give the space back. Meant to run with the
+        server stopped; returns the row count.
+        """
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage}")
+        compress = storage == "compact-zlib"
+        insert_sql = (INSERT_EVENT_SQL if storage == "full" else INSERT_COMPACT_EVENT_SQL).format(table="events_migrated")
+        migrated = 0
         with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            partitions = self._existing_partitions(connection)
+            # A view over a dropped table would make the renames below fail.
+            connection.execute("DROP VIEW events")
+            for name in partitions:
+                connection.execute("DROP TABLE IF EXISTS events_migrated")
+                connection.execute(EVENTS_TABLE_SQL.format(name="events_migrated"))
+                cursor = connection.execute(f"SELECT {EVENT_COLUMNS} FROM {name} ORDER BY rowid")
+                while True:
+                    rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    converted = []
+                    for row in rows:
+                        event = event_payload(row)
+                        if storage == "full":
+                            converted.append(event_row(event, row["received_at"]))
+                        else:
+                            converted.append(compact_event_row(event, row["received_at"], compress))
+                    connection.executemany(insert_sql, converted)
+                    migrated += len(converted)
+                # Indexes and the rollup trigger go with the old table and are
+                # recreated after the copy; the rollups themselves do not change.
+                connection.execute(f"DROP TABLE {name}")
+                connection.execute(f"ALTER TABLE events_migrated RENAME TO {name}")
+                self._create_partition(connection, name)
+            self._create_view(connection, partitions)
+            connection.execute(
+                "INSERT INTO server_meta (key, value) VALUES ('storage', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (storage,),
+            )
+            self._changed(connection)
+        self._pool.close()
+        self._pool = ConnectionPool(self.database_path)
+        vacuum = sqlite3.connect(self.database_path)
+        try:
+            vacuum.execute("VACUUM")
+        finally:
+            vacuum.close()
+        self.storage = storage
+        return migrated
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def insert_events(self, events: list[dict[str, Any]], received_at: str) -> tuple[int, int]:
+        """
+        Insert a batch in one transaction. Rows are serialized up front and
+        written with one executemany per partition; duplicates (already
+        stored or repeated in the batch) are ignored. The cursor's rowcount
+        sums sqlite3_changes() per row, which leaves out the rollup trigger's writes.
+        """
+        return self.insert_batches([(events, received_at)])[0]
+
+    def insert_batches(self, batches: list[tuple[list[dict[str, Any]], str]]) -> list[tuple[int, int]]:
+        """
+        Insert several uploads in a single transaction (group commit) and
+        return (inserted, deduplicated) for each of them. Events of months
+        already purged by retention count as deduplicated.
+        """
+        if self.storage == "full":
+            sql, make_row = INSERT_EVENT_SQL, event_row
+        else:
+            sql = INSERT_COMPACT_EVENT_SQL
+            compress = self.storage == "compact-zlib"
+
+            def make_row(event: dict[str, Any], received_at: str) -> tuple[Any, ...]:
+                return compact_event_row(event, received_at, compress)
+
+        prepared: list[tuple[dict[str, list[tuple[Any, ...]]], list[dict[str, Any]], str]] = []
+        for events, received_at in batches:
+            by_partition: dict[str, list[tuple[Any, ...]]] = {}
             for event in events:
-                payload = json.dumps(event, ensure_ascii=False, sort_keys=True)
-                metadata = json.dumps(event.get("metadata", {}), ensure_ascii=False, sort_keys=True)
-                cursor = connection.execute(
-                    """
-                    INSERT OR IGNORE INTO events (
-                        event_id, occurred_at, received_at, session_id, device_id, question_id,
-                        course_key, source_path, filter_mode, scope, event_type, selected_index,
-                        correct_index, result, app_version, build_number, metadata_json, payload_json
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        event["event_id"],
-                        event["occurred_at"],
-                        received_at,
-                        event["session_id"],
-                        event["device_id"],
-                        event.get("question_id"),
-                        event.get("course_key"),
-                        event.get("source_path"),
-                        event.get("filter_mode"),
-                        event.get("scope"),
-                        event["event_type"],
-                        event.get("selected_index"),
-                        event.get("correct_index"),
-                        event.get("result"),
-                        event.get("app_version"),
-                        event.get("build_number"),
-                        metadata,
-                        payload,
-                    ),
+                by_partition.setdefault(partition_for(event["occurred_at"]), []).append(make_row(event, received_at))
+            prepared.append((by_partition, events, received_at))
+
+        counts = []
+        stored: list[dict[str, Any]] = []
+        # Held until the listeners have seen the commit, so a snapshot taken
+        # under hold_commits() is never counted again by a later notification.
+        with self._commit_lock:
+            with self._connect() as connection:
+                connection.execute("BEGIN IMMEDIATE")
+                self._refresh_schema(connection)
+                needed = {name for by_partition, _, _ in prepared for name in by_partition}
+                if self.retained_from is not None:
+                    needed = {name for name in needed if name >= self.retained_from}
+                self._ensure_partitions(connection, needed)
+                for by_partition, events, received_at in prepared:
+                    inserted = 0
+                    for name, rows in by_partition.items():
+                        if name in needed:
+                            inserted += connection.executemany(sql.format(table=name), rows).rowcount
+                    counts.append((inserted, len(events) - inserted))
+                    if self._listeners and inserted:
+                        stored.extend(self._stored_events(connection, events, received_at, inserted))
+                if any(inserted for inserted, _ in counts):
+                    self._changed(connection)
+            self._partitions |= needed
+            if stored:
+                for listener in self._listeners:
+                    listener(stored)
+        return counts
+
+    def _stored_events(
+        self, connection: sqlite3.Connection, events: list[dict[str, Any]], received_at: str, inserted: int
+    ) -> list[dict[str, Any]]:
+        """The events of one upload that were actually inserted, as /api/events returns them."""
+        if inserted < len(events):
+            # Mixed upload: ask which IDs carry this upload's received_at.
+            ids: set[str] = set()
+            wanted = [event["event_id"] for event in events]
+            for start in range(0, len(wanted), 500):
+                chunk = wanted[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                ids.update(
+                    row[0] for row in connection.execute(
+                        f"SELECT event_id FROM events WHERE received_at = ? AND event_id IN ({placeholders})",
+                        [received_at, *chunk],
+                    )
                 )
-                if cursor.rowcount == 1:
-                    inserted += 1
-                else:
-                    deduplicated += 1
-        return inserted, deduplicated
+        stored = []
+        for event in events:
+            if inserted < len(events):
+                if event["event_id"] not in ids:
+                    continue
+                ids.discard(event["event_id"])  # the first copy in the upload is the stored one
+            stored.append({**event, "server_received_at": received_at})
+        return stored
+
+    def add_listener(self, listener: Callable[[list[dict[str, Any]]], None]) -> None:
+        """Call listener with the newly stored events after every insert commit (in the writing thread)."""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def hold_commits(self) -> Iterator[None]:
+        """No insert commits or notifies listeners while this is held."""
+        with self._commit_lock:
+            yield
 
     def summary(self) -> dict[str, Any]:
         with self._connect() as connection:
-            total = connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
             by_type = {
                 row["event_type"]: row["count"]
                 for row in connection.execute(
-                    "SELECT event_type, COUNT(*) AS count FROM events GROUP BY event_type ORDER BY event_type"
+                    "SELECT event_type, count FROM event_type_rollups ORDER BY event_type"
                 )
             }
             by_course = {
                 row["course_key"] or "(none)": row["count"]
                 for row in connection.execute(
-                    "SELECT course_key, COUNT(*) AS count FROM events GROUP BY course_key ORDER BY count DESC, course_key"
+                    "SELECT course_key, count FROM course_rollups ORDER BY count DESC, course_key"
                 )
             }
+            total = sum(by_type.values())
             recent = [
                 dict(row)
                 for row in connection.execute(
                     """
                     SELECT event_id, occurred_at, received_at, session_id, device_id, course_key, event_type, result
                     FROM events
-                    ORDER BY received_at DESC
+                    ORDER BY received_at DESC, event_id DESC
                     LIMIT 10
                     """
                 )
@@ -141,7 +904,14 @@ class EventRepository:
             "recent": recent,
         }
 
-    def list_events(self, filters: dict[str, str], limit: int) -> list[dict[str, Any]]:
+    def list_events(
+        self, filters: dict[str, str], limit: int, cursor: str | None = None
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        One page of events, newest first, and the cursor of the next page
+        (None on the last one). Pages are keyset ranges on
+        (received_at, event_id), so deep pages cost the same as the first.
+        """
         clauses: list[str] = []
         values: list[Any] = []
         for field in ("course_key", "event_type", "device_id", "session_id", "result"):
@@ -149,131 +919,677 @@ class EventRepository:
             if value:
                 clauses.append(f"{field} = ?")
                 values.append(value)
+        if cursor:
+            clauses.append("(received_at, event_id) < (?, ?)")
+            values.extend(decode_cursor(cursor, 2))
 
         where_clause = f"WHERE {' AND '.join(clauses)}" if clauses else ""
         sql = f"""
-        SELECT payload_json, received_at
+        SELECT {EVENT_COLUMNS}
         FROM events
         {where_clause}
-        ORDER BY received_at DESC
+        ORDER BY received_at DESC, event_id DESC
         LIMIT ?
         """
-        values.append(limit)
+        values.append(limit + 1)
 
         with self._connect() as connection:
             rows = connection.execute(sql, values).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["received_at"], rows[-1]["event_id"])
         events: list[dict[str, Any]] = []
         for row in rows:
-            payload = json.loads(row["payload_json"])
+            payload = event_payload(row)
             payload["server_received_at"] = row["received_at"]
             events.append(payload)
-        return events
+        return events, next_cursor
 
-    def list_sessions(self, limit: int) -> list[dict[str, Any]]:
-        sql = """
+    def list_sessions(
+        self, limit: int, cursor: str | None = None
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """One page of sessions by decreasing end time, and the next cursor."""
+        where_clause = ""
+        values: list[Any] = []
+        if cursor:
+            where_clause = "WHERE (ended_at, session_id) < (?, ?)"
+            values.extend(decode_cursor(cursor, 2))
+        sql = f"""
         SELECT
-            session_id,
-            MIN(occurred_at) AS started_at,
-            MAX(occurred_at) AS ended_at,
-            MAX(device_id) AS device_id,
-            MAX(course_key) AS course_key,
-            MAX(filter_mode) AS filter_mode,
-            MAX(scope) AS scope,
-            SUM(CASE WHEN event_type = 'question_answered' THEN 1 ELSE 0 END) AS answered_events,
-            SUM(CASE WHEN event_type = 'question_skipped' THEN 1 ELSE 0 END) AS skipped_events
-        FROM events
-        GROUP BY session_id
-        ORDER BY ended_at DESC
+            session_id, started_at, ended_at, device_id, course_key, filter_mode, scope,
+            answered_events, skipped_events
+        FROM session_rollups
+        {where_clause}
+        ORDER BY ended_at DESC, session_id DESC
         LIMIT ?
         """
+        values.append(limit + 1)
         with self._connect() as connection:
-            rows = connection.execute(sql, (limit,)).fetchall()
-        return [dict(row) for row in rows]
+            rows = connection.execute(sql, values).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["ended_at"], rows[-1]["session_id"])
+        return [dict(row) for row in rows], next_cursor
+
+    def list_questions(
+        self, filters: dict[str, str], sort: str, descending: bool, limit: int, cursor: str | None = None
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        One page of per-question statistics from the question rollups,
+        ordered by one of QUESTION_SORTS (ties broken by question_id), and
+        the next cursor. Discrimination is computed for the page only.
+        """
+        expression = QUESTION_SORTS.get(sort)
+        if expression is None:
+            raise ValueError(f"Unknown sort: {sort} (expected one of {', '.join(QUESTION_SORTS)})")
+        clauses: list[str] = []
+        values: list[Any] = []
+        if filters.get("course_key"):
+            clauses.append("course_key = ?")
+            values.append(filters["course_key"])
+        if filters.get("min_answered"):
+            clauses.append("answered >= ?")
+            values.append(clamp_limit(filters["min_answered"], default=0, minimum=0, maximum=1_000_000))
+        if cursor:
+            clauses.append(f"({expression}, question_id) {'<' if descending else '>'} (?, ?)")
+            values.extend(decode_cursor(cursor, 2))
+        where_clause = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        direction = "DESC" if descending else "ASC"
+        sql = f"""
+        SELECT
+            question_id, course_key, events, answered, correct, skipped, learners, first_at, last_at,
+            {expression} AS sort_key
+        FROM question_rollups
+        {where_clause}
+        ORDER BY sort_key {direction}, question_id {direction}
+        LIMIT ?
+        """
+        values.append(limit + 1)
 
-    def export_jsonl(self) -> str:
         with self._connect() as connection:
-            rows = connection.execute(
-                "SELECT payload_json FROM events ORDER BY occurred_at ASC"
-            ).fetchall()
-        return "\n".join(row["payload_json"] for row in rows)
+            rows = connection.execute(sql, values).fetchall()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]["sort_key"], rows[-1]["question_id"])
+            discrimination = self._discrimination(connection, [row["question_id"] for row in rows])
 
+        questions = []
+        for row in rows:
+            answered, seen = row["answered"], row["answered"] + row["skipped"]
+            questions.append({
+                "question_id": row["question_id"],
+                "course_key": row["course_key"],
+                "events": row["events"],
+                "answered": answered,
+                "correct": row["correct"],
+                "skipped": row["skipped"],
+                "learners": row["learners"],
+                "correct_rate": round(row["correct"] / answered, 4) if answered else None,
+                "skip_rate": round(row["skipped"] / seen, 4) if seen else None,
+                "mean_attempts": round(answered / row["learners"], 4) if row["learners"] else None,
+                "discrimination": discrimination.get(row["question_id"]),
+                "first_at": row["first_at"],
+                "last_at": row["last_at"],
+            })
+        return questions, next_cursor
 
-class QuizLogRequestHandler(BaseHTTPRequestHandler):
-    repository: EventRepository
-    server_config: ServerConfig
+    @staticmethod
+    def _discrimination(connection: sqlite3.Connection, question_ids: list[str]) -> dict[str, float]:
+        """
+        Corrected item-total correlation of each question: across the devices
+        that answered it, the Pearson correlation between their correct rate
+        on the question and on every other question (their ability). None
+        with fewer than DISCRIMINATION_MIN_LEARNERS devices or no spread.
+        """
+        scores: dict[str, list[tuple[float, float]]] = {}
+        for start in range(0, len(question_ids), 500):
+            chunk = question_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for question_id, answered, correct, total_answered, total_correct in connection.execute(
+                f"""
+                SELECT pair.question_id, pair.answered, pair.correct, learner.answered, learner.correct
+                FROM question_learner_rollups AS pair
+                JOIN learner_rollups AS learner USING (device_id)
+                WHERE pair.question_id IN ({placeholders}) AND pair.answered > 0
+                """,
+                chunk,
+            ):
+                rest = total_answered - answered
+                if rest > 0:
+                    scores.setdefault(question_id, []).append((correct / answered, (total_correct - correct) / rest))
 
-    def do_GET(self) -> None:  # noqa: N802
-        parsed = urlparse(self.path)
-        if parsed.path == "/health":
-            self.respond_json({"status": "ok", "timestamp": now_iso()})
+        result = {}
+        for question_id, pairs in scores.items():
+            if len(pairs) < DISCRIMINATION_MIN_LEARNERS:
+                continue
+            n = len(pairs)
+            mean_item = sum(item for item, _ in pairs) / n
+            mean_rest = sum(rest for _, rest in pairs) / n
+            covariance = sum((item - mean_item) * (rest - mean_rest) for item, rest in pairs)
+            spread_item = sum((item - mean_item) ** 2 for item, _ in pairs)
+            spread_rest = sum((rest - mean_rest) ** 2 for _, rest in pairs)
+            if spread_item > 0 and spread_rest > 0:
+                result[question_id] = round(covariance / (spread_item * spread_rest) ** 0.5, 4)
+        return result
+
+    def iter_export(self, filters: dict[str, str]) -> Iterator[str]:
+        """
+        JSONL lines (payloads ordered by occurred_at) read from a cursor in
+        EXPORT_FETCH_SIZE steps, so memory does not grow with the table.
+        `since` is inclusive and `until` exclusive, both compared with occurred_at.
+        """
+        clauses: list[str] = []
+        values: list[Any] = []
+        if filters.get("since"):
+            clauses.append("occurred_at >= ?")
+            values.append(filters["since"])
+        if filters.get("until"):
+            clauses.append("occurred_at < ?")
+            values.append(filters["until"])
+        if filters.get("device_id"):
+            clauses.append("device_id = ?")
+            values.append(filters["device_id"])
+        where_clause = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {EVENT_COLUMNS} FROM events {where_clause} ORDER BY occurred_at ASC"
+
+        with self._connect() as connection:
+            cursor = connection.execute(sql, values)
+            while True:
+                rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield event_json(row) + "\n"
+
+
+class IngestClosed(RuntimeError):
+    pass
+
+
+class IngestQueue:
+    """
+    Uploads from every request go through one writer thread, which commits
+    whatever has queued up meanwhile in a single transaction. A request is
+    answered once the transaction holding its events has committed.
+    """
+
+    _STOP = object()
+
+    def __init__(self, repository: EventRepository, max_commit_events: int = INGEST_MAX_COMMIT_EVENTS):
+        self.repository = repository
+        self.max_commit_events = max_commit_events
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._commits = 0
+        self._committed_requests = 0
+        self._committed_events = 0
+        self._max_commit_requests = 0
+        self._last_commit_requests = 0
+        self._thread = threading.Thread(target=self._run, name="quizlog-ingest", daemon=True)
+        self._thread.start()
+
+    def submit(self, events: list[dict[str, Any]], received_at: str) -> Future:
+        """Queue an upload; the future resolves to (inserted, deduplicated)."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise IngestClosed("Ingestion is shutting down")
+            self._queue.put((events, received_at, future))
+        return future
+
+    def close(self) -> None:
+        """Stop accepting uploads, commit everything already queued and stop the writer."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        self._thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            commits = self._commits
+            return {
+                "queue_depth": self._queue.qsize(),
+                "commits": commits,
+                "committed_requests": self._committed_requests,
+                "committed_events": self._committed_events,
+                "mean_commit_requests": round(self._committed_requests / commits, 2) if commits else 0,
+                "mean_commit_events": round(self._committed_events / commits, 2) if commits else 0,
+                "max_commit_requests": self._max_commit_requests,
+                "last_commit_requests": self._last_commit_requests,
+            }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            group = [item]
+            events = len(item[0])
+            while events < self.max_commit_events:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                group.append(item)
+                events += len(item[0])
+            self._commit(group, events)
+
+    def _commit(self, group: list[tuple[list[dict[str, Any]], str, Future]], events: int) -> None:
+        try:
+            counts = self.repository.insert_batches([(batch, received_at) for batch, received_at, _ in group])
+        except Exception as exc:  # noqa: BLE001 - the waiting request gets the error
+            if len(group) == 1:
+                group[0][2].set_exception(exc)
+                return
+            # The transaction rolled back: commit each upload on its own so
+            # only the one that cannot be stored fails.
+            for item in group:
+                self._commit([item], len(item[0]))
             return
-        if parsed.path == "/api/summary":
-            self.respond_json(self.repository.summary())
+        with self._lock:
+            self._commits += 1
+            self._committed_requests += len(group)
+            self._committed_events += events
+            self._max_commit_requests = max(self._max_commit_requests, len(group))
+            self._last_commit_requests = len(group)
+        for (_, _, future), result in zip(group, counts):
+            future.set_result(result)
+
+
+STREAM_EVENT_FIELDS = (
+    "event_id", "occurred_at", "server_received_at", "session_id", "device_id",
+    "question_id", "course_key", "event_type", "result",
+)
+
+
+def sse_message(event: str, payload: Any) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """
+    Messages waiting for one /api/stream client. Readable from a thread
+    (`wait`) or, when created with an event loop, from asyncio (`wait_async`).
+    """
+
+    def __init__(self, queue_size: int, loop: asyncio.AbstractEventLoop | None = None):
+        self.queue_size = queue_size
+        self._messages: deque[bytes] = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._loop = loop
+        self._ready = threading.Event()
+        self._wakeup = asyncio.Event() if loop is not None else None
+
+    def put(self, message: bytes) -> bool:
+        """Queue a message; False once the subscription is closed (or just overflowed)."""
+        with self._lock:
+            if self._closed:
+                return False
+            if len(self._messages) >= self.queue_size:
+                # Too far behind: close it; EventSource reconnects and starts from fresh counters.
+                self._closed = True
+            else:
+                self._messages.append(message)
+            accepted = not self._closed
+        self._notify()
+        return accepted
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._loop is None:
+            self._ready.set()
             return
-        if parsed.path == "/api/events":
-            params = parse_qs(parsed.query)
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:  # loop already closed
+            pass
+
+    def _take(self) -> list[bytes] | None:
+        with self._lock:
+            if self._messages:
+                messages = list(self._messages)
+                self._messages.clear()
+                return messages
+            if self._closed:
+                return None
+            if self._wakeup is None:
+                self._ready.clear()
+            else:
+                self._wakeup.clear()
+            return []
+
+    def wait(self, timeout: float) -> list[bytes] | None:
+        """Queued messages, [] after timeout with none, or None once closed and drained."""
+        messages = self._take()
+        if messages == []:
+            self._ready.wait(timeout)
+            messages = self._take()
+        return messages
+
+    async def wait_async(self, timeout: float) -> list[bytes] | None:
+        messages = self._take()
+        if messages == []:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            messages = self._take()
+        return messages
+
+
+class LiveFeed:
+    """
+    Fan-out of each insert commit to every /api/stream client. The commit
+    is encoded once, as an `events` message (its newest events) and a
+    `counters` message (the summary totals, kept up to date from the
+    events themselves), and the same bytes are queued for every client, so
+    viewers add no SQLite reads. Counters are loaded from the rollups when
+    the first client connects and dropped when the last one leaves.
+    """
+
+    def __init__(self, repository: EventRepository, queue_size: int = STREAM_QUEUE_SIZE):
+        self.repository = repository
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+        self._counters: dict[str, Any] | None = None
+        repository.add_listener(self.publish)
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop | None = None) -> Subscription:
+        subscription = Subscription(self.queue_size, loop)
+        # Same lock order as an insert (commit lock, then feed lock): the
+        # snapshot and later notifications never overlap.
+        with self.repository.hold_commits(), self._lock:
+            if self._counters is None:
+                summary = self.repository.summary()
+                self._counters = {
+                    "total_events": summary["total_events"],
+                    "by_event_type": summary["by_event_type"],
+                    "by_course": summary["by_course"],
+                    "last_received_at": summary["recent"][0]["received_at"] if summary["recent"] else None,
+                }
+            subscription.put(sse_message("counters", self._counters))
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if not self._subscribers:
+                self._counters = None
+
+    def publish(self, events: list[dict[str, Any]]) -> None:
+        with self._lock:
+            if not self._subscribers:
+                return
+            counters = self._counters
+            counters["total_events"] += len(events)
+            for event in events:
+                by_type = counters["by_event_type"]
+                by_type[event["event_type"]] = by_type.get(event["event_type"], 0) + 1
+                course = event.get("course_key") or "(none)"
+                counters["by_course"][course] = counters["by_course"].get(course, 0) + 1
+            counters["last_received_at"] = events[-1]["server_received_at"]
+            newest = [{field: event.get(field) for field in STREAM_EVENT_FIELDS} for event in events[-STREAM_MAX_EVENTS:]]
+            message = sse_message("events", {"count": len(events), "events": newest}) + sse_message("counters", counters)
+            for subscription in list(self._subscribers):
+                if not subscription.put(message):
+                    self._subscribers.discard(subscription)
+            if not self._subscribers:
+                self._counters = None
+
+    def close(self) -> None:
+        """End every stream (server shutdown)."""
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, set()
+            self._counters = None
+        for subscription in subscribers:
+            subscription.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"subscribers": len(self._subscribers)}
+
+
+@dataclass
+class Response:
+    status: HTTPStatus
+    headers: list[tuple[str, str]]
+    # bytes are sent with a Content-Length; an iterator is streamed as it is produced.
+    body: bytes | Iterator[bytes] = b""
+
+
+def json_response(payload: dict[str, Any], status: HTTPStatus = HTTPStatus.OK, pretty: bool = False) -> Response:
+    if pretty:
+        body = json.dumps(payload, ensure_ascii=False, indent=2)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return Response(status, [("Content-Type", "application/json; charset=utf-8")], body.encode("utf-8"))
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison, as RFC 9110 asks for GET)."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Rendered bodies of the read endpoints, keyed by path and query. Entries
+    belong to one data version: the first lookup with a newer version (after
+    any insert) drops them all. Least recently used entries go first when full.
+    """
+
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._version: int | None = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _switch(self, version: int) -> bool:
+        # Versions only move forward; a lookup that read an older one than
+        # the cache holds must not wipe it.
+        if self._version != version:
+            if self._version is not None and version < self._version:
+                return False
+            self._entries.clear()
+            self._version = version
+        return True
+
+    def get(self, key: str, version: int) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(key) if self._switch(version) else None
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return body
+
+    def put(self, key: str, version: int, body: bytes) -> None:
+        with self._lock:
+            if not self._switch(version):
+                return
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+class QuizLogApp:
+    """
+    The routes, independent of the HTTP server running them: `handle()`
+    takes a parsed request and returns a Response. Only POST writes to the
+    database; with an IngestQueue those writes are group-committed by its
+    writer thread, otherwise each request commits its own upload.
+    """
+
+    def __init__(
+        self, repository: EventRepository, server_config: ServerConfig, ingest: IngestQueue | None = None
+    ):
+        self.repository = repository
+        self.server_config = server_config
+        self.ingest = ingest
+        self.cache = ResponseCache()
+        self.feed = LiveFeed(repository)
+
+    def handle(self, method: str, target: str, headers: Any, body: bytes) -> Response:
+        parsed = urlparse(target)
+        if method == "GET":
+            return self.get(parsed.path, parse_qs(parsed.query), headers)
+        if method == "POST":
+            return self.post(parsed.path, headers, body)
+        return json_response({"error": "Method not allowed"}, status=HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def get(self, path: str, params: dict[str, list[str]], headers: Any) -> Response:
+        if path == "/health":
+            payload: dict[str, Any] = {
+                "status": "ok",
+                "timestamp": now_iso(),
+                "cache": self.cache.stats(),
+                "stream": self.feed.stats(),
+            }
+            if self.ingest is not None:
+                payload["ingest"] = self.ingest.stats()
+            return json_response(payload)
+        if path in CACHED_PATHS:
+            return self.cached_get(path, params, headers)
+        if path == "/api/stream":
+            return Response(HTTPStatus.OK, list(STREAM_HEADERS), self.stream_chunks(self.feed.subscribe()))
+        if path == "/api/export.jsonl":
             filters = {key: values[0] for key, values in params.items() if values}
-            limit = clamp_limit(filters.pop("limit", "100"))
-            self.respond_json({"events": self.repository.list_events(filters, limit)})
-            return
-        if parsed.path == "/api/sessions":
-            params = parse_qs(parsed.query)
-            limit = clamp_limit(params.get("limit", ["100"])[0])
-            self.respond_json({"sessions": self.repository.list_sessions(limit)})
-            return
-        if parsed.path == "/api/export.jsonl":
-            payload = self.repository.export_jsonl().encode("utf-8")
-            self.send_response(HTTPStatus.OK)
-            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
-            self.send_header("Content-Length", str(len(payload)))
-            self.end_headers()
-            self.wfile.write(payload)
-            return
-        if parsed.path in {"/", "/dashboard"}:
-            html = DASHBOARD_HTML.encode("utf-8")
-            self.send_response(HTTPStatus.OK)
-            self.send_header("Content-Type", "text/html; charset=utf-8")
-            self.send_header("Content-Length", str(len(html)))
-            self.end_headers()
-            self.wfile.write(html)
-            return
+            compress = "gzip" in headers.get("Accept-Encoding", "")
+            response_headers = [("Content-Type", "application/x-ndjson; charset=utf-8")]
+            if compress:
+                response_headers.append(("Content-Encoding", "gzip"))
+            return Response(HTTPStatus.OK, response_headers, self.export_chunks(filters, compress))
+        if path in {"/", "/dashboard"}:
+            return Response(HTTPStatus.OK, [("Content-Type", "text/html; charset=utf-8")], DASHBOARD_HTML.encode("utf-8"))
 
-        self.respond_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
+        return json_response({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
 
-    def do_POST(self) -> None:  # noqa: N802
-        parsed = urlparse(self.path)
-        if parsed.path != "/events/batch":
-            self.respond_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
-            return
+    def stream_chunks(self, subscription: Subscription) -> Iterator[bytes]:
+        """Server-Sent Events for one client: queued messages, or a comment as heartbeat."""
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                messages = subscription.wait(STREAM_HEARTBEAT_SECONDS)
+                if messages is None:
+                    return
+                yield b"".join(messages) if messages else b": ping\n\n"
+        finally:
+            self.feed.unsubscribe(subscription)
+
+    def cached_get(self, path: str, params: dict[str, list[str]], headers: Any) -> Response:
+        """
+        A read endpoint with an ETag for the data version and query: a
+        matching If-None-Match gets 304 with no query run, and unchanged
+        responses are served from the cache until the next insert.
+        """
+        key = f"{path}?{urlencode(sorted((name, values[0]) for name, values in params.items() if values))}"
+        # Read before the query: a concurrent insert then makes the entry stale, never wrong.
+        version = self.repository.data_version()
+        etag = f'"{version}-{zlib.crc32(key.encode("utf-8")):08x}"'
+        cache_headers = [("ETag", etag), ("Cache-Control", "no-cache")]
+        if etag_matches(headers.get("If-None-Match", ""), etag):
+            return Response(HTTPStatus.NOT_MODIFIED, cache_headers)
+        body = self.cache.get(key, version)
+        if body is None:
+            response = self.read(path, params)
+            if response.status != HTTPStatus.OK:
+                return response
+            body = response.body
+            self.cache.put(key, version, body)
+        return Response(HTTPStatus.OK, [("Content-Type", "application/json; charset=utf-8")] + cache_headers, body)
+
+    def read(self, path: str, params: dict[str, list[str]]) -> Response:
+        pretty = params.get("pretty", ["0"])[0] == "1"
+        if path == "/api/summary":
+            return json_response(self.repository.summary(), pretty=pretty)
+        if path == "/api/events":
+            filters = {key: values[0] for key, values in params.items() if values}
+            limit = clamp_limit(filters.pop("limit", "100"))
+            cursor = filters.pop("cursor", None)
+            try:
+                events, next_cursor = self.repository.list_events(filters, limit, cursor)
+            except ValueError as exc:
+                return json_response({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+            return json_response({"events": events, "next_cursor": next_cursor}, pretty=pretty)
+        limit = clamp_limit(params.get("limit", ["100"])[0])
+        cursor = params.get("cursor", [None])[0]
+        if path == "/api/questions":
+            filters = {key: values[0] for key, values in params.items() if values}
+            descending = filters.get("order", "desc") != "asc"
+            try:
+                questions, next_cursor = self.repository.list_questions(
+                    filters, filters.get("sort", "answered"), descending, limit, cursor
+                )
+            except ValueError as exc:
+                return json_response({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+            return json_response({"questions": questions, "next_cursor": next_cursor}, pretty=pretty)
+        try:
+            sessions, next_cursor = self.repository.list_sessions(limit, cursor)
+        except ValueError as exc:
+            return json_response({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+        return json_response({"sessions": sessions, "next_cursor": next_cursor}, pretty=pretty)
+
+    def post(self, path: str, headers: Any, body: bytes) -> Response:
+        if path != "/events/batch":
+            return json_response({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
 
         if self.server_config.api_key:
-            provided_key = self.headers.get("X-API-Key", "")
+            provided_key = headers.get("X-API-Key", "")
             if provided_key != self.server_config.api_key:
-                self.respond_json({"error": "Unauthorized"}, status=HTTPStatus.UNAUTHORIZED)
-                return
-
-        content_length = int(self.headers.get("Content-Length", "0"))
-        body = self.rfile.read(content_length) if content_length > 0 else b""
+                return json_response({"error": "Unauthorized"}, status=HTTPStatus.UNAUTHORIZED)
 
         try:
             payload = json.loads(body.decode("utf-8") or "{}")
         except json.JSONDecodeError as exc:
-            self.respond_json({"error": f"Invalid JSON: {exc}"}, status=HTTPStatus.BAD_REQUEST)
-            return
+            return json_response({"error": f"Invalid JSON: {exc}"}, status=HTTPStatus.BAD_REQUEST)
 
         events = payload.get("events")
         if not isinstance(events, list) or not events:
-            self.respond_json({"error": "Payload must contain a non-empty 'events' array"}, status=HTTPStatus.BAD_REQUEST)
-            return
+            return json_response({"error": "Payload must contain a non-empty 'events' array"}, status=HTTPStatus.BAD_REQUEST)
 
         validation_errors = [error for event in events for error in validate_event(event)]
         if validation_errors:
-            self.respond_json({"error": "Invalid event payload", "details": validation_errors[:20]}, status=HTTPStatus.BAD_REQUEST)
-            return
+            return json_response({"error": "Invalid event payload", "details": validation_errors[:20]}, status=HTTPStatus.BAD_REQUEST)
 
         received_at = now_iso()
-        inserted, deduplicated = self.repository.insert_events(events, received_at)
-        self.respond_json(
+        if self.ingest is None:
+            inserted, deduplicated = self.repository.insert_events(events, received_at)
+        else:
+            try:
+                inserted, deduplicated = self.ingest.submit(events, received_at).result()
+            except IngestClosed as exc:
+                return json_response({"error": str(exc)}, status=HTTPStatus.SERVICE_UNAVAILABLE)
+        return json_response(
             {
                 "accepted": inserted,
                 "deduplicated": deduplicated,
@@ -281,16 +1597,384 @@ class QuizLogRequestHandler(BaseHTTPRequestHandler):
             }
         )
 
+    def export_chunks(self, filters: dict[str, str], compress: bool) -> Iterator[bytes]:
+        """The export as ~EXPORT_CHUNK_BYTES pieces, gzip-compressed if asked."""
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer: list[str] = []
+        size = 0
+
+        def flush() -> bytes:
+            data = "".join(buffer).encode("utf-8")
+            return compressor.compress(data) if compressor is not None else data
+
+        for line in self.repository.iter_export(filters):
+            buffer.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                data = flush()
+                buffer, size = [], 0
+                if data:
+                    yield data
+        data = flush()
+        if compressor is not None:
+            data += compressor.flush()
+        if data:
+            yield data
+
+
+class QuizLogRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so streamed responses can use chunked transfer encoding;
+    # every other response carries a Content-Length.
+    protocol_version = "HTTP/1.1"
+    repository: EventRepository
+    server_config: ServerConfig
+    app: QuizLogApp
+
+    def do_GET(self) -> None:  # noqa: N802
+        self.dispatch()
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        try:
+            content_length = int(self.headers.get("Content-Length") or "0")
+        except ValueError:
+            content_length = -1
+        if content_length < 0 or content_length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self.send_app_response(json_response({"error": "Invalid Content-Length"}, status=HTTPStatus.BAD_REQUEST))
+            return
+        body = self.rfile.read(content_length) if content_length > 0 else b""
+        self.send_app_response(self.app.handle(self.command, self.path, self.headers, body))
+
+    def send_app_response(self, response: Response) -> None:
+        """
+        Write a Response: bytes with a Content-Length; iterators chunked for
+        HTTP/1.1 clients, or until the connection closes for HTTP/1.0.
+        """
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        if isinstance(response.body, bytes):
+            if response.status != HTTPStatus.NOT_MODIFIED:
+                self.send_header("Content-Length", str(len(response.body)))
+            self.end_headers()
+            self.wfile.write(response.body)
+            return
+
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        try:
+            for data in response.body:
+                self.wfile.write(b"%x\r\n%b\r\n" % (len(data), data) if chunked else data)
+        finally:
+            # Runs the iterator's cleanup now, also when the client went away mid-stream.
+            close_body = getattr(response.body, "close", None)
+            if close_body is not None:
+                close_body()
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
     def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
         return
 
-    def respond_json(self, payload: dict[str, Any], status: HTTPStatus = HTTPStatus.OK) -> None:
-        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+
+class AsyncQuizLogServer:
+    """
+    asyncio HTTP/1.1 server for the same routes. Connections are kept alive
+    between requests, at most max_concurrency requests are handled at once,
+    reads run on a small thread pool and every write on one writer thread,
+    so uploads never contend for SQLite's write lock. With an IngestQueue the
+    queue's thread is that writer, and uploads wait for their group commit
+    on a pool wide enough for all of them to join the same transaction.
+    """
+
+    def __init__(
+        self,
+        app: QuizLogApp,
+        host: str = "127.0.0.1",
+        port: int = 8787,
+        max_concurrency: int = 64,
+        read_threads: int = 4,
+        idle_timeout: float = 15.0,
+        body_timeout: float = BODY_READ_TIMEOUT_SECONDS,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.body_timeout = body_timeout
+        self._max_concurrency = max_concurrency
+        self._readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="quizlog-read")
+        self._writer = ThreadPoolExecutor(
+            max_workers=1 if app.ingest is None else max_concurrency, thread_name_prefix="quizlog-write"
+        )
+        self._server: asyncio.AbstractServer | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._streams: set[asyncio.Task] = set()
+        # Connections waiting for their next request, cancelled on close.
+        self._idle: set[asyncio.Task] = set()
+        self._closing = False
+
+    async def start(self) -> None:
+        self._slots = asyncio.Semaphore(self._max_concurrency)
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        # Since Python 3.12 wait_closed() also waits for every open connection,
+        # so end them first: closing the feed ends every stream, and idle
+        # keep-alive connections are dropped. Requests in flight finish.
+        self.app.feed.close()
+        for task in self._idle:
+            task.cancel()
+        pending = self._streams | self._idle
+        if pending:
+            await asyncio.wait(pending, timeout=5)
+        if self._server is not None:
+            await self._server.wait_closed()
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        try:
+            while not self._closing:
+                self._idle.add(task)
+                try:
+                    # The idle timeout covers waiting for the next request line
+                    # and headers; a body that keeps arriving is never cut off.
+                    head = await asyncio.wait_for(self._read_head(reader), self.idle_timeout)
+                except ValueError as exc:
+                    self._idle.discard(task)
+                    await self._write_response(writer, json_response({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST), False)
+                    break
+                finally:
+                    self._idle.discard(task)
+                if head is None:
+                    break
+                method, target, version, headers, content_length = head
+                body = await self._read_body(reader, content_length)
+                if method == "GET" and urlparse(target).path == "/api/stream":
+                    # Long-lived: outside the request slots, fed by the event loop.
+                    await self._stream(writer)
+                    break
+                connection = headers.get("Connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                async with self._slots:
+                    executor = self._writer if method == "POST" else self._readers
+                    try:
+                        response = await asyncio.get_running_loop().run_in_executor(
+                            executor, self.app.handle, method, target, headers, body
+                        )
+                    except Exception as exc:  # noqa: BLE001 - answer instead of dropping the connection
+                        response = json_response({"error": f"Internal error: {exc}"}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+                        keep_alive = False
+                    keep_alive = await self._write_response(writer, response, keep_alive, version)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _stream(self, writer: asyncio.StreamWriter) -> None:
+        """Server-Sent Events until the client disconnects or the feed closes."""
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self._streams.add(task)
+        task.add_done_callback(self._streams.discard)
+        subscription = await loop.run_in_executor(self._readers, self.app.feed.subscribe, loop)
+        try:
+            if self._closing:
+                return
+            lines = ["HTTP/1.1 200 OK"] + [f"{name}: {value}" for name, value in STREAM_HEADERS]
+            lines += [f"Date: {formatdate(usegmt=True)}", "Connection: close"]
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + b"retry: 3000\n\n")
+            await writer.drain()
+            while True:
+                messages = await subscription.wait_async(STREAM_HEARTBEAT_SECONDS)
+                if messages is None:
+                    return
+                writer.write(b"".join(messages) if messages else b": ping\n\n")
+                await writer.drain()
+        finally:
+            self.app.feed.unsubscribe(subscription)
+
+    async def _read_head(self, reader: asyncio.StreamReader):
+        """(method, target, version, headers, content_length) of the next request, or None at EOF."""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise ValueError("Malformed request line") from None
+        if version not in ("HTTP/1.0", "HTTP/1.1"):
+            raise ValueError("Unsupported HTTP version")
+        header_lines = []
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            header_lines.append(line)
+            if len(header_lines) > MAX_HEADERS:
+                raise ValueError("Too many headers")
+        headers = parse_headers(io.BytesIO(b"".join(header_lines) + b"\r\n"))
+        if headers.get("Transfer-Encoding"):
+            raise ValueError("Chunked request bodies are not supported")
+        try:
+            content_length = int(headers.get("Content-Length") or "0")
+        except ValueError:
+            raise ValueError("Invalid Content-Length") from None
+        if content_length < 0 or content_length > MAX_BODY_BYTES:
+            raise ValueError("Invalid Content-Length")
+        return method, target, version, headers, content_length
+
+    async def _read_body(self, reader: asyncio.StreamReader, content_length: int) -> bytes:
+        """The request body, timing out only when no data arrives for body_timeout."""
+        parts = []
+        remaining = content_length
+        while remaining:
+            part = await asyncio.wait_for(reader.read(min(remaining, BODY_READ_BYTES)), self.body_timeout)
+            if not part:
+                raise asyncio.IncompleteReadError(b"".join(parts), content_length)
+            parts.append(part)
+            remaining -= len(part)
+        return b"".join(parts)
+
+    async def _write_response(
+        self, writer: asyncio.StreamWriter, response: Response, keep_alive: bool, version: str = "HTTP/1.1"
+    ) -> bool:
+        """Send response; returns whether the connection can stay open."""
+        streamed = not isinstance(response.body, bytes)
+        chunked = streamed and version == "HTTP/1.1"
+        if streamed and not chunked:
+            keep_alive = False
+        lines = [f"HTTP/1.1 {response.status.value} {response.status.phrase}"]
+        lines += [f"{name}: {value}" for name, value in response.headers]
+        lines.append(f"Date: {formatdate(usegmt=True)}")
+        if not streamed and response.status != HTTPStatus.NOT_MODIFIED:
+            lines.append(f"Content-Length: {len(response.body)}")
+        elif chunked:
+            lines.append("Transfer-Encoding: chunked")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        if not streamed:
+            writer.write(head + response.body)
+            await writer.drain()
+            return keep_alive
+
+        writer.write(head)
+        loop = asyncio.get_running_loop()
+        chunks = response.body
+        try:
+            while True:
+                data = await loop.run_in_executor(self._readers, next, chunks, None)
+                if data is None:
+                    break
+                writer.write(b"%x\r\n%b\r\n" % (len(data), data) if chunked else data)
+                await writer.drain()
+        finally:
+            close_chunks = getattr(chunks, "close", None)
+            if close_chunks is not None:
+                await loop.run_in_executor(self._readers, close_chunks)
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        return keep_alive
+
+
+def event_row(event: dict[str, Any], received_at: str) -> tuple[Any, ...]:
+    """Parameters of INSERT_EVENT_SQL for one validated event."""
+    get = event.get
+    return (
+        event["event_id"],
+        event["occurred_at"],
+        received_at,
+        event["session_id"],
+        event["device_id"],
+        get("question_id"),
+        get("course_key"),
+        get("source_path"),
+        get("filter_mode"),
+        get("scope"),
+        event["event_type"],
+        get("selected_index"),
+        get("correct_index"),
+        get("result"),
+        get("app_version"),
+        get("build_number"),
+        encode_json(get("metadata", {})),
+        encode_json(event),
+    )
+
+
+def compact_event_row(event: dict[str, Any], received_at: str, compress: bool = False) -> tuple[Any, ...]:
+    """
+    Parameters of INSERT_COMPACT_EVENT_SQL: the promoted columns plus, in
+    extra, every field they cannot give back as-is (unpromoted fields such as
+    metadata, explicit nulls, values of another type). extra is JSON text, or
+    zlib-compressed JSON when that is smaller.
+    """
+    columns = []
+    remainder = {}
+    for name, kind in PROMOTED_FIELDS:
+        value = event.get(name)
+        columns.append(value)
+        if name in event and (value is None or type(value) is not kind):
+            remainder[name] = value
+    for name, value in event.items():
+        if name not in PROMOTED_NAMES:
+            remainder[name] = value
+    extra: str | bytes | None = None
+    if remainder:
+        extra = encode_json(remainder)
+        if compress:
+            packed = zlib.compress(extra.encode("utf-8"))
+            if len(packed) < len(extra):
+                extra = packed
+    return (*columns[:2], received_at, *columns[2:], extra)
+
+
+def event_payload(row: sqlite3.Row) -> dict[str, Any]:
+    """The uploaded event of a row selected with EVENT_COLUMNS, in either storage mode."""
+    # Positional access: EVENT_COLUMNS is received_at, payload_json, extra, promoted...
+    if row[1] is not None:
+        return json.loads(row[1])
+    payload = {name: value for name, value in zip(PROMOTED_ORDER, row[3:]) if value is not None}
+    extra = row[2]
+    if extra is not None:
+        if isinstance(extra, bytes):
+            extra = zlib.decompress(extra).decode("utf-8")
+        payload.update(json.loads(extra))
+    return payload
+
+
+def event_json(row: sqlite3.Row) -> str:
+    """The stored JSON of a full row, or the same text rebuilt for a compact one."""
+    if row[1] is not None:
+        return row[1]
+    return encode_json(event_payload(row))
 
 
 def validate_event(event: Any) -> list[str]:
@@ -301,12 +1985,34 @@ def validate_event(event: Any) -> list[str]:
         value = event.get(field)
         if not isinstance(value, str) or not value.strip():
             errors.append(f"Missing required field: {field}")
+    for field in PROMOTED_ORDER:
+        value = event.get(field)
+        if isinstance(value, int) and not SQLITE_INT_MIN <= value <= SQLITE_INT_MAX:
+            errors.append(f"{field} is out of range")
+        elif value is not None and not isinstance(value, (str, int, float)):
+            errors.append(f"{field} must be a string or a number")
     metadata = event.get("metadata", {})
     if metadata is not None and not isinstance(metadata, dict):
         errors.append("metadata must be an object")
     return errors
 
 
+def encode_cursor(*key: Any) -> str:
+    """Opaque page token for a keyset position."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list[Any]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("Invalid cursor")
+    return key
+
+
 def clamp_limit(value: str, default: int = 100, minimum: int = 1, maximum: int = 1000) -> int:
     try:
         parsed = int(value)
@@ -336,7 +2042,7 @@ DASHBOARD_HTML = """<!doctype html>
     code { font-family: ui-monospace, SFMono-Regular, Menlo, monospace; font-size: 12px; }
     .muted { color: #516074; }
     .filters { display: flex; gap: 12px; flex-wrap: wrap; margin-bottom: 16px; }
-    input { padding: 10px 12px; border: 1px solid #c9d3e0; border-radius: 10px; min-width: 220px; }
+    input, select { padding: 10px 12px; border: 1px solid #c9d3e0; border-radius: 10px; min-width: 220px; }
     button { padding: 10px 14px; border: 0; border-radius: 10px; background: #0b60d1; color: white; cursor: pointer; }
   </style>
 </head>
@@ -356,6 +2062,26 @@ DASHBOARD_HTML = """<!doctype html>
     </table>
   </div>
 
+  <div class="card" style="margin-top: 24px;">
+    <h2>Questions</h2>
+    <div class="filters">
+      <select id="question-sort" onchange="loadQuestions()">
+        <option value="answered:desc">Most answered</option>
+        <option value="correct_rate:asc">Hardest</option>
+        <option value="correct_rate:desc">Easiest</option>
+        <option value="skip_rate:desc">Most skipped</option>
+        <option value="mean_attempts:desc">Most attempts per learner</option>
+      </select>
+    </div>
+    <table id="questions-table">
+      <thead>
+        <tr><th>Question</th><th>Course</th><th>Answered</th><th>Correct</th><th>Skipped</th><th>Attempts</th><th>Discrimination</th></tr>
+      </thead>
+      <tbody></tbody>
+    </table>
+    <button id="more-questions" style="margin-top: 12px; display: none;" onclick="loadQuestions(true)">Load more</button>
+  </div>
+
   <div class="card" style="margin-top: 24px;">
     <h2>Recent Events</h2>
     <div class="filters">
@@ -369,6 +2095,7 @@ DASHBOARD_HTML = """<!doctype html>
       </thead>
       <tbody></tbody>
     </table>
+    <button id="older-events" style="margin-top: 12px; display: none;" onclick="loadEvents(true)">Load older</button>
   </div>
 
   <script>
@@ -383,7 +2110,7 @@ DASHBOARD_HTML = """<!doctype html>
         ['Total Events', summary.total_events],
         ['Event Types', Object.keys(summary.by_event_type).length],
         ['Courses', Object.keys(summary.by_course).length],
-        ['Most Recent', summary.recent[0]?.received_at ?? '—'],
+        ['Most Recent', summary.last_received_at ?? summary.recent?.[0]?.received_at ?? '—'],
       ];
       document.getElementById('summary').innerHTML = items.map(([label, value]) =>
         `<div class="card"><div class="muted">${label}</div><div style="font-size: 24px; font-weight: 700;">${value}</div></div>`
@@ -405,8 +2132,10 @@ DASHBOARD_HTML = """<!doctype html>
       document.querySelector('#sessions-table tbody').innerHTML = rows;
     }
 
-    function renderEvents(events) {
-      const rows = events.map(event => `
+    let eventsCursor = null;
+
+    function eventRows(events) {
+      return events.map(event => `
         <tr>
           <td>${event.occurred_at}</td>
           <td>${event.event_type}</td>
@@ -416,26 +2145,82 @@ DASHBOARD_HTML = """<!doctype html>
           <td><code>${event.session_id}</code></td>
         </tr>
       `).join('');
-      document.querySelector('#events-table tbody').innerHTML = rows;
     }
 
-    async function loadEvents() {
+    function renderEvents(events, append = false) {
+      const body = document.querySelector('#events-table tbody');
+      if (append) body.insertAdjacentHTML('beforeend', eventRows(events));
+      else body.innerHTML = eventRows(events);
+    }
+
+    async function loadEvents(older = false) {
       const params = new URLSearchParams({ limit: '100' });
+      if (older && eventsCursor) params.set('cursor', eventsCursor);
       const course = document.getElementById('course-filter').value.trim();
       const eventType = document.getElementById('event-filter').value.trim();
       if (course) params.set('course_key', course);
       if (eventType) params.set('event_type', eventType);
       const data = await fetchJSON(`/api/events?${params.toString()}`);
-      renderEvents(data.events);
+      renderEvents(data.events, older);
+      eventsCursor = data.next_cursor;
+      document.getElementById('older-events').style.display = eventsCursor ? '' : 'none';
+    }
+
+    let questionsCursor = null;
+
+    function percent(value) {
+      return value === null ? '—' : `${(value * 100).toFixed(1)}%`;
+    }
+
+    async function loadQuestions(more = false) {
+      const [sort, order] = document.getElementById('question-sort').value.split(':');
+      const params = new URLSearchParams({ sort, order, limit: '50' });
+      if (more && questionsCursor) params.set('cursor', questionsCursor);
+      const data = await fetchJSON(`/api/questions?${params.toString()}`);
+      const rows = data.questions.map(question => `
+        <tr>
+          <td><code>${question.question_id}</code></td>
+          <td>${question.course_key ?? '—'}</td>
+          <td>${question.answered}</td>
+          <td>${percent(question.correct_rate)}</td>
+          <td>${percent(question.skip_rate)}</td>
+          <td>${question.mean_attempts ?? '—'}</td>
+          <td>${question.discrimination ?? '—'}</td>
+        </tr>
+      `).join('');
+      const body = document.querySelector('#questions-table tbody');
+      if (more) body.insertAdjacentHTML('beforeend', rows);
+      else body.innerHTML = rows;
+      questionsCursor = data.next_cursor;
+      document.getElementById('more-questions').style.display = questionsCursor ? '' : 'none';
+    }
+
+    async function loadSessions() {
+      renderSessions((await fetchJSON('/api/sessions?limit=50')).sessions);
+    }
+
+    let sessionsTimer = null;
+
+    function startStream() {
+      if (!window.EventSource) return;
+      const stream = new EventSource('/api/stream');
+      stream.addEventListener('counters', message => renderSummary(JSON.parse(message.data)));
+      stream.addEventListener('events', message => {
+        const course = document.getElementById('course-filter').value.trim();
+        const eventType = document.getElementById('event-filter').value.trim();
+        const fresh = JSON.parse(message.data).events
+          .filter(event => (!course || event.course_key === course) && (!eventType || event.event_type === eventType))
+          .reverse();
+        document.querySelector('#events-table tbody').insertAdjacentHTML('afterbegin', eventRows(fresh));
+        // One sessions refetch per burst of uploads; the server answers it from its response cache.
+        clearTimeout(sessionsTimer);
+        sessionsTimer = setTimeout(() => loadSessions().catch(() => {}), 1000);
+      });
     }
 
     async function init() {
-      const [summary, sessions] = await Promise.all([
-        fetchJSON('/api/summary'),
-        fetchJSON('/api/sessions?limit=50'),
-      ]);
+      const [summary] = await Promise.all([fetchJSON('/api/summary'), loadSessions(), loadQuestions()]);
       renderSummary(summary);
-      renderSessions(sessions.sessions);
       renderEvents(summary.recent.map(event => ({
         occurred_at: event.occurred_at,
         event_type: event.event_type,
@@ -445,6 +2230,7 @@ DASHBOARD_HTML = """<!doctype html>
         session_id: event.session_id
       })));
       await loadEvents();
+      startStream();
     }
 
     init().catch(error => {
@@ -456,12 +2242,13 @@ DASHBOARD_HTML = """<!doctype html>
 """
 
 
-def build_handler(repository: EventRepository, server_config: ServerConfig):
+def build_handler(repository: EventRepository, server_config: ServerConfig, ingest: IngestQueue | None = None):
     class ConfiguredHandler(QuizLogRequestHandler):
         pass
 
     ConfiguredHandler.repository = repository
     ConfiguredHandler.server_config = server_config
+    ConfiguredHandler.app = QuizLogApp(repository, server_config, ingest)
     return ConfiguredHandler
 
 
@@ -479,6 +2266,34 @@ def parse_args() -> argparse.Namespace:
         default=os.environ.get("QUIZLOG_API_KEY", ""),
         help="Optional X-API-Key required for POST /events/batch",
     )
+    parser.add_argument(
+        "--mode",
+        choices=("threaded", "async"),
+        default="threaded",
+        help="threaded: one thread per connection; async: asyncio with keep-alive and a single DB writer",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=64,
+        help="Requests handled at once in async mode",
+    )
+    parser.add_argument(
+        "--migrate-storage",
+        choices=STORAGE_MODES,
+        help="Rewrite every event partition in this storage mode (server stopped) and exit",
+    )
+    parser.add_argument(
+        "--rebuild-rollups",
+        action="store_true",
+        help="Recompute the summary and session rollup tables from the archive and event tables and exit",
+    )
+    parser.add_argument(
+        "--apply-retention",
+        type=int,
+        metavar="MONTHS",
+        help="Archive and drop event partitions older than MONTHS months (current one included) and exit",
+    )
     return parser.parse_args()
 
 
@@ -489,20 +2304,70 @@ def main() -> int:
         api_key=args.api_key.strip() or None,
     )
     repository = EventRepository(config.database_path)
-    handler = build_handler(repository, config)
-    server = ThreadingHTTPServer((args.host, args.port), handler)
-    print(f"QuizProg log server listening on http://{args.host}:{args.port}")
+    if args.migrate_storage:
+        migrated = repository.migrate_storage(args.migrate_storage)
+        repository.close()
+        print(f"{migrated} events rewritten in {args.migrate_storage} storage")
+        return 0
+    if args.rebuild_rollups:
+        repository.rebuild_rollups()
+        repository.close()
+        print(f"Rollups rebuilt in {config.database_path}")
+        return 0
+    if args.apply_retention is not None:
+        dropped = repository.apply_retention(args.apply_retention)
+        repository.close()
+        print(f"{len(dropped)} partitions archived and dropped: {', '.join(dropped) or '-'}")
+        return 0
+    print(f"QuizProg log server listening on http://{args.host}:{args.port} ({args.mode})")
     print(f"Database: {config.database_path}")
     if config.api_key:
         print("API key protection enabled for POST /events/batch")
+    ingest = IngestQueue(repository)
+    if args.mode == "async":
+        server = AsyncQuizLogServer(
+            QuizLogApp(repository, config, ingest), args.host, args.port, max_concurrency=args.max_concurrency
+        )
+        try:
+            asyncio.run(serve_async(server))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            ingest.close()
+            repository.close()
+        return 0
+
+    handler = build_handler(repository, config, ingest)
+    threaded = ThreadingHTTPServer((args.host, args.port), handler)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=threaded.shutdown).start())
     try:
-        server.serve_forever()
+        threaded.serve_forever()
     except KeyboardInterrupt:
         pass
     finally:
-        server.server_close()
+        handler.app.feed.close()
+        threaded.server_close()
+        # Uploads already queued are committed before exiting.
+        ingest.close()
+        repository.close()
     return 0
 
 
+async def serve_async(server: AsyncQuizLogServer) -> None:
+    """Serve until SIGINT/SIGTERM, then stop accepting and let in-flight requests finish."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    await server.start()
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,96 @@
+import io
+import json
+import pytest
+import quizlib.cli as cli
+from datetime import date
+from quizlib.loader import load_all_quizzes
+from quizlib.main import parse_args
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "effective_today", lambda: date(2025, 5, 10))
+    folder = tmp_path / "data"
+    (folder / "C1" / "S1").mkdir(parents=True)
+    (folder / "C2").mkdir()
+    def quiz(*texts, tags=()):
+        return json.dumps({"questions": [
+            {"question": t, "answers": [{"text": "x", "correct": True}], "tags": list(tags)}
+            for t in texts
+        ]})
+    (folder / "C1" / "S1" / "a.json").write_text(quiz("A1", "A2", tags=["t"]), encoding="utf-8")
+    (folder / "C2" / "b.json").write_text(quiz("B1"), encoding="utf-8")
+    ids = {q.question: q.id for q in load_all_quizzes(str(folder))[0]}
+    perf_file = tmp_path / "perf.json"
+    perf_file.write_text(json.dumps({
+        str(ids["A1"]): {"history": ["wrong"], "next_review": "2025-05-01"},
+        str(ids["A2"]): {"history": ["correct"], "next_review": "2025-06-01"},
+    }), encoding="utf-8")
+    return folder, perf_file
+
+def run(corpus, *argv):
+    folder, perf_file = corpus
+    args = parse_args(list(argv) + ["--folder", str(folder), "--perf-file", str(perf_file)])
+    out = io.StringIO()
+    assert cli.run(args, out) == 0
+    return json.loads(out.getvalue())
+
+def test_due_overall_and_filtered(corpus):
+    assert run(corpus, "due") == {"date": "2025-05-10", "due": 2, "total": 3}
+    # second run is served from the stats cache
+    assert (corpus[1].parent / "quiz_stats_cache.json").exists()
+    assert run(corpus, "due")["due"] == 2
+    assert run(corpus, "due", "--course", "C2")["due"] == 1
+    assert run(corpus, "due", "--file", "C1/S1/a.json") == {"date": "2025-05-10", "due": 1, "total": 2}
+    assert run(corpus, "due", "--course", "C1", "--tag", "t")["total"] == 2
+
+def test_stats_and_files(corpus):
+    stats = run(corpus, "stats")
+    assert (stats["never"], stats["wrong"], stats["correct"]) == (1, 1, 1)
+    assert set(stats["courses"]) == {"C1", "C2"}
+
+    files = run(corpus, "files", "--tag", "t")["files"]
+    assert [(f["file"], f["section"], f["total"]) for f in files] == [("C1/S1/a.json", "S1", 2)]
+
+def test_export_rows(corpus):
+    rows = run(corpus, "export", "--course", "C1")["questions"]
+    assert [r["question"] for r in rows] == ["A1", "A2"]
+    assert rows[0]["last_result"] == "wrong"
+    assert rows[1]["attempts"] == 1
+
+def test_search_results(corpus):
+    result = run(corpus, "search", "a1")
+    assert result["count"] == 1
+    assert result["results"][0]["question"] == "A1"
+    assert run(corpus, "search", "x", "--course", "C2")["count"] == 1
+    assert run(corpus, "search", "x", "--limit", "1")["count"] == 3
+
+def test_duplicates_report_and_link(corpus):
+    folder, perf_file = corpus
+    text = "El plazo para interponer el recurso de alzada es de un mes"
+    for name, question in (("c.json", text), ("d.json", "1. " + text)):
+        (folder / "C2" / name).write_text(json.dumps({"questions": [
+            {"question": question, "answers": [{"text": "Sí", "correct": True}]},
+        ]}), encoding="utf-8")
+    result = run(corpus, "duplicates", "--link")
+    assert [sorted(q["file"] for q in c["questions"]) for c in result["clusters"]] == [["C2/c.json", "C2/d.json"]]
+    assert result["linked_groups"] == 1
+    assert (perf_file.parent / "quiz_links.json").exists()
+
+def test_stats_cache_is_shared_across_folder_spellings(corpus, monkeypatch):
+    from quizlib.loader import current_corpus_version
+    from quizlib.main import cargar_estadisticas
+    from quizlib.performance import load_performance_data, perf_store_version
+
+    folder, perf_file = corpus
+    monkeypatch.chdir(folder.parent)
+    perf_file.rename("quiz_performance.json")
+    corpus = (folder, folder.parent / "quiz_performance.json")
+    assert run(corpus, "due", "--file", "C1/S1/a.json")["total"] == 2
+
+    # The menu loads the same folder through a relative path and hits the cache.
+    questions = load_all_quizzes("data")[0]
+    stats = cargar_estadisticas(questions, load_performance_data(), perf_store_version(),
+                                current_corpus_version("data"), "data")
+    assert stats.changes == 0
+    assert stats.file("data/C1/S1/a.json").total == 2
+    assert stats.file(str(folder / "C2" / "b.json")).total == 1
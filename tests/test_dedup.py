@@ -0,0 +1,66 @@
+import json
+import random
+
+from quizlib import dedup
+from quizlib.engine import QuizSession
+from quizlib.performance import load_links, save_link_groups
+
+
+def q(qid, text, answers, correct=0):
+    return {
+        "_quiz_id": qid,
+        "_quiz_source": f"data/C/f{qid}.json",
+        "question": text,
+        "answers": [{"text": a, "correct": i == correct} for i, a in enumerate(answers)],
+    }
+
+
+ANSWERS = ["el Gobierno de la Nación", "las Cortes Generales", "el Tribunal Supremo", "el Rey"]
+TEXT = "Según el artículo 66 de la Constitución, ¿quién ejerce la potestad legislativa del Estado?"
+
+
+def test_minhash_is_deterministic_and_tracks_similarity():
+    a = dedup.shingles(TEXT)
+    b = dedup.shingles(TEXT.replace("Según", "Conforme a"))
+    assert dedup.minhash(a) == dedup.minhash(set(a))
+    assert dedup.minhash(set()) is None
+    sig_a, sig_b = dedup.minhash(a), dedup.minhash(b)
+    agree = sum(x == y for x, y in zip(sig_a, sig_b)) / dedup.NUM_PERM
+    assert abs(agree - dedup.jaccard(a, b)) < 0.25
+
+
+def test_find_clusters_groups_rewordings_only():
+    rng = random.Random(0)
+    filler = [
+        q(100 + i, " ".join(rng.choice(["plazo", "recurso", "órgano", "norma", "acto", "ley", "juez"])
+                            for _ in range(12)), ["sí", "no"])
+        for i in range(50)
+    ]
+    questions = filler + [
+        q(1, TEXT, ANSWERS, correct=1),
+        q(2, "1. " + TEXT, list(reversed(ANSWERS)), correct=2),  # same question, new numbering/order
+        q(3, TEXT.replace("Según", "Conforme a"), ANSWERS, correct=1),
+        q(4, TEXT, ANSWERS, correct=0),  # same wording, different correct answer
+    ]
+    clusters = dedup.find_clusters(questions, threshold=0.8)
+    assert [ids for _sim, ids in clusters] == [[1, 2, 3]]
+    assert 0.8 <= clusters[0][0] <= 1.0
+
+
+def test_linked_questions_share_schedule(tmp_path):
+    path = tmp_path / "quiz_links.json"
+    save_link_groups(dedup.merge_groups([["1", "2"], ["2", "3"], ["7", "8"]]), str(path))
+    assert json.loads(path.read_text())["groups"] == [["1", "2", "3"], ["7", "8"]]
+    links = load_links(str(path))
+    assert links["2"] == ["1", "3"]
+
+    questions = [q(1, TEXT, ANSWERS, 1), q(2, TEXT, ANSWERS, 1), q(5, "Otra", ["a", "b"])]
+    perf = {}
+    session = QuizSession.from_questions(questions, perf, shuffle=False, links=links)
+    assert len(session) == 2  # one member per linked group
+    session.next_question()
+    outcome = session.submit("B")
+    assert outcome["correct"]
+    for linked in ("2", "3"):
+        assert perf[linked]["next_review"] == perf["1"]["next_review"]
+        assert perf[linked]["history"] == []
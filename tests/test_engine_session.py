@@ -0,0 +1,110 @@
+import random
+import threading
+import pytest
+import quizlib.engine as eng
+from quizlib.engine import QuizSession
+from datetime import date
+
+@pytest.fixture(autouse=True)
+def fixed_today(monkeypatch):
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return cls(2025, 5, 5)
+    monkeypatch.setattr(eng, "date", FixedDate)
+    yield
+
+def make_questions(n, source="root/CourseX/file.json"):
+    return [
+        {
+            "question": f"Q{i}",
+            "answers": [
+                {"text": "uno", "correct": True},
+                {"text": "dos", "correct": False},
+                {"text": "tres", "correct": True},
+                {"text": "cuatro", "correct": False},
+            ],
+            "explanation": "a y c",
+            "_quiz_id": i,
+            "_quiz_source": source,
+        }
+        for i in range(n)
+    ]
+
+def test_session_round_trip_without_shuffle():
+    perf_data = {}
+    session = QuizSession.from_questions(make_questions(2), perf_data, shuffle=False)
+    view = session.next_question()
+    assert view["qid"] == 0
+    assert (view["position"], view["total"]) == (1, 2)
+    assert [o["letter"] for o in view["options"]] == ["A", "B", "C", "D"]
+    assert view["multiple"] is True
+
+    outcome = session.submit("c;a")
+    assert outcome["correct"] is True
+    assert outcome["correct_letters"] == ["A", "C"]
+    assert outcome["explanation"] == "A y C"
+    assert outcome["schedule"]["interval"] == 1
+    assert outcome["schedule"]["next_review"] == "2025-05-06"
+
+    session.next_question()
+    outcome = session.submit("")
+    assert outcome["result"] == "skipped"
+    assert session.next_question() is None
+
+    summary = session.finish()
+    assert (summary["correct"], summary["wrong"], summary["unanswered"]) == (1, 0, 1)
+    assert perf_data["1"]["history"] == ["skipped"]
+
+def test_session_shuffle_keeps_correct_letters():
+    session = QuizSession.from_questions(make_questions(1), {}, rng=random.Random(3))
+    view = session.next_question()
+    correct = [o["letter"] for o in view["options"] if o["text"] in ("uno", "tres")]
+    shuffled, shuffle_map = session.current_answers()
+    assert [a["text"] for a in shuffled] == [o["text"] for o in view["options"]]
+    assert [shuffled[shuffle_map[i]]["text"] for i in range(4)] == ["uno", "dos", "tres", "cuatro"]
+    assert session.submit(",".join(correct))["correct"] is True
+
+def test_session_quit_records_skip_and_saves():
+    saved = []
+    perf_data = {}
+    session = QuizSession.from_questions(make_questions(3), perf_data,
+                                         save=lambda d: saved.append(dict(d)))
+    session.next_question()
+    session.quit()
+    assert session.next_question() is None
+    assert perf_data["0"]["history"] == ["skipped"]
+    assert perf_data["0"]["interval"] == 0
+    assert session.finish()["unanswered"] == 1
+    assert len(saved) == 1
+
+def test_session_submit_without_question():
+    session = QuizSession([], {})
+    with pytest.raises(RuntimeError):
+        session.submit("A")
+
+def test_session_exam_cap_uses_course():
+    perf_data = {"0": {"history": [], "ease": 2.5, "interval": 30,
+                       "repetition": 5, "next_review": "2025-05-05"}}
+    session = QuizSession.from_questions(make_questions(1), perf_data, shuffle=False,
+                                         exam_dates={"CourseX": "2025-05-07"})
+    session.next_question()
+    assert session.submit("A,C")["schedule"]["interval"] == 2
+
+def test_sessions_are_independent_across_threads():
+    results = {}
+
+    def run(name):
+        perf_data = {}
+        session = QuizSession.from_questions(make_questions(200), perf_data,
+                                             rng=random.Random(name))
+        while session.next_question() is not None:
+            session.submit("")
+        results[name] = (session.finish()["unanswered"], len(perf_data))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: (200, 200) for i in range(4)}
@@ -70,3 +70,106 @@ def test_archive_on_file_removal(tmp_path):
     idx2 = json.loads((folder/".quiz_index.json").read_text(encoding="utf-8"))
     for qid in old_ids:
         assert qid in idx2["archived"]
+
+
+def _write(path, questions):
+    path.write_text(json.dumps({"questions": [
+        {"question": text, "answers": [{"text": a, "correct": i == 0} for i, a in enumerate(answers)]}
+        for text, answers in questions
+    ]}, ensure_ascii=False), encoding="utf-8")
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+
+def test_reworded_questions_keep_their_id(tmp_path):
+    folder = tmp_path / "quiz_data"
+    folder.mkdir()
+    f = folder / "a.json"
+    original = [
+        ("¿Qué órgano ejerce la potestad legislativa del Estado según la Constitución?",
+         ["Las Cortes Generales", "El Gobierno", "El Rey"]),
+        ("¿Cuál es el plazo para interponer el recurso de alzada contra actos expresos?",
+         ["Un mes", "Tres meses", "Dos meses"]),
+        ("¿Quién nombra al Presidente del Gobierno tras la investidura del Congreso?",
+         ["El Rey", "El Senado", "El Congreso"]),
+    ]
+    _write(f, original)
+    ids = {q.question: q.id for q in load_all_quizzes(str(folder))[0]}
+
+    edited = [
+        # typo fixed in the question, answer order unchanged
+        ("¿Qué órgano ejerce la potestad legislativa del Estado, según la Constitución?",
+         original[0][1]),
+        # second question removed, a new one added
+        ("¿Qué ley regula el procedimiento administrativo común de las administraciones?",
+         ["La Ley 39/2015", "La Ley 40/2015", "La Ley 30/1992"]),
+        original[2],
+    ]
+    _write(f, edited)
+    _bump_mtime(f)
+    reloaded = {q.question: q.id for q in load_all_quizzes(str(folder))[0]}
+
+    assert reloaded[edited[0][0]] == ids[original[0][0]]
+    assert reloaded[edited[2][0]] == ids[original[2][0]]
+    assert reloaded[edited[1][0]] not in ids.values()
+    idx = json.loads((folder / ".quiz_index.json").read_text(encoding="utf-8"))
+    assert ids[original[1][0]] in idx["archived"]
+    assert ids[original[0][0]] not in idx["archived"]
+
+
+def test_reworded_question_with_another_correct_answer_gets_a_new_id(tmp_path):
+    folder = tmp_path / "quiz_data"
+    folder.mkdir()
+    f = folder / "a.json"
+    text = "¿Qué órgano ejerce la potestad legislativa del Estado según la Constitución?"
+    _write(f, [(text, ["Las Cortes Generales", "El Gobierno", "El Rey"])])
+    [old] = load_all_quizzes(str(folder))[0]
+
+    # Typo fixed and the correct answer changed: the old history no longer applies.
+    _write(f, [(text.replace(" según", ", según"), ["El Gobierno", "Las Cortes Generales", "El Rey"])])
+    _bump_mtime(f)
+    [new] = load_all_quizzes(str(folder))[0]
+    assert new.id != old.id
+
+    # Only case and accents of the correct answer changed: still the same question.
+    _write(f, [(text, ["el gobierno", "Las Cortes Generales", "El Rey"])])
+    _bump_mtime(f)
+    [again] = load_all_quizzes(str(folder))[0]
+    assert again.id == new.id
+
+
+def test_renumbering_a_large_file_keeps_ids(tmp_path):
+    folder = tmp_path / "quiz_data"
+    folder.mkdir()
+    f = folder / "big.json"
+    questions = [
+        (f"Pregunta sobre el artículo {i} del texto refundido de la ley de prueba número {i * 7}",
+         [f"Opción correcta {i}", f"Opción incorrecta {i}", "Ninguna de las anteriores"])
+        for i in range(500)
+    ]
+    _write(f, questions)
+    ids = [q.id for q in load_all_quizzes(str(folder))[0]]
+
+    _write(f, [(f"{i + 1}. {text}", answers) for i, (text, answers) in enumerate(questions)])
+    _bump_mtime(f)
+    assert [q.id for q in load_all_quizzes(str(folder))[0]] == ids
+
+
+def test_index_entries_get_signatures_backfilled(tmp_path):
+    folder = tmp_path / "quiz_data"
+    folder.mkdir()
+    _write(folder / "a.json", [("Una pregunta cualquiera sobre derecho civil", ["Sí", "No"])])
+    load_all_quizzes(str(folder))
+    path = folder / ".quiz_index.json"
+    idx = json.loads(path.read_text(encoding="utf-8"))
+    for entry in idx["files"]["a.json"]["questions"]:
+        del entry["signature"]
+        del entry["answer_key"]
+    path.write_text(json.dumps(idx), encoding="utf-8")
+
+    load_all_quizzes(str(folder))
+    idx = json.loads(path.read_text(encoding="utf-8"))
+    assert all(e.get("signature") and e.get("answer_key") for e in idx["files"]["a.json"]["questions"])
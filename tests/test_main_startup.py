@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import quizlib.main as mainmod
+
+
+def test_parse_args_without_arguments_skips_argparse():
+    args = mainmod.parse_args([])
+    assert args.command is None
+    assert args.profile is None
+    assert args.profile_action is None
+
+
+def test_carga_inicial_loads_in_background(tmp_path, monkeypatch):
+    folder = tmp_path / "quizzes"
+    (folder / "Curso").mkdir(parents=True)
+    quiz = {
+        "questions": [
+            {"question": "¿2+2?", "answers": [{"text": "4", "correct": True},
+                                               {"text": "5", "correct": False}],
+             "tags": ["mates"]},
+        ]
+    }
+    (folder / "Curso" / "sumas.json").write_text(json.dumps(quiz), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(mainmod, "QUIZ_DATA_FOLDER", str(folder))
+
+    datos = mainmod.CargaInicial(str(folder)).esperar()
+
+    assert [q.question for q in datos.questions] == ["¿2+2?"]
+    assert list(datos.cursos_dict) == ["Curso"]
+    assert datos.tags == ["mates"]
+    assert datos.stats.repository.total == 1
+    assert datos.perf_data == {}
+
+
+def test_carga_inicial_reraises_load_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    carga = mainmod.CargaInicial(str(tmp_path / "vacia"))
+    with pytest.raises(SystemExit):
+        carga.esperar()
+    # Exiting from the menu must not fail on a broken load.
+    assert carga.esperar(relanzar=False) is carga
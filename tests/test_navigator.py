@@ -33,3 +33,47 @@ def test_pick_a_file_menu(monkeypatch):
 
     chosen = pick_a_file_menu(cursos)
     assert chosen == "/path/quizA.json"
+
+
+def test_nav_tree_sorted_with_live_counters(monkeypatch, capsys):
+    from datetime import date
+
+    import quizlib.navigator as nav
+    from quizlib.stats import StatsAggregator
+
+    cursos = {
+        "B": {"sections": {"(No subfolder)": {
+            "files": [{"filename": "b.json", "filepath": "q/B/b.json", "question_count": 1}],
+            "section_questions": 1}}, "total_files": 1, "total_questions": 1},
+        "A": {"sections": {
+            "S2": {"files": [{"filename": "z.json", "filepath": "q/A/S2/z.json", "question_count": 1},
+                             {"filename": "y.json", "filepath": "q/A/S2/y.json", "question_count": 1}],
+                   "section_questions": 2},
+            "S1": {"files": [{"filename": "x.json", "filepath": "q/A/S1/x.json", "question_count": 2}],
+                   "section_questions": 2}}, "total_files": 3, "total_questions": 4},
+    }
+    tree = nav.build_nav_tree(cursos)
+    assert [c.name for c in tree.children] == ["A", "B"]
+    assert [s.name for s in tree.children[0].children] == ["S1", "S2"]
+    assert [f.name for f in tree.children[0].children[1].children] == ["y.json", "z.json"]
+    assert tree.children[1].children[0].section is None
+
+    questions = [
+        {"_quiz_id": 1, "_quiz_source": "q/A/S1/x.json"},
+        {"_quiz_id": 2, "_quiz_source": "q/A/S1/x.json"},
+        {"_quiz_id": 3, "_quiz_source": "q/A/S2/y.json"},
+    ]
+    perf = {"1": {"history": ["wrong"], "next_review": "2025-05-01"}}
+    stats = StatsAggregator(questions, perf)
+    x = tree.children[0].children[0].children[0]
+    assert x.label(stats, date(2025, 5, 10)) == "x.json (2 preguntas, 2 para hoy, 1 falladas, 1 sin responder)"
+
+    perf["2"] = {"history": ["correct"], "next_review": "2025-06-01"}
+    stats.refresh(2)
+    assert x.counts(stats).due(date(2025, 5, 10)) == 1
+
+    monkeypatch.setattr(nav, "effective_today", lambda: date(2025, 5, 10))
+    inputs = iter(["1", "1", "1"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(inputs))
+    assert nav.pick_a_file_menu(cursos, tree=tree, stats=stats) == "q/A/S1/x.json"
+    assert "x.json (2 preguntas, 1 para hoy, 1 falladas, 0 sin responder)" in capsys.readouterr().out
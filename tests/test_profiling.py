@@ -0,0 +1,27 @@
+import json
+import quizlib.profiling as profiling
+
+def test_disabled_is_noop(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", False)
+    profiling.reset()
+    with profiling.span("x"):
+        pass
+    profiling.count("y")
+    assert profiling.span("x") is profiling.span("z")
+    assert profiling.report() == {"phases": {}, "counters": {}}
+
+def test_enabled_report_and_dump(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    profiling.reset()
+    for _ in range(3):
+        with profiling.span("loader.json_decode"):
+            pass
+    profiling.count("loader.questions", 5)
+    out = tmp_path / "profile.json"
+    profiling.dump(str(out))
+    data = json.loads(out.read_text(encoding="utf-8"))
+    phase = data["phases"]["loader.json_decode"]
+    assert phase["count"] == 3
+    assert set(phase) == {"count", "total_ms", "p50_ms", "p95_ms", "max_ms"}
+    assert data["counters"] == {"loader.questions": 5}
+    profiling.reset()
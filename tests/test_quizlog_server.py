@@ -1,10 +1,31 @@
+import asyncio
+import gzip
+import http.client
 import json
+import socket
+import sqlite3
 import threading
+import time
+import urllib.error
 import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
-from server.quizlog_server import EventRepository, ServerConfig, build_handler
+import pytest
+
+from server.quizlog_server import (
+    EVENTS_TABLE_SQL,
+    AsyncQuizLogServer,
+    EventRepository,
+    IngestClosed,
+    IngestQueue,
+    LiveFeed,
+    QuizLogApp,
+    ServerConfig,
+    build_handler,
+)
 from http.server import ThreadingHTTPServer
 
 
@@ -67,3 +88,711 @@ def test_quizlog_server_ingests_and_lists_events():
         finally:
             server.shutdown()
             thread.join(timeout=5)
+
+
+def test_repository_reuses_wal_connections():
+    with TemporaryDirectory() as tmp:
+        repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+        try:
+            with repository._connect() as connection:
+                first = connection
+                assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+                assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1
+            with repository._connect() as connection:
+                assert connection is first
+
+            # Concurrent users get distinct connections, returned to the pool afterwards.
+            with repository._connect() as a, repository._connect() as b:
+                assert a is not b
+        finally:
+            repository.close()
+
+
+def _event(event_id, **extra):
+    event = {
+        "event_id": event_id,
+        "occurred_at": "2026-04-14T12:00:00Z",
+        "session_id": "sess-1",
+        "device_id": "dev-1",
+        "event_type": "question_answered",
+    }
+    event.update(extra)
+    return event
+
+
+def test_bulk_insert_counts_duplicates():
+    with TemporaryDirectory() as tmp:
+        repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+        try:
+            first = [_event(f"evt-{i}", metadata={"n": i}) for i in range(300)]
+            assert repository.insert_events(first, "2026-04-14T12:00:01Z") == (300, 0)
+
+            # Already stored, repeated within the batch, and new.
+            batch = first[:50] + [_event("evt-new"), _event("evt-new")]
+            assert repository.insert_events(batch, "2026-04-14T12:00:02Z") == (1, 51)
+
+            events, _ = repository.list_events({}, 1000)
+            assert len(events) == 301
+            stored = next(e for e in events if e["event_id"] == "evt-7")
+            assert stored["metadata"] == {"n": 7}
+        finally:
+            repository.close()
+
+
+@contextmanager
+def _serve(repository, database_path):
+    handler = build_handler(repository, ServerConfig(database_path=database_path))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        thread.join(timeout=5)
+        server.server_close()
+
+
+def test_export_streams_filtered_and_gzipped():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        events = [
+            _event(f"evt-{i}", occurred_at=f"2026-04-{10 + i:02d}T12:00:00Z", device_id=f"dev-{i % 2}")
+            for i in range(6)
+        ]
+        repository.insert_events(events, "2026-04-20T00:00:00Z")
+        try:
+            with _serve(repository, database_path) as base_url:
+                with urllib.request.urlopen(f"{base_url}/api/export.jsonl") as response:
+                    assert response.headers["Transfer-Encoding"] == "chunked"
+                    lines = response.read().decode("utf-8").splitlines()
+                assert [json.loads(line)["event_id"] for line in lines] == [f"evt-{i}" for i in range(6)]
+
+                query = "since=2026-04-11&until=2026-04-15&device_id=dev-1"
+                with urllib.request.urlopen(f"{base_url}/api/export.jsonl?{query}") as response:
+                    lines = response.read().decode("utf-8").splitlines()
+                assert [json.loads(line)["event_id"] for line in lines] == ["evt-1", "evt-3"]
+
+                request = urllib.request.Request(
+                    f"{base_url}/api/export.jsonl", headers={"Accept-Encoding": "gzip"}
+                )
+                with urllib.request.urlopen(request) as response:
+                    assert response.headers["Content-Encoding"] == "gzip"
+                    body = gzip.decompress(response.read()).decode("utf-8")
+                assert len(body.splitlines()) == 6
+        finally:
+            repository.close()
+
+
+def test_keyset_pages_cover_every_event_once():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        # Two uploads share a received_at, so event_id breaks the ties.
+        repository.insert_events(
+            [_event(f"evt-{i:02d}", session_id=f"sess-{i % 4}", occurred_at=f"2026-04-14T12:{i:02d}:00Z")
+             for i in range(12)],
+            "2026-04-14T13:00:00Z",
+        )
+        repository.insert_events([_event("evt-late", session_id="sess-9")], "2026-04-14T14:00:00Z")
+        try:
+            with _serve(repository, database_path) as base_url:
+                seen, cursor = [], None
+                while True:
+                    query = "limit=5" + (f"&cursor={cursor}" if cursor else "")
+                    with urllib.request.urlopen(f"{base_url}/api/events?{query}") as response:
+                        page = json.loads(response.read().decode("utf-8"))
+                    seen.extend(e["event_id"] for e in page["events"])
+                    cursor = page["next_cursor"]
+                    if cursor is None:
+                        break
+                assert seen == ["evt-late"] + [f"evt-{i:02d}" for i in range(11, -1, -1)]
+
+                sessions, cursor = [], None
+                while True:
+                    query = "limit=2" + (f"&cursor={cursor}" if cursor else "")
+                    with urllib.request.urlopen(f"{base_url}/api/sessions?{query}") as response:
+                        page = json.loads(response.read().decode("utf-8"))
+                    sessions.extend(s["session_id"] for s in page["sessions"])
+                    cursor = page["next_cursor"]
+                    if cursor is None:
+                        break
+                assert sessions == ["sess-3", "sess-2", "sess-1", "sess-0", "sess-9"]
+
+                try:
+                    urllib.request.urlopen(f"{base_url}/api/events?cursor=not-a-cursor")
+                except urllib.error.HTTPError as exc:
+                    assert exc.code == 400
+                else:
+                    raise AssertionError("invalid cursor accepted")
+        finally:
+            repository.close()
+
+
+def test_rollups_follow_inserts_and_rebuild():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        events = [
+            _event("e1", session_id="s1", course_key="A", occurred_at="2026-04-14T10:00:00Z"),
+            _event("e2", session_id="s1", course_key="A", event_type="question_skipped",
+                   occurred_at="2026-04-14T10:05:00Z", filter_mode="due"),
+            _event("e3", session_id="s2", occurred_at="2026-04-14T11:00:00Z", device_id="dev-2"),
+        ]
+        repository.insert_events(events, "2026-04-14T12:00:00Z")
+        repository.insert_events(events[:1], "2026-04-14T12:01:00Z")  # duplicate: not counted
+
+        def snapshot():
+            summary = repository.summary()
+            sessions, _ = repository.list_sessions(10)
+            return summary["total_events"], summary["by_event_type"], summary["by_course"], sessions
+
+        total, by_type, by_course, sessions = live = snapshot()
+        assert total == 3
+        assert by_type == {"question_answered": 2, "question_skipped": 1}
+        assert by_course == {"A": 2, "(none)": 1}
+        assert sessions[0]["session_id"] == "s2"
+        s1 = sessions[1]
+        assert (s1["started_at"], s1["ended_at"]) == ("2026-04-14T10:00:00Z", "2026-04-14T10:05:00Z")
+        assert (s1["answered_events"], s1["skipped_events"], s1["filter_mode"]) == (1, 1, "due")
+
+        repository.rebuild_rollups()
+        assert snapshot() == live
+
+        # A database from before the rollups gets them filled on open.
+        with repository._connect() as connection:
+            for table in ("event_type_rollups", "course_rollups", "session_rollups"):
+                connection.execute(f"DELETE FROM {table}")
+        repository.close()
+        repository = EventRepository(database_path)
+        try:
+            assert snapshot() == live
+        finally:
+            repository.close()
+
+
+@contextmanager
+def _serve_async(repository, database_path, **options):
+    app = QuizLogApp(repository, ServerConfig(database_path=database_path))
+    server = AsyncQuizLogServer(app, "127.0.0.1", 0, max_concurrency=4, **options)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.port
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+
+def test_async_server_keeps_connections_alive():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        try:
+            with _serve_async(repository, database_path) as port:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                body = json.dumps({"events": [_event(f"evt-{i}") for i in range(3)]})
+                connection.request("POST", "/events/batch", body=body, headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                assert json.loads(response.read())["accepted"] == 3
+                sock = connection.sock
+
+                connection.request("GET", "/api/summary")
+                assert json.loads(connection.getresponse().read())["total_events"] == 3
+                connection.request("GET", "/api/export.jsonl", headers={"Accept-Encoding": "gzip"})
+                response = connection.getresponse()
+                assert response.getheader("Transfer-Encoding") == "chunked"
+                assert len(gzip.decompress(response.read()).splitlines()) == 3
+                connection.request("GET", "/missing")
+                response = connection.getresponse()
+                assert response.status == 404
+                response.read()
+                # Every request went over the same TCP connection.
+                assert connection.sock is sock
+                connection.close()
+
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/events?limit=2") as response:
+                    page = json.loads(response.read().decode("utf-8"))
+                assert len(page["events"]) == 2 and page["next_cursor"]
+        finally:
+            repository.close()
+
+
+def test_ingest_queue_group_commits_waiting_uploads():
+    with TemporaryDirectory() as tmp:
+        repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+        ingest = IngestQueue(repository)
+        try:
+            # Hold the write lock so uploads pile up behind the first one.
+            with repository._connect() as blocker:
+                blocker.execute("BEGIN IMMEDIATE")
+                first = ingest.submit([_event("evt-0")], "2026-04-14T12:00:00Z")
+                deadline = time.monotonic() + 5
+                while ingest.stats()["queue_depth"] and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                waiting = [
+                    ingest.submit([_event(f"evt-{i}"), _event("evt-0")], "2026-04-14T12:00:01Z")
+                    for i in range(1, 6)
+                ]
+                assert ingest.stats()["queue_depth"] == 5
+                blocker.rollback()
+
+            assert first.result(timeout=10) == (1, 0)
+            assert [f.result(timeout=10) for f in waiting] == [(1, 1)] * 5
+            stats = ingest.stats()
+            assert stats["commits"] == 2
+            assert stats["max_commit_requests"] == 5
+            assert stats["committed_events"] == 11
+        finally:
+            ingest.close()
+            repository.close()
+
+
+def test_ingest_queue_fails_only_the_upload_that_cannot_be_stored():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        ingest = IngestQueue(repository)
+        try:
+            with repository._connect() as blocker:
+                blocker.execute("BEGIN IMMEDIATE")
+                first = ingest.submit([_event("evt-0")], "2026-04-14T12:00:00Z")
+                deadline = time.monotonic() + 5
+                while ingest.stats()["queue_depth"] and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                # Bypasses validation, as a value SQLite rejects would.
+                waiting = [
+                    ingest.submit([_event(f"evt-{i}", selected_index=2**70 if i == 3 else 1)],
+                                  "2026-04-14T12:00:01Z")
+                    for i in range(1, 6)
+                ]
+                blocker.rollback()
+
+            assert first.result(timeout=10) == (1, 0)
+            with pytest.raises(OverflowError):
+                waiting[2].result(timeout=10)
+            assert [f.result(timeout=10) for i, f in enumerate(waiting) if i != 2] == [(1, 0)] * 4
+            assert repository.summary()["total_events"] == 5
+        finally:
+            ingest.close()
+
+        app = QuizLogApp(repository, ServerConfig(database_path=database_path))
+        body = json.dumps({"events": [_event("evt-big", selected_index=2**70, correct_index=[1])]}).encode()
+        try:
+            response = app.handle("POST", "/events/batch", {}, body)
+            assert response.status == 400
+            assert json.loads(response.body)["details"] == [
+                "selected_index is out of range", "correct_index must be a string or a number",
+            ]
+        finally:
+            repository.close()
+
+
+def test_ingest_queue_flushes_on_close():
+    with TemporaryDirectory() as tmp:
+        repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+        ingest = IngestQueue(repository)
+        futures = [ingest.submit([_event(f"evt-{i}")], "2026-04-14T12:00:00Z") for i in range(50)]
+        ingest.close()
+        try:
+            assert all(f.done() for f in futures)
+            assert repository.summary()["total_events"] == 50
+            with pytest.raises(IngestClosed):
+                ingest.submit([_event("late")], "2026-04-14T12:00:00Z")
+        finally:
+            repository.close()
+
+
+def test_compact_storage_round_trips_events():
+    events = [
+        _event("evt-1", question_id="q-1", selected_index=2, correct_index=2, result="correct",
+               metadata={"score": "1", "tags": ["a", "b"]}, client_extra={"nested": True}),
+        _event("evt-2", course_key=None, selected_index="3"),  # explicit null, wrong type
+        _event("evt-3"),  # no metadata at all
+    ]
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        try:
+            repository.insert_events(events, "2026-04-14T12:00:00Z")
+            full_export = list(repository.iter_export({}))
+            full_page, _ = repository.list_events({}, 10)
+
+            for storage in ("compact", "compact-zlib", "full", "compact"):
+                assert repository.migrate_storage(storage) == 3
+                assert list(repository.iter_export({})) == full_export
+                assert repository.list_events({}, 10)[0] == full_page
+
+            # New uploads are written compactly and read back the same way.
+            repository.insert_events([_event("evt-4", metadata={"k": "v"})], "2026-04-14T12:01:00Z")
+            with repository._connect() as connection:
+                row = connection.execute(
+                    "SELECT payload_json, metadata_json, extra FROM events WHERE event_id = 'evt-4'"
+                ).fetchone()
+            assert row["payload_json"] is None and row["metadata_json"] is None
+            assert json.loads(row["extra"]) == {"metadata": {"k": "v"}}
+            assert json.loads(list(repository.iter_export({}))[-1])["metadata"] == {"k": "v"}
+            assert repository.summary()["total_events"] == 4
+            assert repository.list_events({"device_id": "dev-1"}, 10)[0][0]["event_id"] == "evt-4"
+        finally:
+            repository.close()
+
+        # The mode is stored in the database.
+        reopened = EventRepository(database_path)
+        try:
+            assert reopened.storage == "compact"
+        finally:
+            reopened.close()
+
+
+def test_partitions_route_by_month_and_retention_keeps_rollups():
+    events = [
+        _event("m1", session_id="s-old", question_id="q-1", result="correct", occurred_at="2026-01-20T10:00:00Z"),
+        _event("m2", session_id="s-old", question_id="q-1", result="wrong", occurred_at="2026-02-01T10:00:00Z"),
+        _event("m3", session_id="s-new", question_id="q-1", result="correct", occurred_at="2026-04-02T10:00:00Z"),
+        _event("m4", session_id="s-new", occurred_at="not a date"),
+    ]
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        try:
+            for n, event in enumerate(events):
+                repository.insert_events([event], f"2026-04-14T12:00:0{n}Z")
+            with repository._connect() as connection:
+                assert repository._existing_partitions(connection) == [
+                    "events_2026_01", "events_2026_02", "events_2026_04", "events_undated",
+                ]
+                assert connection.execute("SELECT event_id FROM events_2026_02").fetchall()[0][0] == "m2"
+
+            # Reads and keyset pages span every partition.
+            first, cursor = repository.list_events({}, 3)
+            rest, _ = repository.list_events({}, 3, cursor)
+            assert [e["event_id"] for e in first + rest] == ["m4", "m3", "m2", "m1"]
+            live_summary = repository.summary()["by_event_type"]
+            live_sessions, _ = repository.list_sessions(10)
+
+            # Keep March and April 2026: January and February are folded and dropped.
+            today = datetime(2026, 4, 15, tzinfo=timezone.utc)
+            assert repository.apply_retention(2, today) == ["events_2026_01", "events_2026_02"]
+            assert repository.apply_retention(2, today) == []
+            assert [e["event_id"] for e in repository.list_events({}, 10)[0]] == ["m4", "m3"]
+            assert repository.summary()["by_event_type"] == live_summary
+            assert repository.list_sessions(10)[0] == live_sessions
+            with repository._connect() as connection:
+                archived = dict(connection.execute("SELECT * FROM archive_question_learners").fetchone())
+            assert archived == {
+                "question_id": "q-1", "device_id": "dev-1", "course_key": None, "events": 2, "answered": 2,
+                "correct": 1, "skipped": 0, "first_at": "2026-01-20T10:00:00Z", "last_at": "2026-02-01T10:00:00Z",
+            }
+            live_questions = repository.list_questions({}, "answered", True, 10)
+
+            # Rollups rebuilt from the archive plus the remaining events are unchanged,
+            # and late uploads for a purged month are not stored again.
+            repository.rebuild_rollups()
+            assert repository.list_sessions(10)[0] == live_sessions
+            assert repository.list_questions({}, "answered", True, 10) == live_questions
+            assert live_questions[0][0]["answered"] == 3
+            assert repository.insert_events([_event("m5", occurred_at="2026-01-21T10:00:00Z")], "2026-04-15T00:00:00Z") == (0, 1)
+        finally:
+            repository.close()
+
+        # A retention run from another process (cron) is picked up by a running server.
+        server_side = EventRepository(database_path)
+        cron = EventRepository(database_path)
+        try:
+            server_side.insert_events([_event("m6", occurred_at="2026-05-01T10:00:00Z")], "2026-05-01T10:00:01Z")
+            cron.apply_retention(1, datetime(2026, 5, 2, tzinfo=timezone.utc))
+            assert server_side.insert_events([_event("m7", occurred_at="2026-04-30T10:00:00Z")], "2026-05-02T00:00:00Z") == (0, 1)
+            assert server_side.insert_events([_event("m8", occurred_at="2026-05-03T10:00:00Z")], "2026-05-03T00:00:00Z") == (1, 0)
+            assert [e["event_id"] for e in server_side.list_events({}, 10)[0]] == ["m8", "m6", "m4"]
+        finally:
+            server_side.close()
+            cron.close()
+
+
+def test_single_events_table_is_partitioned_on_open():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        connection = sqlite3.connect(database_path)
+        connection.execute(EVENTS_TABLE_SQL.format(name="events").replace("    extra BLOB\n", "").replace(",\n)", "\n)"))
+        for n, occurred_at in enumerate(("2025-12-31T23:00:00Z", "2026-01-01T00:30:00Z", "someday")):
+            event = _event(f"old-{n}", occurred_at=occurred_at)
+            connection.execute(
+                "INSERT INTO events (event_id, occurred_at, received_at, session_id, device_id, event_type, payload_json) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (event["event_id"], occurred_at, f"2026-01-02T00:00:0{n}Z", "sess-1", "dev-1",
+                 "question_answered", json.dumps(event)),
+            )
+        connection.commit()
+        connection.close()
+
+        repository = EventRepository(database_path)
+        try:
+            with repository._connect() as connection:
+                assert repository._existing_partitions(connection) == [
+                    "events_2025_12", "events_2026_01", "events_undated",
+                ]
+                assert connection.execute("SELECT type FROM sqlite_master WHERE name = 'events'").fetchone()[0] == "view"
+            assert [e["event_id"] for e in repository.list_events({}, 10)[0]] == ["old-2", "old-1", "old-0"]
+            assert repository.summary()["total_events"] == 3
+            repository.insert_events([_event("new-1", occurred_at="2026-01-05T00:00:00Z")], "2026-01-05T00:00:01Z")
+            assert repository.summary()["total_events"] == 4
+        finally:
+            repository.close()
+
+
+def test_read_endpoints_revalidate_with_etags():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        repository.insert_events([_event("evt-1")], "2026-04-14T12:00:00Z")
+        try:
+            with _serve(repository, database_path) as base_url:
+                connection = http.client.HTTPConnection(base_url.removeprefix("http://"), timeout=5)
+
+                def get(path, etag=None):
+                    connection.request("GET", path, headers={"If-None-Match": etag} if etag else {})
+                    response = connection.getresponse()
+                    return response.status, response.headers, response.read()
+
+                status, headers, body = get("/api/summary")
+                assert status == 200 and headers["Cache-Control"] == "no-cache"
+                assert b"\n" not in body and json.loads(body)["total_events"] == 1
+                etag, summary = headers["ETag"], body
+
+                status, headers, body = get("/api/summary", etag)
+                assert (status, body, headers["ETag"]) == (304, b"", etag)
+                assert get("/api/summary", f"W/{etag}")[0] == 304
+                # Another query has its own tag; the unchanged summary is served from the cache.
+                assert get("/api/events?limit=5")[1]["ETag"] != etag
+                assert get("/api/summary")[2] == summary
+                assert b"\n  " in get("/api/summary?pretty=1")[2]
+                assert get("/api/questions?sort=popularity")[0] == 400
+                status, headers, body = get("/api/questions?sort=correct_rate&order=asc")
+                assert status == 200 and "ETag" in headers and json.loads(body)["questions"] == []
+
+                repository.insert_events([_event("evt-2")], "2026-04-14T12:01:00Z")
+                status, headers, body = get("/api/summary", etag)
+                assert status == 200 and headers["ETag"] != etag
+                assert json.loads(body)["total_events"] == 2
+                # A duplicate upload changes nothing, so the tag stays valid.
+                repository.insert_events([_event("evt-2")], "2026-04-14T12:02:00Z")
+                assert get("/api/summary", headers["ETag"])[0] == 304
+
+                connection.request("GET", "/health")
+                cache = json.loads(connection.getresponse().read())["cache"]
+                assert cache["hits"] >= 1
+                connection.close()
+        finally:
+            repository.close()
+
+
+def test_etags_from_before_a_restart_are_not_reused():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        repository.insert_events([_event("evt-1")], "2026-04-14T12:00:00Z")
+        app = QuizLogApp(repository, ServerConfig(database_path=database_path))
+        etag = dict(app.handle("GET", "/api/summary", {}, b"").headers)["ETag"]
+        repository.close()
+
+        # As many writes after the restart as before it: the version still moves on.
+        repository = EventRepository(database_path)
+        repository.insert_events([_event("evt-2")], "2026-04-14T12:01:00Z")
+        app = QuizLogApp(repository, ServerConfig(database_path=database_path))
+        try:
+            response = app.handle("GET", "/api/summary", {"If-None-Match": etag}, b"")
+            assert response.status == 200 and json.loads(response.body)["total_events"] == 2
+            # A restart alone changes nothing, so the new tag stays valid.
+            etag = dict(response.headers)["ETag"]
+            repository.close()
+            repository = EventRepository(database_path)
+            app = QuizLogApp(repository, ServerConfig(database_path=database_path))
+            assert app.handle("GET", "/api/summary", {"If-None-Match": etag}, b"").status == 304
+        finally:
+            repository.close()
+
+
+def _sse_messages(stream, count):
+    """Read count SSE messages from a file-like stream as (event, data) pairs."""
+    messages, event = [], None
+    while len(messages) < count:
+        line = stream.readline().decode("utf-8").rstrip("\r\n")
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            messages.append((event, json.loads(line[len("data: "):])))
+    return messages
+
+
+def test_stream_pushes_new_events_to_every_viewer():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        repository.insert_events([_event("evt-1", course_key="A")], "2026-04-14T12:00:00Z")
+        try:
+            with _serve(repository, database_path) as base_url, _serve_async(repository, database_path) as port:
+                viewers = [urllib.request.urlopen(f"{base_url}/api/stream", timeout=5)]
+                viewers.append(urllib.request.urlopen(f"http://127.0.0.1:{port}/api/stream", timeout=5))
+                for viewer in viewers:
+                    assert viewer.headers["Content-Type"].startswith("text/event-stream")
+                    (event, counters), = _sse_messages(viewer, 1)
+                    assert event == "counters" and counters["total_events"] == 1
+
+                repository.insert_events([_event("evt-1"), _event("evt-2", course_key="B")], "2026-04-14T12:01:00Z")
+                for viewer in viewers:
+                    (_, pushed), (_, counters) = _sse_messages(viewer, 2)
+                    # Only the event actually stored is pushed, and the counters follow it.
+                    assert [e["event_id"] for e in pushed["events"]] == ["evt-2"]
+                    assert pushed["events"][0]["server_received_at"] == "2026-04-14T12:01:00Z"
+                    assert counters["total_events"] == 2 and counters["by_course"] == {"A": 1, "B": 1}
+                for viewer in viewers:
+                    viewer.close()
+        finally:
+            repository.close()
+
+
+def test_async_server_idle_timeout_spares_slow_uploads():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        try:
+            with _serve_async(repository, database_path, idle_timeout=0.3, body_timeout=0.6) as port:
+                body = json.dumps({"events": [_event(f"evt-{i}") for i in range(20)]}).encode()
+                head = (f"POST /events/batch HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+                        f"Content-Length: {len(body)}\r\n\r\n").encode()
+                # The body trickles in for well over the idle timeout, but never pauses for long.
+                slow = socket.create_connection(("127.0.0.1", port), timeout=5)
+                slow.sendall(head)
+                step = len(body) // 8 + 1
+                for start in range(0, len(body), step):
+                    time.sleep(0.1)
+                    slow.sendall(body[start:start + step])
+                response = slow.makefile("rb")
+                assert response.readline().startswith(b"HTTP/1.1 200")
+                slow.close()
+                assert repository.summary()["total_events"] == 20
+
+                # A body that stops arriving is still dropped.
+                stalled = socket.create_connection(("127.0.0.1", port), timeout=5)
+                stalled.sendall(head + body[:10])
+                assert stalled.recv(1) == b""
+                stalled.close()
+        finally:
+            repository.close()
+
+
+def test_async_server_closes_with_streams_and_idle_connections_open():
+    with TemporaryDirectory() as tmp:
+        database_path = Path(tmp) / "quizlog.sqlite3"
+        repository = EventRepository(database_path)
+        app = QuizLogApp(repository, ServerConfig(database_path=database_path))
+        server = AsyncQuizLogServer(app, "127.0.0.1", 0, max_concurrency=4)
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(server.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            viewer = urllib.request.urlopen(f"http://127.0.0.1:{server.port}/api/stream", timeout=5)
+            assert _sse_messages(viewer, 1)[0][0] == "counters"
+            idle = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            idle.request("GET", "/health")
+            assert idle.getresponse().read()
+
+            started = time.monotonic()
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=3)
+            assert time.monotonic() - started < 3
+            # Both connections were ended by the server, not left to their timeouts.
+            assert viewer.read().strip() == b""
+            assert idle.sock.recv(1) == b""
+            viewer.close()
+            idle.close()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+            repository.close()
+
+
+def test_live_feed_drops_viewers_that_fall_behind():
+    with TemporaryDirectory() as tmp:
+        repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+        try:
+            feed = LiveFeed(repository, queue_size=3)
+            slow, fast = feed.subscribe(), feed.subscribe()
+            assert len(fast.wait(0)) == 1  # the current counters
+            for n in range(3):
+                repository.insert_events([_event(f"evt-{n}")], f"2026-04-14T12:00:0{n}Z")
+                assert len(fast.wait(0)) == 1
+            assert feed.stats() == {"subscribers": 1}
+            # Counters and two commits were queued when the third overflowed: then the stream ends.
+            assert len(slow.wait(0)) == 3
+            assert slow.wait(0) is None
+            assert fast.wait(0) == []
+        finally:
+            repository.close()
+
+
+def test_question_counters_follow_ingest_and_page_by_any_sort():
+    events = []
+    # Ten devices; device n answers q-easy correctly always, q-hard only if n >= 7,
+    # and q-split correctly exactly when it is one of the stronger devices.
+    for n in range(10):
+        device = f"dev-{n}"
+        for question, correct in (("q-easy", True), ("q-hard", n >= 7), ("q-split", n >= 5)):
+            events.append(_event(f"{device}-{question}", device_id=device, question_id=question,
+                                 course_key="A", result="correct" if correct else "wrong"))
+        for attempt in range(n % 3):
+            events.append(_event(f"{device}-retry-{attempt}", device_id=device, question_id="q-hard",
+                                 course_key="A", result="wrong"))
+    events.append(_event("skip-1", question_id="q-skip", course_key="B", event_type="question_skipped"))
+    with TemporaryDirectory() as tmp:
+        repository = EventRepository(Path(tmp) / "quizlog.sqlite3")
+        try:
+            repository.insert_events(events, "2026-04-14T12:00:00Z")
+            repository.insert_events(events[:5], "2026-04-14T12:01:00Z")  # duplicates: not counted
+
+            questions = {q["question_id"]: q for q in repository.list_questions({}, "question_id", False, 10)[0]}
+            assert questions["q-easy"]["correct_rate"] == 1.0
+            assert questions["q-hard"]["answered"] == 10 + sum(n % 3 for n in range(10))
+            assert questions["q-hard"]["learners"] == 10
+            assert questions["q-hard"]["mean_attempts"] == round(questions["q-hard"]["answered"] / 10, 4)
+            assert questions["q-skip"]["skip_rate"] == 1.0 and questions["q-skip"]["correct_rate"] is None
+            # Stronger devices get q-split right: it discriminates; q-easy has no spread.
+            assert questions["q-split"]["discrimination"] > 0.3
+            assert questions["q-easy"]["discrimination"] is None
+
+            # Keyset pages in any order visit each question once, in order.
+            for sort in ("correct_rate", "skip_rate", "mean_attempts", "answered"):
+                for descending in (True, False):
+                    seen, cursor = [], None
+                    while True:
+                        page, cursor = repository.list_questions({}, sort, descending, 1, cursor)
+                        seen.extend(page)
+                        if cursor is None:
+                            break
+                    assert sorted(q["question_id"] for q in seen) == sorted(questions)
+                    keys = [(q[sort] if q[sort] is not None else -1, q["question_id"]) for q in seen]
+                    assert keys == sorted(keys, reverse=descending)
+
+            hardest, _ = repository.list_questions({"course_key": "A"}, "correct_rate", False, 1)
+            assert hardest[0]["question_id"] == "q-hard"
+            assert [q["question_id"] for q in repository.list_questions({"min_answered": "11"}, "answered", True, 10)[0]] == ["q-hard"]
+            with pytest.raises(ValueError):
+                repository.list_questions({}, "popularity", True, 10)
+
+            # The counters match a rebuild from the events.
+            with repository._connect() as connection:
+                before = [tuple(row) for row in connection.execute("SELECT * FROM question_learner_rollups ORDER BY 1, 2")]
+            repository.rebuild_rollups()
+            with repository._connect() as connection:
+                after = [tuple(row) for row in connection.execute("SELECT * FROM question_learner_rollups ORDER BY 1, 2")]
+            assert after == before
+            assert {q["question_id"]: q for q in repository.list_questions({}, "question_id", False, 10)[0]} == questions
+        finally:
+            repository.close()
@@ -0,0 +1,40 @@
+import json
+from quizlib.loader import load_all_quizzes
+from quizlib.records import QuestionRecord, question_course
+
+def test_record_dict_compatibility():
+    q = {
+        "question": "Q?",
+        "answers": [{"text": "A", "correct": False}, {"text": "B", "correct": True}],
+        "explanation": "E",
+        "tags": ["t1"],
+        "original_file": "dropped.docx",
+    }
+    rec = QuestionRecord.from_dict(q, 7, "Curso", None, 0, "data/Curso/f.json")
+    assert rec["_quiz_id"] == 7
+    assert rec.get("_quiz_source") == "data/Curso/f.json"
+    assert rec["answers"] == q["answers"]
+    assert rec.correct_mask == 0b10
+    assert rec.is_correct(1) and not rec.is_correct(0)
+    assert rec.get("original_file") is None
+    assert rec.get("tags") == ("t1",)
+    assert not hasattr(rec, "__dict__")
+
+def test_loader_records_course_section_and_file_index(tmp_path):
+    folder = tmp_path / "data"
+    (folder / "CursoA" / "Sec1").mkdir(parents=True)
+    (folder / "CursoB").mkdir()
+    quiz = {"questions": [{"question": "One", "answers": [{"text": "x", "correct": True}]}]}
+    (folder / "CursoA" / "Sec1" / "a.json").write_text(json.dumps(quiz), encoding="utf-8")
+    (folder / "CursoB" / "b.json").write_text(json.dumps(quiz), encoding="utf-8")
+
+    questions, _cursos, info = load_all_quizzes(str(folder))
+    by_course = {q.course: q for q in questions}
+    assert by_course["CursoA"].section == "Sec1"
+    assert by_course["CursoB"].section is None
+    # Same question text in both files → same stable id
+    assert by_course["CursoA"].id == by_course["CursoB"].id
+    for q in questions:
+        assert info[q.file_index]["filepath"] == q.source
+        # Sectioned files used to resolve to the section folder
+        assert question_course(q) == q.course
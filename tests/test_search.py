@@ -0,0 +1,79 @@
+import json
+
+import quizlib.search as search
+from quizlib.engine import select_questions
+from quizlib.loader import load_all_quizzes
+
+
+def write_quiz(path, *questions):
+    path.write_text(json.dumps({"questions": [
+        {"question": q, "answers": [{"text": "Sí", "correct": True}, {"text": "No", "correct": False}],
+         "explanation": "Según la Constitución."}
+        for q in questions
+    ]}), encoding="utf-8")
+
+
+def test_tokenize_folds_accents_and_drops_stopwords():
+    assert search.tokenize("¿Qué artículo de la CONSTITUCIÓN española?") == {
+        "articulo", "constitucion", "espanola",
+    }
+    # Duplicate detection shingles these, so order and stopwords are kept.
+    assert search.words("¿Qué artículo de la Constitución?") == ["que", "articulo", "de", "la", "constitucion"]
+
+
+def test_search_index_queries_and_incremental_rebuild(tmp_path, monkeypatch):
+    folder = tmp_path / "data"
+    (folder / "C1").mkdir(parents=True)
+    write_quiz(folder / "C1" / "a.json", "El Tribunal Constitucional", "Las Cortes Generales")
+    write_quiz(folder / "C1" / "b.json", "El Defensor del Pueblo")
+    questions = load_all_quizzes(str(folder))[0]
+    ids = {q.question: q.id for q in questions}
+
+    index = search.SearchIndex.build(questions, str(folder))
+    assert index.search("tribunal CONSTITUCIONAL") == [ids["El Tribunal Constitucional"]]
+    assert index.search("tribu") == [ids["El Tribunal Constitucional"]]
+    assert index.search("según") == sorted(ids.values())  # explanations are indexed
+    assert index.search("de la") == []
+    assert (folder / search.SEARCH_INDEX_FILENAME).exists()
+
+    # Only files the loader re-indexed are tokenized again.
+    write_quiz(folder / "C1" / "b.json", "El Defensor del Pueblo y el Senado")
+    questions = load_all_quizzes(str(folder))[0]
+    tokenized = []
+    original = search._file_postings
+    monkeypatch.setattr(search, "_file_postings",
+                        lambda qs: tokenized.append([q.source for q in qs]) or original(qs))
+    index = search.SearchIndex.build(questions, str(folder))
+    assert tokenized == [[str(folder / "C1" / "b.json")]]
+    hits = index.search("senado")
+    assert len(hits) == 1
+
+    pairs = select_questions(questions, {}, "all", question_ids=hits)
+    assert [q.question for _qid, q in pairs] == ["El Defensor del Pueblo y el Senado"]
+
+
+def test_search_index_follows_renumbered_loader_index(tmp_path):
+    folder = tmp_path / "data"
+    folder.mkdir()
+    write_quiz(folder / "a.json", "El Tribunal Constitucional")
+    write_quiz(folder / "b.json", "El Defensor del Pueblo")
+    questions = load_all_quizzes(str(folder))[0]
+    assert search.SearchIndex.build(questions, str(folder)).search("tribunal") == [questions[0].id]
+
+    # A rebuilt loader index can hand out new ids while every mtime stays the same.
+    index_path = folder / ".quiz_index.json"
+    data = json.loads(index_path.read_text(encoding="utf-8"))
+    for entry in data["files"].values():
+        for e in entry["questions"]:
+            e["id"] += 100
+    index_path.write_text(json.dumps(data), encoding="utf-8")
+
+    questions = load_all_quizzes(str(folder))[0]
+    by_id = {q.id: q for q in questions}
+    index = search.SearchIndex.build(questions, str(folder))
+    assert [by_id[qid].question for qid in index.search("tribunal")] == ["El Tribunal Constitucional"]
+    assert set(index.search("pueblo")) <= set(by_id)
+
+    # Ids outside the corpus the index was built for are never returned.
+    stale = search.SearchIndex(index.files, known_ids={questions[1].id})
+    assert stale.search("tribunal") == []
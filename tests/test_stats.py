@@ -0,0 +1,52 @@
+from datetime import date
+from quizlib.records import QuestionRecord
+from quizlib.stats import StatsAggregator
+
+def make_record(qid, course, section, source):
+    q = {"question": f"Q{qid}", "answers": [{"text": "x", "correct": True}]}
+    return QuestionRecord.from_dict(q, qid, course, section, 0, source)
+
+def sample():
+    questions = [
+        make_record(1, "C1", "S1", "d/C1/S1/a.json"),
+        make_record(2, "C1", "S1", "d/C1/S1/a.json"),
+        make_record(3, "C1", None, "d/C1/b.json"),
+        make_record(4, "C2", None, "d/C2/c.json"),
+        # same question id in another file shares its perf entry
+        make_record(1, "C2", None, "d/C2/c.json"),
+    ]
+    perf = {
+        "1": {"history": ["wrong"], "next_review": "2025-05-01"},
+        "2": {"history": ["correct"], "next_review": "2025-05-20"},
+        "3": {"history": ["skipped"], "next_review": "2025-05-10"},
+    }
+    return questions, perf
+
+def test_rollups_single_pass():
+    questions, perf = sample()
+    stats = StatsAggregator(questions, perf)
+    today = date(2025, 5, 10)
+    assert stats.repository.as_dict(today) == {
+        "total": 5, "never": 1, "skipped": 1, "wrong": 2, "correct": 1, "due": 4
+    }
+    assert stats.file("d/C1/S1/a.json").as_dict(today)["due"] == 1
+    assert stats.section("C1", "S1").total == 2
+    assert stats.course("C2").as_dict(today) == {
+        "total": 2, "never": 1, "skipped": 0, "wrong": 1, "correct": 0, "due": 2
+    }
+    assert stats.file("missing.json").total == 0
+
+def test_refresh_matches_rebuild():
+    questions, perf = sample()
+    stats = StatsAggregator(questions, perf)
+    perf["1"]["history"].append("correct")
+    perf["1"]["next_review"] = "2025-06-01"
+    perf["4"] = {"history": ["wrong"], "next_review": "2025-05-11"}
+    stats.refresh(1)
+    stats.refresh("4")
+    fresh = StatsAggregator(questions, perf)
+    today = date(2025, 5, 10)
+    for name in ("C1", "C2"):
+        assert stats.course(name).as_dict(today) == fresh.course(name).as_dict(today)
+    assert stats.repository.as_dict(today) == fresh.repository.as_dict(today)
+    assert stats.repository.reviews == fresh.repository.reviews
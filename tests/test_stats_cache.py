@@ -0,0 +1,64 @@
+import json
+import os
+from datetime import date
+from quizlib.loader import load_all_quizzes, current_corpus_version
+from quizlib.performance import perf_store_version, save_performance_data
+from quizlib.stats import (
+    StatsAggregator,
+    load_stats_cache,
+    save_stats_cache,
+)
+
+def make_corpus(folder):
+    (folder / "C1").mkdir(parents=True)
+    quiz = {"questions": [
+        {"question": "One", "answers": [{"text": "x", "correct": True}], "tags": ["t"]},
+        {"question": "Two", "answers": [{"text": "y", "correct": True}]},
+    ]}
+    (folder / "C1" / "a.json").write_text(json.dumps(quiz), encoding="utf-8")
+    (folder / "exam_dates.json").write_text('{"C1": "2025-06-01"}', encoding="utf-8")
+
+def test_cache_round_trip_and_invalidation(tmp_path):
+    folder = tmp_path / "data"
+    make_corpus(folder)
+    questions, _c, _i = load_all_quizzes(str(folder))
+    corpus = current_corpus_version(str(folder))
+    assert corpus
+
+    perf_path = str(tmp_path / "perf.json")
+    perf = {str(questions[0].id): {"history": ["wrong"], "next_review": "2025-05-01"}}
+    save_performance_data(perf, perf_path)
+    perf_version = perf_store_version(perf_path)
+
+    stats = StatsAggregator(questions, perf)
+    cache_path = str(tmp_path / "cache.json")
+    save_stats_cache(cache_path, stats, perf_version, corpus)
+
+    cached = load_stats_cache(cache_path, perf_version, corpus)
+    warm = StatsAggregator.from_cache(questions, perf, cached)
+    today = date(2025, 5, 10)
+    assert warm.repository.as_dict(today) == stats.repository.as_dict(today)
+    assert warm.tag("t").as_dict(today) == {"total": 1, "never": 0, "skipped": 0,
+                                            "wrong": 1, "correct": 0, "due": 1}
+
+    # Stale perf store or corpus → no cache
+    assert load_stats_cache(cache_path, "other", corpus) is None
+    assert load_stats_cache(cache_path, perf_version, "other") is None
+
+    # First refresh after a warm start rebuilds from current perf data
+    perf[str(questions[1].id)] = {"history": ["correct"], "next_review": "2025-06-01"}
+    warm.refresh(questions[1].id)
+    assert warm.repository.correct == 1
+
+def test_corpus_version_tracks_file_changes(tmp_path):
+    folder = tmp_path / "data"
+    make_corpus(folder)
+    load_all_quizzes(str(folder))
+    before = current_corpus_version(str(folder))
+    assert before == current_corpus_version(str(folder))
+
+    path = folder / "C1" / "a.json"
+    os.utime(path, (1, 1))
+    assert current_corpus_version(str(folder)) is None
+    load_all_quizzes(str(folder))
+    assert current_corpus_version(str(folder)) not in (None, before)
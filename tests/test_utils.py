@@ -0,0 +1,59 @@
+import io
+
+import quizlib.utils as utils
+
+
+class _Tty(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def isatty(self):
+        return True
+
+    def write(self, s):
+        if s:
+            self.writes += 1
+        return super().write(s)
+
+
+def _terminal(monkeypatch, term="xterm-256color"):
+    out = _Tty()
+    monkeypatch.setattr(utils.sys, "stdout", out)
+    monkeypatch.setenv("TERM", term)
+    monkeypatch.setattr(utils.os, "name", "posix")
+    calls = []
+    monkeypatch.setattr(utils.os, "system", calls.append)
+    return out, calls
+
+
+def test_frame_is_written_once_with_ansi_clear(monkeypatch):
+    out, calls = _terminal(monkeypatch)
+    frame = utils.Frame()
+    frame.print("Pregunta 1:")
+    frame.print("[A]", "uno", sep=" ")
+    frame.show()
+
+    assert out.getvalue() == utils.CLEAR_SEQUENCE + "Pregunta 1:\n[A] uno\n"
+    assert out.writes == 1
+    assert calls == []
+    # The buffer is reset for the next screen.
+    assert frame.text() == ""
+
+
+def test_frame_falls_back_to_clear_command_on_dumb_terminals(monkeypatch):
+    out, calls = _terminal(monkeypatch, term="dumb")
+    frame = utils.Frame()
+    frame.print("menú")
+    frame.show()
+
+    assert calls == ["clear"]
+    assert out.getvalue() == "menú\n"
+
+
+def test_frame_without_terminal_only_prints(monkeypatch, capsys):
+    monkeypatch.delenv("TERM", raising=False)
+    frame = utils.Frame()
+    frame.print("hola")
+    frame.show()
+    assert capsys.readouterr().out == "hola\n"